@@ -0,0 +1,74 @@
+"""Benchmark recall@k vs QPS de los índices de vector_store.search_engine sobre datos sintéticos 384-d.
+
+Uso (desde backend/asistente-rag):
+    python -m benchmarks.bench_ann                         # 100k vectores, 200 consultas, k=10
+    python -m benchmarks.bench_ann --n 20000 --queries 500 --k 4
+
+Los datos son una mezcla de gaussianas (clusters), más parecida a embeddings reales que ruido
+uniforme. La verdad de referencia es FlatIndex (exacto). Para IVF se barre `nprobe`; para HNSW
+(si hnswlib está instalado) se barre `ef_search`.
+"""
+from __future__ import annotations
+import argparse, time
+import numpy as np
+from vector_store.search_engine import FlatIndex, create_index, hnswlib
+
+DIM = 384
+
+def synthetic(n: int, n_queries: int, clusters: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, DIM)).astype(np.float32)
+    data = centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, DIM)).astype(np.float32)
+    queries = centers[rng.integers(0, clusters, n_queries)] + 0.6 * rng.standard_normal((n_queries, DIM)).astype(np.float32)
+    return data, queries
+
+def evaluate(index, queries, truth, k):
+    hits = 0
+    t0 = time.perf_counter()
+    results = [index.search(q, k)[0] for q in queries]
+    elapsed = time.perf_counter() - t0
+    for got, exp in zip(results, truth):
+        hits += len(set(got) & set(exp))
+    return hits / (len(truth) * k), len(queries) / elapsed
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=100_000)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--clusters", type=int, default=200)
+    args = ap.parse_args()
+    data, queries = synthetic(args.n, args.queries, args.clusters)
+    ids = np.arange(args.n)
+
+    flat = FlatIndex(DIM)
+    flat.build(ids, data)
+    truth = [flat.search(q, args.k)[0] for q in queries]
+    recall, qps = evaluate(flat, queries, truth, args.k)
+    print(f"n={args.n:,} dim={DIM} k={args.k} consultas={args.queries}")
+    print(f"{'índice':<28}{'build (s)':>10}{'recall@k':>10}{'QPS':>10}")
+    print(f"{'flat':<28}{'-':>10}{recall:>10.3f}{qps:>10.0f}")
+
+    t0 = time.perf_counter()
+    ivf = create_index("ivf", DIM)
+    ivf.build(ids, data)
+    build_s = time.perf_counter() - t0
+    for nprobe in (1, 2, 4, 8, 16, 32, 64):
+        ivf.nprobe = nprobe
+        recall, qps = evaluate(ivf, queries, truth, args.k)
+        print(f"{f'ivf nlist={ivf.nlist} nprobe={nprobe}':<28}{build_s:>10.1f}{recall:>10.3f}{qps:>10.0f}")
+
+    if hnswlib is None:
+        print("hnsw: omitido (pip install hnswlib)")
+        return
+    t0 = time.perf_counter()
+    hnsw = create_index("hnsw", DIM, M=16, ef_construction=200)
+    hnsw.build(ids, data)
+    build_s = time.perf_counter() - t0
+    for ef in (16, 32, 64, 128, 256):
+        hnsw.set_ef(ef)
+        recall, qps = evaluate(hnsw, queries, truth, args.k)
+        print(f"{f'hnsw M=16 ef_search={ef}':<28}{build_s:>10.1f}{recall:>10.3f}{qps:>10.0f}")
+
+if __name__ == "__main__":
+    main()
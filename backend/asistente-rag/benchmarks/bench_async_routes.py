@@ -0,0 +1,89 @@
+"""Benchmark: ráfaga de GET /news con endpoints síncronos (threadpool AnyIO) vs async (executor de la base).
+
+Uso (desde backend/asistente-rag):
+    python -m benchmarks.bench_async_routes
+    python -m benchmarks.bench_async_routes --concurrency 500 --rows 5000
+
+Sobre una SQLite temporal se comparan dos apps:
+    - "sync": GET /news y GET /news/{id} como `def` llamando al store síncrono (como antes): cada
+      petición en curso ocupa un hilo del threadpool de AnyIO (40 por defecto, compartido con
+      todos los endpoints síncronos) y cada hilo abre su propia conexión SQLite.
+    - "async": el router actual (`async def` + variantes async del store en el executor de la base).
+Se disparan --concurrency peticiones de listado/detalle a la vez (httpx + ASGITransport, sin red).
+Reporta req/s, latencia p50/p95, pico de hilos vivos y conexiones SQLite abiertas en la ronda.
+"""
+from __future__ import annotations
+import argparse, asyncio, os, tempfile, threading, time
+import numpy as np
+
+def _build(mode: str):
+    from fastapi import FastAPI, HTTPException
+    from rag_api.stores import news_store
+    from rag_api.routers import news
+    app = FastAPI()
+    if mode == "async":
+        app.include_router(news.router)
+    else:
+        @app.get("/news")
+        def list_news(q: str | None = None, page: int = 1, page_size: int = 10):
+            return news_store.search_news(q=q, page=page, page_size=page_size)
+
+        @app.get("/news/{nid}")
+        def get_news(nid: str):
+            item = news_store.get_news(nid)
+            if not item:
+                raise HTTPException(status_code=404)
+            return item
+
+    return app
+
+def _seed(n: int) -> None:
+    from rag_api.stores import news_store
+    for i in range(n):
+        news_store.upsert_news({"id": f"n{i}", "fecha": f"2025-{1 + i % 12:02d}-01", "titulo": f"Noticia {i} sobre becas",
+                                "descripcionCorta": "corta", "descripcionLarga": "larga " * 50, "autor": "Admin",
+                                "categoria": ["Evento"]})
+
+async def _burst(app, concurrency: int, rows: int):
+    import httpx
+    transport = httpx.ASGITransport(app=app)
+    peak = threading.active_count()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        async def req(i: int):
+            nonlocal peak
+            t = time.perf_counter()
+            if i % 2:
+                r = await c.get("/news", params={"q": "becas", "page": 1 + i % 5})
+            else:
+                r = await c.get(f"/news/n{i % rows}")
+            peak = max(peak, threading.active_count())
+            return r, time.perf_counter() - t
+
+        t0 = time.perf_counter()
+        results = await asyncio.gather(*(req(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+    assert all(r.status_code == 200 for r, _ in results)
+    return elapsed, np.asarray([lat for _, lat in results]) * 1000, peak
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=1000)
+    ap.add_argument("--concurrency", type=int, default=300)
+    ap.add_argument("--rounds", type=int, default=3)
+    args = ap.parse_args()
+    os.environ["NEWS_DB_PATH"] = tempfile.mktemp(suffix=".db")
+    os.environ.pop("DATABASE_URL", None)
+    from rag_api.core import db
+    _seed(args.rows)
+    print(f"{args.concurrency} peticiones concurrentes, {args.rows:,} filas, cpus={os.cpu_count()}")
+    for mode in ("sync", "async"):
+        app = _build(mode)
+        for r in range(args.rounds):
+            opened = db.pool_stats()["opened"]
+            elapsed, lat, peak = asyncio.run(_burst(app, args.concurrency, args.rows))
+            print(f"{mode:<6} ronda {r + 1}: {args.concurrency / elapsed:>8,.0f} req/s   p50 {np.percentile(lat, 50):7.1f} ms"
+                  f"   p95 {np.percentile(lat, 95):7.1f} ms   hilos {peak:>3}   conexiones nuevas {db.pool_stats()['opened'] - opened}")
+    print(db.executor_stats())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark: latencia de una consulta por petición, conexión nueva vs conexión reutilizada.
+
+Uso (desde backend/asistente-rag):
+    python -m benchmarks.bench_db                     # SQLite temporal
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_db --requests 200
+
+Cada "petición" hace lo que un GET /news/{id}: tomar conexión, `SELECT * FROM news WHERE id = ?`,
+soltarla. "antes" abre y cierra una conexión por petición (el get_connection anterior); "después"
+usa rag_api.core.db.get_connection (conexión por hilo en SQLite, psycopg_pool en Postgres).
+Con DATABASE_URL apuntando a Postgres se crea y borra una tabla temporal `bench_news`.
+"""
+from __future__ import annotations
+import argparse, os, sqlite3, tempfile, time
+import numpy as np
+
+def _report(name: str, lat) -> None:
+    lat = np.asarray(lat) * 1000
+    print(f"{name:<10} p50 {np.percentile(lat, 50):8.3f} ms   p95 {np.percentile(lat, 95):8.3f} ms   media {lat.mean():8.3f} ms")
+
+def bench_sqlite(n: int) -> None:
+    path = tempfile.mktemp(suffix=".db")
+    os.environ["NEWS_DB_PATH"] = path
+    from rag_api.core import db
+    with db.get_connection() as conn:
+        conn.execute("CREATE TABLE news (id TEXT PRIMARY KEY, titulo TEXT)")
+        conn.executemany("INSERT INTO news VALUES (?, ?)", [(f"n{i}", f"título {i}") for i in range(1000)])
+        conn.commit()
+    before, after = [], []
+    for i in range(n):
+        t = time.perf_counter()
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("SELECT * FROM news WHERE id = ?", (f"n{i % 1000}",)).fetchone()
+        conn.close()
+        before.append(time.perf_counter() - t)
+        t = time.perf_counter()
+        with db.get_connection() as conn:
+            conn.execute("SELECT * FROM news WHERE id = ?", (f"n{i % 1000}",)).fetchone()
+        after.append(time.perf_counter() - t)
+    print(f"SQLite ({n} peticiones)")
+    _report("antes", before)
+    _report("después", after)
+    print(db.pool_stats())
+    os.remove(path)
+
+def bench_postgres(n: int) -> None:
+    import psycopg, psycopg.rows
+    from rag_api.core import db
+    url = db.DATABASE_URL.replace("+psycopg", "")
+    with db.get_connection() as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS bench_news (id TEXT PRIMARY KEY, titulo TEXT)")
+        conn.execute("TRUNCATE bench_news")
+        with conn.cursor() as cur:
+            cur.executemany("INSERT INTO bench_news VALUES (%s, %s)", [(f"n{i}", f"título {i}") for i in range(1000)])
+    before, after = [], []
+    try:
+        for i in range(n):
+            t = time.perf_counter()
+            with psycopg.connect(url, row_factory=psycopg.rows.dict_row) as conn:
+                conn.execute("SELECT * FROM bench_news WHERE id = %s", (f"n{i % 1000}",)).fetchone()
+            before.append(time.perf_counter() - t)
+            t = time.perf_counter()
+            with db.get_connection() as conn:
+                conn.execute("SELECT * FROM bench_news WHERE id = %s", (f"n{i % 1000}",)).fetchone()
+            after.append(time.perf_counter() - t)
+    finally:
+        with db.get_connection() as conn:
+            conn.execute("DROP TABLE IF EXISTS bench_news")
+    print(f"Postgres ({n} peticiones)")
+    _report("antes", before)
+    _report("después", after)
+    print(db.pool_stats())
+    db.close_pool()
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=2000)
+    args = ap.parse_args()
+    url = os.getenv("DATABASE_URL") or ""
+    if url.startswith("postgres"):
+        bench_postgres(args.requests)
+    else:
+        bench_sqlite(args.requests)
+
+if __name__ == "__main__":
+    main()
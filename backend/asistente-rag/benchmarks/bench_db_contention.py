@@ -0,0 +1,78 @@
+"""Benchmark: lecturas concurrentes de los stores con lock global vs sin lock (SQLite WAL).
+
+Uso (desde backend/asistente-rag):
+    python -m benchmarks.bench_db_contention
+    python -m benchmarks.bench_db_contention --rows 20000 --seconds 2 --threads 1,2,4,8,16
+
+Sobre una copia temporal de la tabla `news` (--rows filas) cada hilo repite la consulta paginada
+de GET /news (`news_store.search_news`, COUNT + página) durante --seconds. Modos:
+    - "lock global": cada lectura envuelta en un threading.Lock de módulo, como antes.
+    - "sin lock": lecturas directas (conexión por hilo, WAL).
+En ambos corre además un escritor que actualiza `vistas` continuamente (increment_views), como
+en producción. Reporta lecturas/s por número de hilos. SQLite libera el GIL mientras ejecuta la
+consulta, así que sin lock el throughput crece con los hilos hasta saturar núcleos.
+"""
+from __future__ import annotations
+import argparse, os, tempfile, threading, time
+
+def _seed(n: int) -> None:
+    from rag_api.core import db
+    from rag_api.stores import news_store  # noqa: F401  (init_db crea la tabla)
+    with db.write_connection() as conn:
+        conn.executemany(
+            """INSERT OR IGNORE INTO news (id, fecha, titulo, descripcionCorta, descripcionLarga, autor, categoria, imagen, destacada, vistas, created_at, updated_at)
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?)""",
+            [(f"n{i}", f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}", f"Noticia {i} sobre matrícula y becas", "corta " * 10,
+              "larga " * 80, "Admin", '["Evento"]', "", i % 7 == 0, 0, "2025-01-01T00:00:00", "2025-01-01T00:00:00")
+             for i in range(n)],
+        )
+
+def _run(threads: int, seconds: float, lock) -> float:
+    from rag_api.stores import news_store
+    stop = threading.Event()
+    counts = [0] * threads
+
+    def reader(i: int) -> None:
+        while not stop.is_set():
+            with lock:
+                news_store.search_news(q="becas", page=1 + counts[i] % 5, page_size=10)
+            counts[i] += 1
+
+    def writer() -> None:
+        while not stop.is_set():
+            with lock:
+                news_store.increment_views("n1")
+            time.sleep(0.001)
+
+    workers = [threading.Thread(target=reader, args=(i,)) for i in range(threads)] + [threading.Thread(target=writer)]
+    for w in workers:
+        w.start()
+    time.sleep(seconds)
+    stop.set()
+    for w in workers:
+        w.join()
+    return sum(counts) / seconds
+
+class _NoLock:
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=5000)
+    ap.add_argument("--seconds", type=float, default=2.0)
+    ap.add_argument("--threads", default="1,2,4,8")
+    args = ap.parse_args()
+    os.environ["NEWS_DB_PATH"] = tempfile.mktemp(suffix=".db")
+    os.environ.pop("DATABASE_URL", None)
+    _seed(args.rows)
+    print(f"{'hilos':>5} {'lock global':>14} {'sin lock':>14}   (lecturas/s, {args.rows:,} filas, cpus={os.cpu_count()})")
+    for n in (int(x) for x in args.threads.split(",")):
+        locked = _run(n, args.seconds, threading.Lock())
+        free = _run(n, args.seconds, _NoLock())
+        print(f"{n:>5} {locked:>14,.0f} {free:>14,.0f}")
+    from rag_api.core import db
+    print(db.pool_stats())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark de latencia y memoria de los backends de embeddings (torch / onnx / onnx-int8).
+
+Uso (desde backend/asistente-rag):
+    python -m benchmarks.bench_embed_backends                      # los tres backends, 128 chunks
+    python -m benchmarks.bench_embed_backends --backends torch onnx-int8 --texts 256
+
+Cada backend se mide en un proceso hijo propio para que la memoria no se mezcle:
+    - load_s:      tiempo de carga del modelo.
+    - rss_mb:      memoria residente tras cargar y codificar (pico, ru_maxrss).
+    - p50/p95 ms:  latencia de una pregunta corta (encode de tamaño 1, el caso de /ask).
+    - batch t/s:   textos por segundo codificando los chunks del Estatuto en lotes de 32.
+    - cos_vs_torch: coseno medio contra los vectores de torch (paridad).
+"""
+from __future__ import annotations
+import argparse, os, time, resource
+import multiprocessing as mp
+import numpy as np
+
+ESTATUTO = os.path.join("clean_data", "output", "EstatutoUniversitario_UNSAAC_final_corrected.json")
+QUESTIONS = ["requisitos de matrícula", "¿quién elige al rector?", "artículo 97", "licencia por maternidad docente",
+             "funciones del consejo universitario", "¿cómo se pierde la condición de estudiante?"]
+
+def _texts(limit: int):
+    from clean_data.estatuto_utils import EstatutoProcessor
+    proc = EstatutoProcessor(ESTATUTO)
+    return [proc.format_article_for_rag(c) for c in proc.data["chunks"][:limit]]
+
+def _run(backend: str, model_name: str, n_texts: int, reps: int, out) -> None:
+    from rag_api.services.embedding_backends import load_embedding_model
+    texts = _texts(n_texts)
+    t0 = time.perf_counter()
+    model, active = load_embedding_model(model_name, backend=backend)
+    load_s = time.perf_counter() - t0
+    model.encode(QUESTIONS[:1])  # Calentamiento.
+    lat = []
+    for i in range(reps):
+        t = time.perf_counter()
+        model.encode([QUESTIONS[i % len(QUESTIONS)]], convert_to_numpy=True)
+        lat.append((time.perf_counter() - t) * 1000)
+    t = time.perf_counter()
+    vecs = model.encode(texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=True)
+    batch_tps = len(texts) / (time.perf_counter() - t)
+    out.put({
+        "backend": active,
+        "load_s": load_s,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "p50": float(np.percentile(lat, 50)),
+        "p95": float(np.percentile(lat, 95)),
+        "batch_tps": batch_tps,
+        "vecs": vecs,
+    })
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    ap.add_argument("--model", default="all-MiniLM-L6-v2")
+    ap.add_argument("--texts", type=int, default=128)
+    ap.add_argument("--reps", type=int, default=200)
+    args = ap.parse_args()
+    ctx = mp.get_context("spawn")  # Proceso limpio por backend (sin torch precargado).
+    results = []
+    for backend in args.backends:
+        q = ctx.Queue()
+        p = ctx.Process(target=_run, args=(backend, args.model, args.texts, args.reps, q))
+        p.start()
+        results.append(q.get())
+        p.join()
+    ref = next((r["vecs"] for r in results if r["backend"] == "torch"), None)
+    print(f"{'backend':<10} {'load_s':>7} {'rss_mb':>8} {'p50_ms':>7} {'p95_ms':>7} {'batch_t/s':>10} {'cos_vs_torch':>13}")
+    for r in results:
+        cos = float(np.mean(np.sum(r["vecs"] * ref, axis=1))) if ref is not None else float("nan")
+        print(f"{r['backend']:<10} {r['load_s']:7.2f} {r['rss_mb']:8.0f} {r['p50']:7.2f} {r['p95']:7.2f} "
+              f"{r['batch_tps']:10.1f} {cos:13.4f}")
+
+if __name__ == "__main__":
+    main()
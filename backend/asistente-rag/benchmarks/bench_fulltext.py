@@ -0,0 +1,71 @@
+"""Benchmark: búsqueda de noticias con LIKE '%q%' (antes) vs índice FTS5 (SQLite).
+
+Uso (desde backend/asistente-rag):
+    python -m benchmarks.bench_fulltext
+    python -m benchmarks.bench_fulltext --rows 200000 --queries 200
+
+Sobre una SQLite temporal con --rows noticias sintéticas (vocabulario español, con tildes) mide
+`news_store.search_news(q=...)` (COUNT + primera página) para términos frecuentes y raros:
+    - "LIKE": la consulta anterior (lower(col) LIKE '%q%' sobre tres columnas) = recorrido completo.
+    - "FTS5": el camino actual (MATCH sobre news_fts, orden bm25 + snippet).
+Reporta latencia p50/p95 por consulta y cuántas filas devolvió cada una.
+"""
+from __future__ import annotations
+import argparse, os, random, tempfile, time
+import numpy as np
+
+WORDS = ("matrícula becas prácticas laboratorio investigación convocatoria estudiantes docentes metalurgia "
+         "minería congreso seminario biblioteca egresados admisión tesis concurso proyecto ingeniería "
+         "universidad facultad cronograma examen resultados taller charla feria empresa").split()
+
+def _seed(n: int) -> None:
+    from rag_api.core import db
+    from rag_api.stores import news_store  # noqa: F401  (init_db crea tabla, FTS y triggers)
+    rnd = random.Random(7)
+    sentence = lambda k: " ".join(rnd.choice(WORDS) for _ in range(k))
+    with db.write_connection() as conn:
+        conn.executemany(
+            """INSERT INTO news (id, fecha, titulo, descripcionCorta, descripcionLarga, autor, categoria, imagen, destacada, vistas, created_at, updated_at)
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?)""",
+            [(f"n{i}", f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}", sentence(6).capitalize(), sentence(15), sentence(120),
+              "Admin", '["Evento"]', "", 0, 0, "2025-01-01T00:00:00", "2025-01-01T00:00:00")
+             for i in range(n)],
+        )
+        conn.execute("INSERT INTO news (id, fecha, titulo, descripcionCorta, descripcionLarga, autor, categoria, created_at, updated_at) "
+                     "VALUES ('raro', '2025-01-01', 'Olimpiada de robótica', 'x', 'x', 'Admin', '[]', '', '')")
+
+def _like(q: str):
+    from rag_api.stores import news_store
+    like = f"%{q.lower()}%"
+    clause = " WHERE (lower(titulo) LIKE ? OR lower(descripcionCorta) LIKE ? OR lower(descripcionLarga) LIKE ?)"
+    with news_store.get_conn() as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM news{clause}", [like] * 3).fetchone()[0]
+        conn.execute(f"SELECT * FROM news{clause} ORDER BY fecha DESC, created_at DESC LIMIT 10", [like] * 3).fetchall()
+    return total
+
+def _fts(q: str):
+    from rag_api.stores import news_store
+    return news_store.search_news(q=q)["total"]
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=50_000)
+    ap.add_argument("--queries", type=int, default=50)
+    args = ap.parse_args()
+    os.environ["NEWS_DB_PATH"] = tempfile.mktemp(suffix=".db")
+    os.environ.pop("DATABASE_URL", None)
+    t0 = time.perf_counter()
+    _seed(args.rows)
+    print(f"{args.rows:,} filas indexadas en {time.perf_counter() - t0:.1f} s")
+    for q in ("robótica", "becas", "congreso tesis"):
+        for name, fn in (("LIKE", _like), ("FTS5", _fts)):
+            lat, total = [], 0
+            for _ in range(args.queries):
+                t = time.perf_counter()
+                total = fn(q)
+                lat.append(time.perf_counter() - t)
+            lat = np.asarray(lat) * 1000
+            print(f"{q!r:<18} {name:<5} p50 {np.percentile(lat, 50):9.2f} ms   p95 {np.percentile(lat, 95):9.2f} ms   total={total:,}")
+
+if __name__ == "__main__":
+    main()
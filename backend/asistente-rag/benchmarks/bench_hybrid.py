@@ -0,0 +1,85 @@
+"""Benchmark: recuperación solo densa vs híbrida (BM25 + denso con RRF).
+
+Uso (desde backend/asistente-rag):
+    python -m benchmarks.bench_hybrid                       # latencia sintética a 100k + hit rate en el Estatuto
+    python -m benchmarks.bench_hybrid --n 20000 --skip-quality
+
+Dos partes:
+    1. Latencia (sintética, no requiere el modelo): N fragmentos con vocabulario Zipf (~150 tokens
+       cada uno) y vectores 384-d. Reporta construcción de BM25 y p50/p95 por consulta.
+    2. Calidad (requiere sentence-transformers): sobre los chunks del Estatuto, consultas
+       "artículo N" y consultas por título de artículo; hit@k = el chunk esperado está en el top-k.
+"""
+from __future__ import annotations
+import argparse, os, time
+import numpy as np
+from rag_api.services.fragment_index import FragmentIndex
+
+DIM = 384
+ESTATUTO = os.path.join("clean_data", "output", "EstatutoUniversitario_UNSAAC_final_corrected.json")
+
+def _pct(lat):
+    return float(np.percentile(lat, 50)), float(np.percentile(lat, 95))
+
+def latency(n: int, n_queries: int, k: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"t{i}" for i in range(50_000)])
+    ranks = np.minimum(rng.zipf(1.3, size=(n, 150)) - 1, len(vocab) - 1)
+    texts = [" ".join(vocab[r]) for r in ranks]
+    vecs = rng.standard_normal((n, DIM)).astype(np.float32)
+    t0 = time.perf_counter()
+    fi = FragmentIndex([{"texto": t} for t in texts], vecs, kind="flat", params={}, hybrid=True)
+    build_s = time.perf_counter() - t0
+    queries = [" ".join(vocab[np.minimum(rng.zipf(1.3, size=4) - 1, len(vocab) - 1)]) for _ in range(n_queries)]
+    qvecs = rng.standard_normal((n_queries, DIM)).astype(np.float32)
+    dense, hybrid, bm25 = [], [], []
+    for q, v in zip(queries, qvecs):
+        t = time.perf_counter(); fi.search(v, k); dense.append((time.perf_counter() - t) * 1000)
+        t = time.perf_counter(); fi.lexical.search(q, 50); bm25.append((time.perf_counter() - t) * 1000)
+        t = time.perf_counter(); fi.search_hybrid(q, v, k); hybrid.append((time.perf_counter() - t) * 1000)
+    print(f"n={n:,}  construcción BM25+índice: {build_s:.1f} s  postings: {fi.lexical.doc_ids.size:,}")
+    for name, lat in (("denso", dense), ("bm25", bm25), ("híbrido", hybrid)):
+        p50, p95 = _pct(lat)
+        print(f"  {name:<8} p50 {p50:6.2f} ms   p95 {p95:6.2f} ms")
+
+def quality(k: int) -> None:
+    try:
+        from rag_api.services.embedding_backends import load_embedding_model
+        from clean_data.estatuto_utils import EstatutoProcessor
+        model, backend = load_embedding_model("all-MiniLM-L6-v2")
+    except ImportError as e:
+        print(f"(calidad omitida: {e})")
+        return
+    proc = EstatutoProcessor(ESTATUTO)
+    chunks = proc.data["chunks"]
+    texts = [proc.format_article_for_rag(c) for c in chunks]
+    vecs = model.encode(texts, batch_size=64, convert_to_numpy=True)
+    fi = FragmentIndex([{"texto": t} for t in texts], vecs, kind="flat", params={}, hybrid=True)
+    cases = []  # (consulta, índice esperado)
+    for i, c in enumerate(chunks):
+        num = "".join(ch for ch in c.get("article_number", "") if ch.isdigit())
+        if num:
+            cases.append((f"¿Qué dice el artículo {num}?", i))
+        if c.get("article_title"):
+            cases.append((c["article_title"].lower(), i))
+    qvecs = model.encode([q for q, _ in cases], batch_size=64, convert_to_numpy=True)
+    hits_d = hits_h = 0
+    for (q, exp), v in zip(cases, qvecs):
+        hits_d += exp in fi.search(v, k)[0]
+        hits_h += exp in fi.search_hybrid(q, v, k)[0]
+    print(f"Estatuto ({len(chunks)} chunks, {len(cases)} consultas, backend {backend}): "
+          f"hit@{k} denso {hits_d / len(cases):.3f}  híbrido {hits_h / len(cases):.3f}")
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=100_000)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=4)
+    ap.add_argument("--skip-quality", action="store_true")
+    args = ap.parse_args()
+    latency(args.n, args.queries, args.k)
+    if not args.skip_quality:
+        quality(args.k)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark: paginación de GET /news con COUNT + OFFSET (antes) vs cursor + total cacheado.
+
+Uso (desde backend/asistente-rag):
+    python -m benchmarks.bench_paging
+    python -m benchmarks.bench_paging --rows 500000 --pages 1,100,1000
+
+Sobre una SQLite temporal con --rows noticias mide, para cada página pedida (page_size 10):
+    - "offset": lo que hacía search_news antes: COUNT(*) + ORDER BY ... LIMIT/OFFSET en cada página.
+    - "offset+cache": el camino OFFSET actual (total cacheado, sigue saltando filas).
+    - "cursor": la página siguiente a partir del `next_cursor` (índice compuesto, sin OFFSET),
+      con el total cacheado.
+Con --filter se agrega `destacada=1` (1 de cada 7 filas) a todas las consultas. Imprime también el
+plan de la consulta por cursor (debe usar idx_news_orden).
+"""
+from __future__ import annotations
+import argparse, os, tempfile, time
+import numpy as np
+
+def _seed(n: int) -> None:
+    from rag_api.core import db
+    from rag_api.stores import news_store  # noqa: F401  (init_db crea tabla e índices)
+    with db.write_connection() as conn:
+        conn.executemany(
+            """INSERT INTO news (id, fecha, titulo, descripcionCorta, descripcionLarga, autor, categoria, imagen, destacada, vistas, created_at, updated_at)
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?)""",
+            [(f"n{i:07d}", f"20{10 + i % 15}-{1 + i % 12:02d}-{1 + i % 28:02d}", f"Noticia {i}", "corta", "larga " * 40,
+              "Admin", '["Evento"]', "", 1 if i % 7 == 0 else 0, 0, f"2025-01-01T00:{i % 60:02d}:00", "2025-01-01T00:00:00")
+             for i in range(n)],
+        )
+
+def _old(page: int, destacada):
+    from rag_api.stores import news_store
+    clause, params = (" WHERE destacada = ?", [1]) if destacada else ("", [])
+    with news_store.get_conn() as conn:
+        conn.execute(f"SELECT COUNT(*) FROM news{clause}", params).fetchone()
+        conn.execute(f"SELECT * FROM news{clause} ORDER BY fecha DESC, created_at DESC LIMIT 10 OFFSET ?",
+                     params + [(page - 1) * 10]).fetchall()
+
+def _time(fn, reps: int) -> float:
+    lat = []
+    for _ in range(reps):
+        t = time.perf_counter()
+        fn()
+        lat.append(time.perf_counter() - t)
+    return float(np.median(lat)) * 1000
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--pages", default="1,50,500,5000")
+    ap.add_argument("--reps", type=int, default=20)
+    ap.add_argument("--filter", action="store_true")
+    args = ap.parse_args()
+    os.environ["NEWS_DB_PATH"] = tempfile.mktemp(suffix=".db")
+    os.environ.pop("DATABASE_URL", None)
+    _seed(args.rows)
+    from rag_api.stores import news_store, paging
+    destacada = True if args.filter else None
+    pages = sorted(int(p) for p in args.pages.split(","))
+    cursors = {1: None}  # Cursor que lleva a cada página (recorriendo una vez).
+    res = news_store.search_news(destacada=destacada, with_total=False)
+    for p in range(2, pages[-1] + 1):
+        if res["next_cursor"] is None:
+            break
+        cursors[p] = res["next_cursor"]
+        res = news_store.search_news(destacada=destacada, cursor=cursors[p], with_total=False)
+    print(f"{args.rows:,} filas, page_size 10{', destacada=1' if args.filter else ''} (mediana de {args.reps})")
+    print(f"{'página':>7} {'offset':>12} {'offset+cache':>14} {'cursor':>12}")
+    for p in pages:
+        if p not in cursors:
+            break
+        old = _time(lambda: _old(p, destacada), args.reps)
+        off = _time(lambda: news_store.search_news(destacada=destacada, page=p), args.reps)
+        cur = _time(lambda: news_store.search_news(destacada=destacada, cursor=cursors[p]), args.reps)
+        print(f"{p:>7} {old:>9.3f} ms {off:>11.3f} ms {cur:>9.3f} ms")
+    with news_store.get_conn() as conn:
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM news WHERE (fecha, created_at, id) < (?, ?, ?) "
+                            "ORDER BY fecha DESC, created_at DESC, id DESC LIMIT 11", ["2020-01-01", "", ""]).fetchall()
+    print("plan cursor:", " | ".join(r[-1] for r in plan))
+    print("totales:", paging.totals.stats())
+
+if __name__ == "__main__":
+    main()
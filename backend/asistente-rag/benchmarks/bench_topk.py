@@ -0,0 +1,63 @@
+"""Benchmark: recuperación top-k actual (float64 + norma por consulta + argsort) vs FragmentIndex
+(float32 pre-normalizado + argpartition).
+
+Uso (desde backend/asistente-rag):
+    python -m benchmarks.bench_topk                      # 10k, 100k, 1M fragmentos
+    python -m benchmarks.bench_topk --sizes 10000 100000 --queries 50
+
+Reporta por tamaño: latencia p50/p95 por consulta (ms), memoria de la matriz residente (MB)
+y pico de memoria temporal asignada por consulta (MB, medido con tracemalloc).
+1M x 384 en float64 ocupa ~3 GB: asegúrate de tener RAM suficiente o reduce --sizes.
+"""
+from __future__ import annotations
+import argparse, time, tracemalloc
+import numpy as np
+from rag_api.services.fragment_index import FragmentIndex, normalize_query, top_k
+
+DIM = 384
+TOP_K = 4
+
+def legacy_search(embeddings: np.ndarray, q_emb: np.ndarray, k: int) -> np.ndarray:  # Copia literal de la versión anterior de ask().
+    sims = embeddings @ q_emb / (np.linalg.norm(embeddings, axis=1) * (np.linalg.norm(q_emb) + 1e-8) + 1e-8)
+    return np.argsort(sims)[-k:][::-1]
+
+def new_search(matrix: np.ndarray, q_emb: np.ndarray, k: int) -> np.ndarray:
+    return top_k(matrix @ normalize_query(q_emb), k)
+
+def measure(fn, queries) -> dict:
+    lat = []
+    for q in queries:
+        t0 = time.perf_counter()
+        fn(q)
+        lat.append((time.perf_counter() - t0) * 1000)
+    tracemalloc.start()
+    fn(queries[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"p50": float(np.percentile(lat, 50)), "p95": float(np.percentile(lat, 95)), "peak_mb": peak / 2**20}
+
+def run(n: int, n_queries: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    legacy = rng.standard_normal((n, DIM))  # float64, como np.array(..., dtype=float) en main.py.
+    queries = [rng.standard_normal(DIM).astype(np.float32) for _ in range(n_queries)]
+    old = measure(lambda q: legacy_search(legacy, q, TOP_K), queries)
+    old_mb = legacy.nbytes / 2**20
+    index = FragmentIndex([{}] * n, legacy)
+    del legacy
+    new = measure(lambda q: new_search(index.matrix, q, TOP_K), queries)
+    new_mb = index.matrix.nbytes / 2**20
+    print(f"{n:>9,d} | actual  p50 {old['p50']:8.2f} ms  p95 {old['p95']:8.2f} ms | matriz {old_mb:8.1f} MB | temp/consulta {old['peak_mb']:7.1f} MB")
+    print(f"{'':>9} | nuevo   p50 {new['p50']:8.2f} ms  p95 {new['p95']:8.2f} ms | matriz {new_mb:8.1f} MB | temp/consulta {new['peak_mb']:7.1f} MB"
+          f" | x{old['p50'] / max(new['p50'], 1e-9):.1f}")
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--queries", type=int, default=30)
+    args = ap.parse_args()
+    print(f"dim={DIM} top_k={TOP_K} consultas={args.queries}")
+    for n in args.sizes:
+        run(n, args.queries)
+
+if __name__ == "__main__":
+    main()
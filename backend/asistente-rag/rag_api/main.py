@@ -4,9 +4,9 @@ Archivo principal que arranca la aplicación FastAPI.
 
 Responsabilidades:
     - Cargar embeddings locales (RAG simple / placeholder).
-    - Exponer endpoint /ask (consulta con LLM Groq o modo placeholder).
+    - Exponer endpoint /ask (consulta con LLM Groq o modo placeholder) y /ask/stream (SSE token a token).
     - Incluir routers modulares: noticias, storage, oportunidades.
-    - Ingestar mensajes externos (/ingest/messages) para futura indexación.
+    - Ingestar mensajes externos (/ingest/messages y /ingest/messages/batch) para futura indexación.
     - Webhook de verificación y recepción de WhatsApp Cloud API.
 
 NOTA: A futuro podrías mover storage y oportunidades a routers separados, igual que news.
@@ -16,19 +16,36 @@ NOTA: A futuro podrías mover storage y oportunidades a routers separados, igual
 import os  # Variables de entorno, rutas.
 import json  # Lectura/escritura de ficheros JSON.
 import time  # Marcas de tiempo epoch para mensajes.
+import asyncio  # Recuperación local y búsqueda web concurrentes.
 import numpy as np  # Operaciones vectoriales (similaridad embeddings).
 from fastapi import FastAPI, Request, Response, Query as FastAPIQuery, HTTPException  # Framework web.
 from fastapi.middleware.cors import CORSMiddleware  # (Si quisieras habilitar CORS granular; aquí no configurado explícito).
 from pydantic import BaseModel  # Modelos de entrada/salida simples.
-from sentence_transformers import SentenceTransformer  # Modelo de embeddings local.
-import requests  # Llamadas HTTP a Groq.
+from starlette.concurrency import run_in_threadpool  # Ejecuta código bloqueante fuera del event loop.
 from typing import List  # Tipado de listas.
 from .stores import news_store  # Import para inicializar tabla noticias.
+from .stores import paging as store_paging  # Totales cacheados de los listados.
 from .routers import news as news_router  # Router noticias.
 from .routers import storage as storage_router  # Nuevo router storage.
 from .routers import oportunidades as oportunidades_router  # Nuevo router oportunidades.
+from .routers import ingest as ingest_router  # /ingest/messages y /ingest/messages/batch.
 from .core.security import check_admin  # Verificación de token admin (centralizado).
-from duckduckgo_search import DDGS  # Búsqueda web ligera contextual.
+from .core import db as core_db  # Pool de conexiones (Postgres) / conexión por hilo (SQLite).
+from .services import groq_client  # Cliente HTTP asíncrono compartido (pool keep-alive) para Groq.
+from .services.fragment_index import FragmentIndex  # Matriz de embeddings normalizada + top-k con argpartition.
+from .services.embedding_cache import EmbeddingCache  # Cache LRU (+ SQLite opcional) de embeddings de preguntas.
+from .services.embedder import EmbeddingService  # Micro-batching de encode compartido por todos los endpoints.
+from .services.embedding_backends import load_embedding_model  # torch | onnx | onnx-int8 según EMBED_BACKEND.
+from .services.answer_cache import SemanticAnswerCache, fragment_ref  # Cache semántico de respuestas (TTL + LRU + versión de fragmentos).
+from .services.index_holder import IndexHolder, RAG_INDEX_WATCH_S  # Índice recargable en caliente (swap atómico).
+from .services.message_indexer import LiveIndex, MessageIndexer, INGEST_INDEXER, INGEST_INDEX_DIR, MESSAGE_ID_PREFIX  # Mensajes ingeridos -> índice vivo.
+from .services.ingest_writer import GroupCommitWriter  # Escritura de mensajes con group commit (hilo propio).
+from .services.whatsapp_queue import WhatsAppQueue  # Webhook de WhatsApp: ack inmediato + cola procesada en segundo plano.
+from vector_store.lexical import rrf_fuse  # Intercalado por rango de documentos y mensajes.
+from .services import web_search  # DuckDuckGo en un executor propio con timeout.
+from .services import latency_budget  # Plazos por petición para recuperación local y búsqueda web.
+from .services.latency_budget import LatencyBudget, WEB_SEARCH_DEADLINE_MS
+from vector_store import embedding_store  # Índice binario (matriz .npy memmap + metadatos JSON).
 import random  # Selección de respuestas placeholder.
 
 # ============================= Configuración base RAG / LLM =============================
@@ -37,12 +54,14 @@ FRAGMENTS_DIR = os.path.join(BASE_DIR, "fragments")  # Carpeta donde se guardan
 MESSAGES_DIR = os.path.join(BASE_DIR, "data_ingest", "messages")  # Carpeta para almacenar messages ingresados.
 os.makedirs(FRAGMENTS_DIR, exist_ok=True)  # Crea carpeta si no existe.
 os.makedirs(MESSAGES_DIR, exist_ok=True)  # Crea carpeta si no existe.
-EMBEDDINGS_PATH = os.path.join(FRAGMENTS_DIR, "fragments_embedded.json")  # Archivo con embeddings precomputados.
+EMBEDDINGS_PATH = os.path.join(FRAGMENTS_DIR, "fragments_embedded.json")  # Formato legado (JSON con embeddings); se migra al binario.
 MODEL_EMBED = "all-MiniLM-L6-v2"  # Nombre del modelo SentenceTransformer usado para generar embeddings.
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")  # API key para Groq; si vacío se responde mensaje de falta config.
 GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"  # Endpoint Groq compatible OpenAI.
 GROQ_MODEL = "llama3-8b-8192"  # Modelo LLM elegido.
 TOP_K = 4  # Cuántos fragmentos de contexto local incluimos.
+ARTICLE_LOOKUP = os.getenv("RAG_ARTICLE_LOOKUP", "1") == "1"  # Atajo exacto para "artículo N" / "capítulo" / "título".
+LIVE_MIN_SCORE = float(os.getenv("RAG_LIVE_MIN_SCORE", "0.45"))  # Coseno mínimo para que un mensaje ingerido entre al contexto.
 PLACEHOLDER_MODE = os.getenv("CHATBOT_PLACEHOLDER", "1")  # Si "1": no llama Groq, responde frases predefinidas.
 
 PLACEHOLDER_RESPUESTAS = [  # Lista de mensajes aleatorios cuando no se permite acceso a datos/LLM real.
@@ -114,66 +133,140 @@ PLACEHOLDER_RESPUESTAS = [  # Lista de mensajes aleatorios cuando no se permite
     "Necesito una lima para este código de seguridad y quizá unos cuantos bits de contrabando." 
 ]
 
-"""Carga en memoria de fragmentos y sus embeddings (si existen)."""
-try:
-    with open(EMBEDDINGS_PATH, "r", encoding="utf-8") as f:  # Intenta leer archivo JSON.
-        fragments = json.load(f)  # Lista de fragmentos con campos texto + embedding.
-except FileNotFoundError:
-    fragments = []  # Si no existe archivo, lista vacía.
-
-# Creamos matriz numpy de embeddings (shape: N x 384). Si no hay fragmentos -> matriz vacía.
-embeddings = (
-    np.array([frag.get("embedding") for frag in fragments if "embedding" in frag], dtype=float)
-    if fragments else np.zeros((0, 384), dtype=float)
+"""Carga del índice de fragmentos (formato binario memmap; migra el JSON legado una sola vez)."""
+def _load_fragment_index() -> FragmentIndex:
+    if not embedding_store.exists(FRAGMENTS_DIR) and os.path.exists(EMBEDDINGS_PATH):
+        embedding_store.convert_legacy_json(EMBEDDINGS_PATH, FRAGMENTS_DIR, MODEL_EMBED)  # Migración única.
+    try:
+        # Matriz float32 normalizada abierta con np.memmap: arranque sin parseo y page cache compartido entre workers.
+        frags, matrix, _ = embedding_store.load_store(FRAGMENTS_DIR, expected_model=MODEL_EMBED)
+    except FileNotFoundError:
+        return FragmentIndex([], np.zeros((0, 384), dtype=np.float32))  # Sin índice: /ask responde sin contexto local.
+    return FragmentIndex(frags, matrix, normalized=True)
+
+def _on_index_swap(old: FragmentIndex, new: FragmentIndex) -> None:  # Respuestas cacheadas con fragmentos editados/borrados dejan de valer.
+    # Solo se comparan refs del índice de documentos: los mensajes del índice vivo no se recargan aquí.
+    answer_cache.invalidate_changed(dict(fragment_ref(f) for f in new.fragments),
+                                    owns=lambda fid: not fid.startswith(MESSAGE_ID_PREFIX))
+
+# Cada petición toma index_holder.current() una vez (snapshot); /admin/index/reload o el vigilante lo reemplazan en caliente.
+index_holder = IndexHolder(
+    _load_fragment_index,
+    watch_paths=[embedding_store.meta_path(FRAGMENTS_DIR)],  # El meta cambia en cada escritura y apunta a su matriz.
+    on_swap=_on_index_swap,
 )
-model = SentenceTransformer(MODEL_EMBED)  # Carga el modelo de embeddings para consultas entrantes.
+model, embed_backend = load_embedding_model(MODEL_EMBED)  # Modelo de embeddings para consultas (misma interfaz encode en todos los backends).
+# Los vectores int8/ONNX difieren mínimamente de los de torch: el backend entra en la clave del cache persistente.
+embed_cache = EmbeddingCache(MODEL_EMBED if embed_backend == "torch" else f"{MODEL_EMBED}:{embed_backend}")  # LRU (+ SQLite si EMBED_CACHE_DB).
+embedder = EmbeddingService.for_model(model, cache=embed_cache)  # Único punto de acceso al modelo (lotes dinámicos).
+answer_cache = SemanticAnswerCache(dim=index_holder.current().matrix.shape[1])  # Respuestas reutilizables por similitud.
+live_index = LiveIndex(dim=index_holder.current().matrix.shape[1])  # Mensajes de WhatsApp/Telegram indexados en segundo plano.
+message_indexer = MessageIndexer(  # Sigue data_ingest/messages/*.jsonl desde offsets persistidos (hilo propio, no bloquea peticiones).
+    MESSAGES_DIR, INGEST_INDEX_DIR or os.path.join(FRAGMENTS_DIR, "live"),
+    encode_batch=embedder.encode_many,  # Misma cola y trabajadores que las consultas: el modelo no corre en hilos extra.
+    live=live_index,
+)
+ingest_writer = GroupCommitWriter(MESSAGES_DIR)  # Único escritor de data_ingest/messages/*.jsonl (commits agrupados).
+whatsapp_queue = WhatsAppQueue(ingest_writer)  # Payloads del webhook pendientes de procesar.
 
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
 app = FastAPI()  # Instancia principal de la aplicación.
 app.include_router(news_router.router)
 app.include_router(storage_router.router)
 app.include_router(oportunidades_router.router)
+app.include_router(ingest_router.build_router(ingest_writer))
 
 class Query(BaseModel):  # Modelo de entrada para /ask
     question: str  # Pregunta del usuario final.
 
 _check_admin = check_admin  # backward compatibility alias
 
-@app.post("/ask")  # Endpoint de pregunta al asistente.
-def ask(query: Query, response: Response):
-    if PLACEHOLDER_MODE == "1":  # Modo mantenimiento sin acceso a LLM.
-        msg = random.choice(PLACEHOLDER_RESPUESTAS)
-        return {"respuesta": msg, "fragmentos": [], "online": False, "reason": "placeholder_mode", "maintenance": True}
-    if not GROQ_API_KEY:  # Falta configuración API.
-        return {"respuesta": "Servicio IA no configurado (falta GROQ_API_KEY).", "fragmentos": [], "online": False, "reason": "missing_api_key"}
+@app.get("/admin/metrics")  # Contadores internos (caches, índices, colas) para monitoreo.
+def admin_metrics(request: Request):
+    check_admin(request)
+    fragment_index = index_holder.current()
+    return {
+        "embedding_cache": embed_cache.stats(),
+        "embedder": {**embedder.stats(), "backend": embed_backend},
+        "answer_cache": answer_cache.stats(),
+        "fragment_index": {"size": len(fragment_index), "kind": fragment_index.engine.kind,
+                           "hybrid": fragment_index.lexical is not None, "articles": len(fragment_index.lookup),
+                           **index_holder.stats()},
+        "message_indexer": message_indexer.stats(),
+        "ingest_writer": ingest_writer.stats(),
+        "whatsapp_webhook": whatsapp_queue.stats(),
+        "db": core_db.pool_stats(),
+        "store_totals": store_paging.totals.stats(),
+        "latency_budget": latency_budget.stats.snapshot(),
+        "web_cache": web_search.cache.stats(),
+    }
+
+@app.post("/admin/index/reload")  # Recarga el índice sin reiniciar: las peticiones en curso terminan con el anterior.
+async def admin_index_reload(request: Request, force: bool = FastAPIQuery(True)):
+    check_admin(request)
+    result = await run_in_threadpool(index_holder.reload, force)  # Carga fuera del event loop.
+    return {**result, "size": len(index_holder.current())}
+
+_watch_task = None
+
+@app.on_event("startup")
+async def _start_index_watcher():  # Recarga automática si cambian los archivos del índice (p.ej. tras el builder offline).
+    global _watch_task
+    if RAG_INDEX_WATCH_S > 0:
+        _watch_task = asyncio.create_task(index_holder.watch())
+    if INGEST_INDEXER:
+        message_indexer.start()  # Con varios workers solo el dueño del lock indexa; el resto sigue sus archivos.
+    whatsapp_queue.start()
+
+@app.on_event("shutdown")
+async def _close_http_clients():  # Cierra el pool hacia Groq, los hilos del embedder y los de DDGS al apagar el worker.
+    if _watch_task is not None:
+        _watch_task.cancel()
+    await groq_client.aclose()
+    await whatsapp_queue.stop()  # Termina lo encolado antes de cerrar el escritor.
+    await run_in_threadpool(message_indexer.stop)
+    await run_in_threadpool(ingest_writer.close)  # Escribe lo pendiente antes de salir.
+    await run_in_threadpool(core_db.close_pool)
+    await run_in_threadpool(embedder.close)
+    web_search.shutdown()
+
+async def _embed(question: str) -> np.ndarray:  # Embedding de la pregunta (cache -> servicio con micro-batching).
     try:
-        q_emb = model.encode(query.question)  # Embedding de la pregunta.
-    except Exception:
-        q_emb = np.zeros((384,), dtype=float)  # Fallback si falla.
-    if embeddings.size == 0:  # No hay base local.
-        idxs: list[int] = []
-        context = ""
-    else:
-        # Similaridad coseno manual (producto punto / norma). Pequeño eps para evitar división por cero.
-        sims = embeddings @ q_emb / (np.linalg.norm(embeddings, axis=1) * (np.linalg.norm(q_emb) + 1e-8) + 1e-8)
-        idxs = np.argsort(sims)[-TOP_K:][::-1]  # Tomamos top K índices más similares.
-        context = "\n\n".join([fragments[i]["texto"] for i in idxs])  # Concatenamos textos.
-    web_context = ""
-    try:  # Búsqueda ligera en DuckDuckGo para contexto complementario.
-        with DDGS() as ddgs:
-            for_hit = ddgs.text(query.question, max_results=3)
-            lines = []
-            for h in for_hit:
-                title = (h.get('title') or '')[:80]
-                body = (h.get('body') or '')[:160]
-                url = h.get('href') or ''
-                lines.append(f"- {title}: {body} ({url})")
-            web_context = "\n".join(lines)
-    except Exception:  # Si falla la búsqueda, ignoramos.
-        web_context = ""
-    # Construcción del prompt con contexto documental + web.
+        # Acierto en memoria: inmediato. Si no, se encola y se calcula en lote con otras preguntas concurrentes.
+        return await embedder.encode_async(question)
+    except Exception:  # Modelo falló o cola llena (EmbedderOverloaded).
+        return np.zeros((384,), dtype=np.float32)  # Fallback si falla (no se usa el cache de respuestas).
+
+def _retrieve(index: FragmentIndex, question: str, q_emb: np.ndarray) -> tuple[list[dict], str]:  # Recuperación local -> (fragmentos top-K, contexto).
+    idxs, _ = index.search_hybrid(question, q_emb, TOP_K) if len(index) else ([], [])  # Coseno (denso) + BM25 con RRF.
+    frags = [index.fragments[i] for i in idxs]  # fila i <-> fragments[i] dentro del mismo snapshot.
+    messages = [f for f, _ in live_index.search(q_emb, TOP_K, min_score=LIVE_MIN_SCORE)]  # Mensajes ingeridos relevantes.
+    if messages:  # Documentos y mensajes se intercalan por rango (RRF de dos listas disjuntas).
+        pool = frags + messages
+        order, _ = rrf_fuse([range(len(frags)), range(len(frags), len(pool))], TOP_K)
+        frags = [pool[i] for i in order]
+    return frags, "\n\n".join(f["texto"] for f in frags)  # Concatenamos textos.
+
+async def _local_context(question: str) -> tuple:  # Embedding + cache semántico + top-K -> (q_emb, cached, frags, context).
+    index = index_holder.current()  # Snapshot fijo para toda la petición aunque haya una recarga en medio.
+    direct = index.lookup.match(question) if ARTICLE_LOOKUP else None
+    if direct:  # Cita explícita de artículo/capítulo/título: contexto exacto sin modelo ni búsqueda.
+        frags = [index.fragments[i] for i in direct[1]]
+        return None, None, frags, "\n\n".join(f["texto"] for f in frags)
+    q_emb = await _embed(question)
+    cached = answer_cache.lookup(q_emb)  # Pregunta casi idéntica ya respondida: sin web ni Groq.
+    if cached:
+        return q_emb, cached, [], ""
+    # Denso + BM25 + mensajes son CPU pura: en el threadpool el event loop sigue atendiendo y el
+    # plazo "retrieval" de budget.wait puede vencer (la búsqueda termina en su hilo, sin esperarla).
+    frags, context = await run_in_threadpool(_retrieve, index, question, q_emb)
+    return q_emb, None, frags, context
+
+_NO_LOCAL = (None, None, [], "")  # Recuperación local fuera de plazo (o fallida): prompt sin contexto documental.
+
+def _groq_payload(question: str, context: str, web_context: str) -> dict:  # Prompt con contexto documental + web.
     prompt = (
         "Eres un asistente administrativo experto en la Escuela Profesional de Ingeniería Metalúrgica de Cusco. "
         "Responde solo sobre temas administrativos, trámites, normativas, documentos oficiales y procesos internos. "
@@ -181,10 +274,9 @@ def ask(query: Query, response: Response):
         "FORMATO: usa siempre listas con viñetas para requisitos/pasos.\n\n"
         f"Contexto documental:\n{context if context else '- (sin fragmentos locales)'}\n\n"
         f"Contexto web (resumen):\n{web_context if web_context else '- (sin resultados web)'}\n\n"
-        f"Pregunta: {query.question}\nRespuesta:"
+        f"Pregunta: {question}\nRespuesta:"
     )
-    headers = {"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"}
-    payload = {  # Formato estilo OpenAI.
+    return {  # Formato estilo OpenAI.
         "model": GROQ_MODEL,
         "messages": [
             {"role": "system", "content": "Eres un asistente experto en la carrera de Ingeniería Metalúrgica."},
@@ -193,60 +285,101 @@ def ask(query: Query, response: Response):
         "max_tokens": 512,
         "temperature": 0.2,
     }
-    answer = None  # Respuesta final.
-    used_groq = False  # Marca si llegó a usar Groq.
-    last_error = None  # Último error visto.
-    for attempt in range(3):  # Reintentos en códigos temporales.
-        try:
-            resp = requests.post(GROQ_URL, headers=headers, json=payload, timeout=25)
-            if resp.status_code == 200:
-                answer = resp.json()["choices"][0]["message"]["content"]
-                used_groq = True
-                break
-            if resp.status_code in (429, 500, 502, 503, 504):  # Errores recuperables.
-                last_error = resp.text
-                time.sleep(1 + attempt)  # Backoff lineal.
-                continue
-            last_error = resp.text  # Otro error no recuperable -> salimos.
-            break
-        except Exception as e:
-            last_error = str(e)
-            time.sleep(0.5)
-    if not answer:  # Falló todo.
-        answer = f"No se pudo obtener respuesta de Groq. Detalle: {last_error}" if last_error else "No se pudo obtener respuesta de Groq."
+
+@app.post("/ask")  # Endpoint de pregunta al asistente.
+async def ask(query: Query, response: Response):
+    if PLACEHOLDER_MODE == "1":  # Modo mantenimiento sin acceso a LLM.
+        msg = random.choice(PLACEHOLDER_RESPUESTAS)
+        return {"respuesta": msg, "fragmentos": [], "online": False, "reason": "placeholder_mode", "maintenance": True}
+    if not GROQ_API_KEY:  # Falta configuración API.
+        return {"respuesta": "Servicio IA no configurado (falta GROQ_API_KEY).", "fragmentos": [], "online": False, "reason": "missing_api_key"}
     response.headers["Access-Control-Allow-Origin"] = "*"  # Permite front sin configurar CORS estricto.
+    budget = LatencyBudget()
+    web_task = web_search.search_async(query.question)  # Arranca ya: corre en paralelo con la recuperación local.
+    local_task = asyncio.ensure_future(_local_context(query.question))
+    (q_emb, cached, frags, context), _ = await budget.wait(local_task, "retrieval", _NO_LOCAL)
+    if cached:
+        web_task.cancel()
+        return {"respuesta": cached["respuesta"], "fragmentos": cached["fragmentos"], "online": True, "reason": None, "cached": True}
+    # Contexto web complementario: si no llegó antes de su plazo se descarta.
+    web_context, _ = await budget.wait(web_task, "web_search", "", deadline_ms=WEB_SEARCH_DEADLINE_MS)
+    payload = _groq_payload(query.question, context, web_context)
+    # Cliente compartido: reintentos con asyncio.sleep + jitter, sin ocupar hilos del pool.
+    answer, last_error = await groq_client.chat_completion(GROQ_URL, GROQ_API_KEY, payload)
+    used_groq = answer is not None  # Marca si llegó a usar Groq.
+    if used_groq and q_emb is not None:
+        answer_cache.store(q_emb, answer, frags)  # Solo cacheamos respuestas reales del LLM.
+    else:  # Falló todo.
+        answer = f"No se pudo obtener respuesta de Groq. Detalle: {last_error}" if last_error else "No se pudo obtener respuesta de Groq."
     return {
         "respuesta": answer,
-        "fragmentos": [fragments[i] for i in idxs] if idxs else [],
+        "fragmentos": frags,
         "online": used_groq,
         "reason": (None if used_groq else (last_error or "groq_error")),
     }
 
+def _sse(event: str, data: dict) -> str:  # Serializa un evento Server-Sent Events.
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/ask/stream")  # Igual que /ask pero respondiendo por SSE a medida que llegan los tokens.
+async def ask_stream(query: Query):
+    """Orden de eventos: `fragmentos` (apenas termina la recuperación local), `token` (uno por
+    fragmento de texto de Groq) y `done` (online/reason + tiempos en ms)."""
+    async def events():
+        t0 = time.perf_counter()
+        ms = lambda: round((time.perf_counter() - t0) * 1000, 1)  # Milisegundos desde el inicio.
+        if PLACEHOLDER_MODE == "1" or not GROQ_API_KEY:  # Mismos cortocircuitos que /ask.
+            placeholder = PLACEHOLDER_MODE == "1"
+            yield _sse("fragmentos", {"fragmentos": []})
+            msg = random.choice(PLACEHOLDER_RESPUESTAS) if placeholder else "Servicio IA no configurado (falta GROQ_API_KEY)."
+            yield _sse("token", {"t": msg})
+            yield _sse("done", {"online": False, "reason": "placeholder_mode" if placeholder else "missing_api_key",
+                                "maintenance": placeholder, "timing": {"total_ms": ms()}})
+            return
+        budget = LatencyBudget()
+        web_task = web_search.search_async(query.question)  # En paralelo con la recuperación local.
+        local_task = asyncio.ensure_future(_local_context(query.question))
+        (q_emb, cached, frags, context), _ = await budget.wait(local_task, "retrieval", _NO_LOCAL)
+        if cached:  # Respuesta cacheada: se envía completa en un solo evento token.
+            web_task.cancel()
+            yield _sse("fragmentos", {"fragmentos": cached["fragmentos"]})
+            yield _sse("token", {"t": cached["respuesta"]})
+            yield _sse("done", {"online": True, "reason": None, "cached": True, "timing": {"total_ms": ms()}})
+            return
+        retrieval_ms = ms()
+        yield _sse("fragmentos", {"fragmentos": frags})  # Primer byte = tiempo de recuperación.
+        web_context, web_on_time = await budget.wait(web_task, "web_search", "", deadline_ms=WEB_SEARCH_DEADLINE_MS)
+        web_ms = ms()
+        payload = _groq_payload(query.question, context, web_context)
+        first_token_ms = None
+        reason = None
+        parts: list[str] = []  # Respuesta completa para el cache semántico.
+        try:
+            async for token in groq_client.stream_chat_completion(GROQ_URL, GROQ_API_KEY, payload):
+                if first_token_ms is None:
+                    first_token_ms = ms()
+                parts.append(token)
+                yield _sse("token", {"t": token})
+        except groq_client.GroqError as e:
+            reason = str(e) or "groq_error"
+        if reason is None and parts and q_emb is not None:
+            answer_cache.store(q_emb, "".join(parts), frags)
+        yield _sse("done", {
+            "online": reason is None and first_token_ms is not None,
+            "reason": reason if reason or first_token_ms is not None else "groq_empty_response",
+            "web_dropped": not web_on_time,
+            "timing": {"retrieval_ms": retrieval_ms, "web_ms": web_ms, "first_token_ms": first_token_ms, "total_ms": ms()},
+        })
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # Evita que proxies (nginx/Railway) acumulen la respuesta.
+        "Access-Control-Allow-Origin": "*",
+    })
+
 # ===================== Noticias (CRUD simple) =====================
 
 # =============== Ingesta de mensajes (genérico) ===============
-class IngestMessage(BaseModel):  # Modelo para ingesta de mensajes externos.
-    platform: str  # Origen: "whatsapp" | "telegram" | etc.
-    text: str  # Contenido textual.
-    author: str | None = None  # Remitente opcional.
-    ts: float | None = None  # Timestamp epoch. Si None se genera.
-    meta: dict | None = None  # Metadatos arbitrarios.
-
-@app.post("/ingest/messages")  # Endpoint para guardar mensajes crudos (para entrenar/embeddings luego).
-async def ingest_messages(msg: IngestMessage):
-    """Guarda cada mensaje entrante en un archivo .jsonl (1 línea = 1 json)."""
-    record = {
-        "platform": msg.platform,
-        "text": msg.text,
-        "author": msg.author,
-        "ts": msg.ts or time.time(),  # Si no vino timestamp, usamos ahora.
-        "meta": msg.meta or {},
-    }
-    out_path = os.path.join(MESSAGES_DIR, f"{msg.platform}.jsonl")  # Archivo por plataforma.
-    with open(out_path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
-    return {"status": "ok"}
-
+# POST /ingest/messages y /ingest/messages/batch: routers/ingest.py (incluido arriba con `ingest_writer`).
 
 # =============== Webhook de WhatsApp Cloud API (1:1) ===============
 # Nota: WhatsApp Business Cloud API NO soporta leer mensajes de grupos existentes.
@@ -265,18 +398,9 @@ async def whatsapp_verify(mode: str = FastAPIQuery(None), challenge: str = FastA
 
 @app.post("/webhooks/whatsapp")  # Recepción de mensajes entrantes (1:1) de WhatsApp Cloud API.
 async def whatsapp_webhook(payload: dict):
-    try:
-        entry = payload.get("entry", [])[0]
-        changes = entry.get("changes", [])[0]
-        value = changes.get("value", {})
-        messages = value.get("messages", [])
-        for m in messages:
-            if m.get("type") == "text":  # Solo texto simple.
-                text = m["text"]["body"]
-                author = m.get("from")
-                await ingest_messages(IngestMessage(platform="whatsapp", text=text, author=author))
-    except Exception:  # Silenciamos errores de parseo para no romper webhook.
-        pass
+    # Solo encola: Meta recibe el 200 al instante y los trabajadores procesan todas las entradas/cambios.
+    if not whatsapp_queue.enqueue(payload):  # Cola llena: 503 para que Meta reintente más tarde.
+        return Response(status_code=503)
     return {"status": "received"}
 
 # Para correr: uvicorn main:app --reload
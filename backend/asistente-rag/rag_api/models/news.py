@@ -0,0 +1,30 @@
+"""Modelos Pydantic de noticias (entrada/salida de la API).
+
+Los usa `repositories/news_repository.py`; el store trabaja con dicts con las mismas claves.
+"""
+from __future__ import annotations  # Tipos adelantados.
+from typing import List, Optional  # Tipos.
+from pydantic import BaseModel  # Validación de datos.
+
+class NewsIn(BaseModel):  # Lo que envía el panel admin al crear/editar.
+    id: Optional[str] = None  # Si falta, el store genera fecha-slug-timestamp.
+    fecha: str  # ISO YYYY-MM-DD
+    titulo: str
+    descripcionCorta: str
+    descripcionLarga: str
+    autor: str
+    categoria: List[str]
+    imagen: Optional[str] = ""
+    destacada: bool = False
+    vistas: int = 0
+
+class NewsOut(NewsIn):  # Lo que devuelve la API (id siempre presente).
+    id: str
+    snippet: Optional[str] = None  # Fragmento con <mark>...</mark> (solo en búsquedas con `q`).
+
+class NewsSearchResult(BaseModel):  # Página de resultados con metadatos.
+    items: List[NewsOut]
+    total: Optional[int] = None  # None si se pidió sin total (?total=false).
+    page: Optional[int] = None  # None al paginar por cursor.
+    page_size: int
+    next_cursor: Optional[str] = None  # Opaco: pasarlo como ?cursor= para la página siguiente; None = no hay más.
@@ -0,0 +1,161 @@
+"""Router de ingesta de mensajes externos (/ingest/messages y /ingest/messages/batch).
+
+Los mensajes se escriben en data_ingest/messages/<platform>.jsonl a través del escritor con group
+commit que crea main.py (`build_router(ingest_writer)`), el mismo que usa el webhook de WhatsApp.
+"""
+from __future__ import annotations
+import json, time, asyncio
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from ..services.ingest_writer import GroupCommitWriter, IngestOverloaded
+
+INGEST_BATCH_MAX_ERRORS = 20  # Errores de validación detallados en la respuesta (el resto solo se cuenta).
+INGEST_BATCH_INFLIGHT = 4  # Lotes entregados al escritor sin confirmar mientras se sigue leyendo el cuerpo.
+
+class IngestMessage(BaseModel):  # Modelo para ingesta de mensajes externos.
+    platform: str = Field(pattern=r"^[A-Za-z0-9_-]{1,32}$")  # Origen: "whatsapp" | "telegram" | etc. (es nombre de archivo).
+    text: str  # Contenido textual.
+    author: str | None = None  # Remitente opcional.
+    ts: float | None = None  # Timestamp epoch. Si None se genera.
+    meta: dict | None = None  # Metadatos arbitrarios.
+
+_ingest_array = TypeAdapter(List[IngestMessage])  # Validación en bloque (pydantic-core) de un arreglo JSON.
+
+def _ingest_record(msg: IngestMessage) -> dict:
+    return {
+        "platform": msg.platform,
+        "text": msg.text,
+        "author": msg.author,
+        "ts": msg.ts or time.time(),  # Si no vino timestamp, usamos ahora.
+        "meta": msg.meta or {},
+    }
+
+class _BatchIngest:  # Acumula mensajes válidos y los entrega al escritor por tramos (con pocos tramos en vuelo).
+    def __init__(self, writer: GroupCommitWriter):
+        self.writer = writer
+        self.pending: List[dict] = []
+        self.pending_last: Optional[int] = None  # Ítem/línea del último mensaje en `pending`.
+        self.inflight: list = []  # (future, último ítem/línea del tramo), en orden de envío.
+        self.accepted = 0
+        self.rejected = 0
+        self.errors: List[dict] = []
+        self.last_written: Optional[int] = None  # Ítem/línea hasta donde todo lo válido quedó escrito.
+
+    def reject(self, item: int, err: Exception) -> None:
+        self.rejected += 1
+        if len(self.errors) < INGEST_BATCH_MAX_ERRORS:
+            detail = err.errors()[0]["msg"] if isinstance(err, ValidationError) else str(err)
+            self.errors.append({"item": item, "error": detail})
+
+    async def add(self, msg: IngestMessage, item: int) -> None:
+        self.pending.append(_ingest_record(msg))
+        self.pending_last = item
+        if len(self.pending) >= self.writer.flush_records:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if self.pending:
+            fut = asyncio.wrap_future(self.writer.submit(self.pending))  # Todo o nada: si lanza, `pending` no se envió.
+            self.inflight.append((fut, self.pending_last))
+            self.pending = []
+        while len(self.inflight) > INGEST_BATCH_INFLIGHT:  # Contrapresión: no leer más de lo que el disco absorbe.
+            await self._settle_one()
+
+    async def _settle_one(self) -> None:  # El escritor confirma en orden de envío.
+        fut, last = self.inflight.pop(0)
+        self.accepted += await fut
+        self.last_written = last
+
+    async def drain(self) -> None:  # Espera todo lo ya entregado al escritor.
+        while self.inflight:
+            await self._settle_one()
+
+    async def finish(self) -> None:
+        await self.flush()
+        await self.drain()
+
+async def _ndjson_lines(buf: bytes, stream):  # Líneas a medida que llega el cuerpo (la última puede no tener \n).
+    *complete, buf = buf.split(b"\n")
+    for line in complete:
+        yield line
+    async for chunk in stream:
+        *complete, buf = (buf + chunk).split(b"\n")
+        for line in complete:
+            yield line
+    if buf.strip():
+        yield buf
+
+def build_router(writer: GroupCommitWriter) -> APIRouter:
+    router = APIRouter(prefix="/ingest", tags=["ingest"])
+
+    @router.post("/messages")  # Endpoint para guardar mensajes crudos (para entrenar/embeddings luego).
+    async def ingest_messages(msg: IngestMessage):
+        """Guarda cada mensaje entrante en un archivo .jsonl (1 línea = 1 json) vía el escritor con group commit."""
+        try:
+            await writer.write_async([_ingest_record(msg)])  # Responde cuando la línea ya está escrita.
+        except IngestOverloaded:
+            raise HTTPException(status_code=503, detail="Ingesta saturada, reintenta")
+        return {"status": "ok"}
+
+    @router.post("/messages/batch")  # Ingesta masiva: arreglo JSON o NDJSON (application/x-ndjson) en streaming.
+    async def ingest_messages_batch(request: Request):
+        """Valida en bloque y escribe con group commit; los mensajes inválidos se informan y no frenan al resto.
+
+        - Arreglo JSON (`[{...}, {...}]`): validación de todo el arreglo de una vez; si falla, ítem por ítem.
+        - NDJSON (una línea = un mensaje): se procesa a medida que llega el cuerpo, sin cargarlo entero.
+        `item` en los errores es la posición (0-based) en el arreglo o el número de línea (1-based) en NDJSON.
+        Con 503 (escritor saturado) se esperan los tramos ya entregados y `last_item` indica el último
+        ítem/línea cubierto: todo lo válido hasta ahí quedó escrito y el cliente reenvía desde el siguiente.
+        """
+        batch = _BatchIngest(writer)
+        stream = request.stream()
+        head = b""
+        async for chunk in stream:  # Primer byte significativo decide el formato.
+            head += chunk
+            if head.strip():
+                break
+        first = head.lstrip()[:1]
+        if first not in (b"[", b"{", b""):  # Ni arreglo ni objetos por línea (ej. `"texto"`, `42`).
+            raise HTTPException(status_code=400, detail="Se esperaba un arreglo JSON o NDJSON")
+        try:
+            if first == b"[":
+                body = head + b"".join([c async for c in stream])
+                try:
+                    msgs = list(enumerate(_ingest_array.validate_json(body)))
+                except ValidationError:
+                    try:
+                        items = json.loads(body)
+                    except ValueError as e:
+                        raise HTTPException(status_code=400, detail=f"JSON inválido: {e}")
+                    msgs = []
+                    for i, item in enumerate(items):
+                        try:
+                            msgs.append((i, IngestMessage.model_validate(item)))
+                        except ValidationError as e:
+                            batch.reject(i, e)
+                for i, msg in msgs:
+                    await batch.add(msg, i)
+            else:
+                line_no = 0
+                async for line in _ndjson_lines(head, stream):
+                    line_no += 1
+                    if not line.strip():
+                        continue
+                    try:
+                        msg = IngestMessage.model_validate_json(line)
+                    except ValidationError as e:
+                        batch.reject(line_no, e)
+                        continue
+                    await batch.add(msg, line_no)
+            await batch.finish()
+        except IngestOverloaded:  # Lo entregado antes se escribe igual: se espera para informar exacto.
+            await batch.drain()
+            raise HTTPException(status_code=503, detail={
+                "error": "Ingesta saturada, reintenta desde el ítem siguiente a last_item",
+                "accepted": batch.accepted, "last_item": batch.last_written,
+                "rejected": batch.rejected, "errors": batch.errors,
+            })
+        return {"status": "ok", "accepted": batch.accepted, "rejected": batch.rejected, "errors": batch.errors}
+
+    return router
@@ -0,0 +1,52 @@
+"""Router de noticias (vía repository + modelos Pydantic).
+
+Endpoints `async def`: el repository usa las variantes async del store (executor de la base), así
+los listados y lecturas concurrentes no ocupan el threadpool de AnyIO.
+"""
+from __future__ import annotations
+from fastapi import APIRouter, HTTPException, Request
+from ..repositories import news_repository
+from ..models.news import NewsIn, NewsOut, NewsSearchResult
+from ..core.security import check_admin
+
+router = APIRouter(prefix="/news", tags=["news"])
+
+@router.get("", response_model=NewsSearchResult)
+async def list_news(q: str | None = None, categoria: str | None = None, destacada: bool | None = None,
+                    page: int = 1, page_size: int = 10, cursor: str | None = None, total: bool = True):
+    try:
+        return await news_repository.search(q=q, categoria=categoria, destacada=destacada, page=page, page_size=page_size,
+                                            cursor=cursor, with_total=total)
+    except ValueError as e:  # Cursor inválido.
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{nid}", response_model=NewsOut)
+async def get_news(nid: str):
+    item = await news_repository.increment_views(nid)  # Abrir una noticia cuenta como vista.
+    if not item:
+        raise HTTPException(status_code=404, detail='Noticia no encontrada')
+    return item
+
+@router.post("", response_model=NewsOut)
+async def create_news(item: NewsIn, request: Request):
+    check_admin(request)
+    try:
+        return await news_repository.upsert(item)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.put("/{nid}", response_model=NewsOut)
+async def update_news(nid: str, item: NewsIn, request: Request):
+    check_admin(request)
+    if not item.id:
+        item.id = nid
+    if not await news_repository.get_one(item.id):
+        raise HTTPException(status_code=404, detail='Noticia no encontrada')
+    return await news_repository.upsert(item)
+
+@router.delete("/{nid}")
+async def delete_news(nid: str, request: Request):
+    check_admin(request)
+    if not await news_repository.delete(nid):
+        raise HTTPException(status_code=404, detail='Noticia no encontrada')
+    return {"status": "deleted", "id": nid}
@@ -1,4 +1,8 @@
-"""Router de oportunidades (Opción A: directo al store, sin repository ni modelos separados)."""
+"""Router de oportunidades (Opción A: directo al store, sin repository ni modelos separados).
+
+Endpoints `async def`: usan las variantes async del store (executor de la base), sin ocupar el
+threadpool de AnyIO.
+"""
 from __future__ import annotations
 from fastapi import APIRouter, HTTPException, Request
 from ..stores import oportunidades_store
@@ -19,42 +23,47 @@ class OportunidadIn(BaseModel):
     estado: str | None = None
 
 @router.get("")
-def list_oportunidades(q: str | None = None, tipo: str | None = None, estado: str | None = None,
-                       abierta: bool | None = None, page: int = 1, page_size: int = 10):
-    if any([q, tipo, estado, abierta is not None, page != 1, page_size != 10]):
-        return oportunidades_store.search(q=q, tipo=tipo, estado=estado, abierta=abierta, page=page, page_size=page_size)
-    return oportunidades_store.list_all()
+async def list_oportunidades(q: str | None = None, tipo: str | None = None, estado: str | None = None,
+                             abierta: bool | None = None, page: int = 1, page_size: int = 10,
+                             cursor: str | None = None, total: bool = True):
+    if any([q, tipo, estado, abierta is not None, page != 1, page_size != 10, cursor, not total]):
+        try:
+            return await oportunidades_store.asearch(q=q, tipo=tipo, estado=estado, abierta=abierta, page=page,
+                                                     page_size=page_size, cursor=cursor, with_total=total)
+        except ValueError as e:  # Cursor inválido.
+            raise HTTPException(status_code=400, detail=str(e))
+    return await oportunidades_store.alist_all()
 
 @router.get("/{oid}")
-def get_oportunidad(oid: str):
-    item = oportunidades_store.get_one(oid)
+async def get_oportunidad(oid: str):
+    item = await oportunidades_store.aget_one(oid)
     if not item:
         raise HTTPException(status_code=404, detail='Oportunidad no encontrada')
     return item
 
 @router.post("")
-def create_oportunidad(item: OportunidadIn, request: Request):
+async def create_oportunidad(item: OportunidadIn, request: Request):
     check_admin(request)
     try:
-        return oportunidades_store.upsert(item.dict())
+        return await oportunidades_store.aupsert(item.dict())
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/{oid}")
-def update_oportunidad(oid: str, item: OportunidadIn, request: Request):
+async def update_oportunidad(oid: str, item: OportunidadIn, request: Request):
     check_admin(request)
     data = item.dict()
     if not data.get('id'):
         data['id'] = oid
-    existing = oportunidades_store.get_one(data['id'])
+    existing = await oportunidades_store.aget_one(data['id'])
     if not existing:
         raise HTTPException(status_code=404, detail='Oportunidad no encontrada')
-    return oportunidades_store.upsert(data)
+    return await oportunidades_store.aupsert(data)
 
 @router.delete("/{oid}")
-def delete_oportunidad(oid: str, request: Request):
+async def delete_oportunidad(oid: str, request: Request):
     check_admin(request)
-    ok = oportunidades_store.delete(oid)
+    ok = await oportunidades_store.adelete(oid)
     if not ok:
         raise HTTPException(status_code=404, detail='Oportunidad no encontrada')
     return {"status": "deleted", "id": oid}
@@ -1,4 +1,4 @@
-"""Router de storage genérico (data_items) Opción A (usa store directo)."""
+"""Router de storage genérico (data_items) Opción A (usa store directo, variantes async)."""
 from __future__ import annotations
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
@@ -13,34 +13,38 @@ class GenericItemIn(BaseModel):
     id: str | None = None
 
 @router.post("")
-def create_generic(item: GenericItemIn, request: Request):
+async def create_generic(item: GenericItemIn, request: Request):
     check_admin(request)
-    created = storage_store.create_item(item.tipo, item.data, item.id)
+    created = await storage_store.acreate_item(item.tipo, item.data, item.id)
     return created
 
 @router.get("/{item_id}")
-def get_generic(item_id: str):
-    obj = storage_store.get_item(item_id)
+async def get_generic(item_id: str):
+    obj = await storage_store.aget_item(item_id)
     if not obj:
         raise HTTPException(status_code=404, detail='Item no encontrado')
     return obj
 
 @router.put("/{item_id}")
-def update_generic(item_id: str, item: GenericItemIn, request: Request):
+async def update_generic(item_id: str, item: GenericItemIn, request: Request):
     check_admin(request)
-    upd = storage_store.update_item(item_id, item.data)
+    upd = await storage_store.aupdate_item(item_id, item.data)
     if not upd:
         raise HTTPException(status_code=404, detail='Item no encontrado')
     return upd
 
 @router.delete("/{item_id}")
-def delete_generic(item_id: str, request: Request):
+async def delete_generic(item_id: str, request: Request):
     check_admin(request)
-    ok = storage_store.delete_item(item_id)
+    ok = await storage_store.adelete_item(item_id)
     if not ok:
         raise HTTPException(status_code=404, detail='Item no encontrado')
     return {"status": "deleted", "id": item_id}
 
 @router.get("")
-def search_generic(tipo: str | None = None, q: str | None = None, page: int = 1, page_size: int = 20):
-    return storage_store.search_items(tipo=tipo, q=q, page=page, page_size=page_size)
+async def search_generic(tipo: str | None = None, q: str | None = None, page: int = 1, page_size: int = 20,
+                         cursor: str | None = None, total: bool = True):
+    try:
+        return await storage_store.asearch_items(tipo=tipo, q=q, page=page, page_size=page_size, cursor=cursor, with_total=total)
+    except ValueError as e:  # Cursor inválido.
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,4 @@
+"""Servicios usados por /ask (cliente LLM, embeddings, caches).
+
+No exponen endpoints: main.py y los routers los orquestan.
+"""
@@ -0,0 +1,146 @@
+"""Cache semántico de respuestas de /ask.
+
+Si una pregunta nueva es casi igual (coseno >= ANSWER_CACHE_THRESHOLD) a otra ya respondida,
+devolvemos la respuesta guardada sin búsqueda web ni llamada a Groq.
+
+Cada entrada guarda:
+    - el vector normalizado de la pregunta (fila de una matriz preasignada: la búsqueda es un
+      único producto matriz-vector sobre como mucho ANSWER_CACHE_SIZE filas),
+    - la respuesta y los fragmentos usados, con su (id, versión).
+La versión de un fragmento es su hash de contenido. Al recargar el índice o editar un chunk,
+`invalidate_changed` descarta solo las respuestas que usaron fragmentos modificados o borrados.
+Límites: TTL por entrada y tamaño máximo con expulsión LRU.
+"""
+from __future__ import annotations  # Tipos adelantados.
+import os, time, hashlib, threading  # Config, TTL, hash de contenido y sincronización.
+from collections import OrderedDict  # Orden LRU de los slots.
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple  # Tipos.
+import numpy as np  # Matriz de preguntas.
+
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))  # Respuestas guardadas (0 = desactivado).
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "21600"))  # Segundos de vida de cada respuesta (6 h).
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))  # Coseno mínimo para reutilizar.
+
+def fragment_version(frag: Dict[str, Any]) -> str:  # Hash de contenido del fragmento (cambia si se edita el texto).
+    v = frag.get("content_hash") or frag.get("version")
+    if v:
+        return str(v)
+    return hashlib.sha1((frag.get("texto") or "").encode("utf-8")).hexdigest()[:16]
+
+def fragment_ref(frag: Dict[str, Any]) -> Tuple[str, str]:  # (id, versión) que queda en la clave de la entrada.
+    return str(frag.get("id")), fragment_version(frag)
+
+class SemanticAnswerCache:
+    def __init__(self, dim: int = 384, max_entries: int = ANSWER_CACHE_SIZE, ttl: float = ANSWER_CACHE_TTL,
+                 threshold: float = ANSWER_CACHE_THRESHOLD):
+        self.dim = dim
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self._vecs = np.zeros((max(max_entries, 0), dim), dtype=np.float32)  # Slot libre = fila de ceros.
+        self._entries: Dict[int, Dict[str, Any]] = {}  # slot -> entrada.
+        self._lru: "OrderedDict[int, None]" = OrderedDict()  # slots de menos a más recientes.
+        self._free: List[int] = list(range(max(max_entries, 0)))[::-1]
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expired = self.invalidated = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _drop(self, slot: int) -> None:  # Libera un slot (llamar con lock tomado).
+        self._entries.pop(slot, None)
+        self._lru.pop(slot, None)
+        self._vecs[slot] = 0.0
+        self._free.append(slot)
+
+    def lookup(self, q_vec: Any) -> Optional[Dict[str, Any]]:
+        """Respuesta cacheada más parecida si supera el umbral y sigue vigente; si no, None."""
+        if not self.enabled:
+            return None
+        q = np.asarray(q_vec, dtype=np.float32).reshape(-1)
+        n = float(np.linalg.norm(q))
+        with self._lock:
+            if not self._entries or n == 0:
+                self.misses += 1
+                return None
+            sims = self._vecs @ (q / n)
+            while True:
+                slot = int(np.argmax(sims))
+                if sims[slot] < self.threshold:
+                    self.misses += 1
+                    return None
+                entry = self._entries[slot]
+                if entry["expires_at"] > time.time():
+                    break
+                self.expired += 1  # Vencida: la quitamos y probamos con la siguiente mejor.
+                self._drop(slot)
+                sims[slot] = -1.0
+            self._lru.move_to_end(slot)
+            self.hits += 1
+            return {"respuesta": entry["respuesta"], "fragmentos": entry["fragmentos"], "similarity": float(sims[slot])}
+
+    def store(self, q_vec: Any, respuesta: str, fragmentos: List[Dict[str, Any]]) -> None:
+        if not self.enabled:
+            return
+        q = np.asarray(q_vec, dtype=np.float32).reshape(-1)
+        n = float(np.linalg.norm(q))
+        if n == 0:
+            return
+        with self._lock:
+            if not self._free:  # Lleno: expulsamos la menos usada recientemente.
+                oldest = next(iter(self._lru))
+                self._drop(oldest)
+                self.evictions += 1
+            slot = self._free.pop()
+            self._vecs[slot] = q / n
+            self._entries[slot] = {
+                "respuesta": respuesta,
+                "fragmentos": fragmentos,
+                "refs": [fragment_ref(f) for f in fragmentos],
+                "expires_at": time.time() + self.ttl,
+            }
+            self._lru[slot] = None
+
+    def invalidate_changed(self, current_versions: Dict[str, str], owns: Optional[Callable[[str], bool]] = None) -> int:
+        """Descarta respuestas cuyos fragmentos ya no existen o cambiaron de versión.
+
+        current_versions: {id: versión} del índice recién cargado.
+        owns: qué ids pertenecen a ese índice (por defecto todos); los demás (p.ej. mensajes del
+        índice vivo) no se comparan y no invalidan la respuesta.
+        """
+        with self._lock:
+            stale = [slot for slot, e in self._entries.items()
+                     if any(current_versions.get(fid) != ver for fid, ver in e["refs"] if owns is None or owns(fid))]
+            for slot in stale:
+                self._drop(slot)
+            self.invalidated += len(stale)
+            return len(stale)
+
+    def invalidate_ids(self, ids: Iterable[str]) -> int:  # Descarta respuestas que usaron cualquiera de esos ids.
+        gone = {str(i) for i in ids}
+        with self._lock:
+            stale = [slot for slot, e in self._entries.items() if any(fid in gone for fid, _ in e["refs"])]
+            for slot in stale:
+                self._drop(slot)
+            self.invalidated += len(stale)
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            for slot in list(self._entries):
+                self._drop(slot)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "invalidated": self.invalidated,
+            }
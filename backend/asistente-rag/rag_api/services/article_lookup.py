@@ -0,0 +1,145 @@
+"""Atajo exacto para preguntas por número de artículo, capítulo o título del Estatuto.
+
+Muchas preguntas son literalmente "¿qué dice el artículo 97?". Para esas no hace falta el
+modelo de embeddings ni la búsqueda por similitud:
+    - Al cargar el índice se arman diccionarios número -> posiciones de fragmentos, a partir de
+      `article_number` / `context` del chunk (clean_data/output/EstatutoUniversitario_*.json) o,
+      si el fragmento solo trae `texto`, del prefijo que genera `format_article_for_rag`
+      ("[Título: TÍTULO IV ... | Capítulo: CAPÍTULO II ...] Artículo 97° ...").
+    - Las regex de la pregunta están precompiladas; la resolución es una búsqueda O(1) por dict.
+Los capítulos se repiten en cada título (hay un "Capítulo I" en casi todos): un capítulo sin
+título solo se resuelve si es único.
+Los números son por documento (una resolución también puede tener un "artículo 5"): los
+diccionarios van por documento (prefijo del id "<documento>#...", o `source`). Sin documento
+nombrado en la pregunta se resuelve solo en el principal (el Estatuto, o el que tenga más
+artículos); "artículo 5 de la resolución 304" busca en los documentos cuyo nombre se menciona.
+"""
+from __future__ import annotations  # Tipos adelantados.
+import re  # Matchers precompilados.
+from typing import Any, Dict, List, Optional, Sequence, Tuple  # Tipos.
+from vector_store.lexical import fold  # Minúsculas + plegado de tildes (mismo criterio que BM25).
+
+MAX_ARTICLES = 4  # Artículos por pregunta como máximo ("artículos 10 al 14" -> 10..13).
+MAX_SECTION_CHUNKS = 6  # Chunks devueltos para un título/capítulo (los primeros, en orden del documento).
+
+_ROMAN = re.compile(r"^m{0,3}(cm|cd|d?c{0,3})(xc|xl|l?x{0,3})(ix|iv|v?i{0,3})$")
+_ROMAN_VALUES = {"i": 1, "v": 5, "x": 10, "l": 50, "c": 100, "d": 500, "m": 1000}
+_NUM = r"(\d{1,3}|[ivxlc]+)"
+# Pregunta (ya plegada): "articulo 97", "art. 97", "arts. 10 y 11", "articulos 10 al 14", "articulo n.o 5".
+_Q_ARTICLE = re.compile(r"\bart(?:iculos?|s)?\.?\s*(?:n[o°]?\.?\s*)?(\d{1,3}(?:\s*(?:,|y|e|al|a|-)\s*\d{1,3})*)\b")
+_Q_TITLE = re.compile(r"\btitulo\s+" + _NUM + r"\b")
+_Q_CHAPTER = re.compile(r"\bcapitulo\s+" + _NUM + r"\b")
+_RANGE = re.compile(r"(\d{1,3})\s*(?:al|a|-)\s*(\d{1,3})")
+# Fragmento (texto de format_article_for_rag).
+_F_PREFIX = re.compile(r"^\s*\[([^\]]*)\]\s*")
+_F_ARTICLE = re.compile(r"^art[ií]culo\s+(\d{1,3})", re.IGNORECASE)
+_F_TITLE = re.compile(r"t[ií]tulo\s+([ivxlc]+|\d{1,2})\b", re.IGNORECASE)
+_F_CHAPTER = re.compile(r"cap[ií]tulo\s+([ivxlc]+|\d{1,2})\b", re.IGNORECASE)
+
+def numeral(token: str) -> Optional[int]:  # "97" -> 97, "iv" -> 4, "civil" -> None
+    token = token.lower()
+    if token.isdigit():
+        return int(token)
+    if not token or not _ROMAN.match(token):
+        return None
+    total = 0
+    for a, b in zip(token, token[1:] + " "):
+        v = _ROMAN_VALUES[a]
+        total += -v if b != " " and _ROMAN_VALUES[b] > v else v
+    return total
+
+def _section_num(pattern: "re.Pattern[str]", text: str) -> Optional[int]:
+    m = pattern.search(text or "")
+    return numeral(m.group(1)) if m else None
+
+_DOC_GENERIC = {"unsaac", "final", "corrected", "fully", "optimized", "improved", "cleaned", "legal", "pdf", "json"}
+
+def fragment_document(frag: Dict[str, Any]) -> str:  # Documento de origen del fragmento.
+    fid = str(frag.get("id") or "")
+    return fid.split("#", 1)[0] if "#" in fid else str(frag.get("source") or "")
+
+def document_terms(doc: str) -> set:  # "EstatutoUniversitario_UNSAAC" -> {"estatuto", "universitario"}
+    words = fold(re.sub(r"(?<=[a-z])(?=[A-Z])", " ", doc))
+    return {t for t in re.findall(r"[a-z]{4,}|\d{2,}", words) if t not in _DOC_GENERIC}
+
+def fragment_keys(frag: Dict[str, Any]) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    """(artículo, título, capítulo) de un fragmento; None donde no aplica."""
+    ctx = frag.get("context") or frag.get("metadata") or {}
+    article = _section_num(_F_ARTICLE, frag.get("article_number") or "")
+    title = _section_num(_F_TITLE, ctx.get("title") or "")
+    chapter = _section_num(_F_CHAPTER, ctx.get("chapter") or "")
+    texto = frag.get("texto") or ""
+    m = _F_PREFIX.match(texto)
+    if article is None:
+        article = _section_num(_F_ARTICLE, texto[m.end():] if m else texto)
+    if m and title is None:
+        title = _section_num(_F_TITLE, m.group(1))
+    if m and chapter is None:
+        chapter = _section_num(_F_CHAPTER, m.group(1))
+    return article, title, chapter
+
+class _DocumentSections:  # Diccionarios número -> posiciones de un documento.
+    def __init__(self) -> None:
+        self.articles: Dict[int, List[int]] = {}
+        self.titles: Dict[int, List[int]] = {}
+        self.chapters: Dict[Tuple[int, int], List[int]] = {}  # (título, capítulo) -> posiciones.
+        self.chapter_titles: Dict[int, set] = {}  # capítulo -> títulos donde aparece.
+
+    def add(self, i: int, article: Optional[int], title: Optional[int], chapter: Optional[int]) -> None:
+        if article is not None:
+            self.articles.setdefault(article, []).append(i)
+        if title is not None:
+            self.titles.setdefault(title, []).append(i)
+            if chapter is not None:
+                self.chapters.setdefault((title, chapter), []).append(i)
+                self.chapter_titles.setdefault(chapter, set()).add(title)
+
+class ArticleLookup:
+    def __init__(self, fragments: Sequence[Dict[str, Any]]):
+        self.documents: Dict[str, _DocumentSections] = {}
+        for i, frag in enumerate(fragments):
+            keys = fragment_keys(frag)
+            if any(k is not None for k in keys):
+                self.documents.setdefault(fragment_document(frag), _DocumentSections()).add(i, *keys)
+        self._terms = {doc: document_terms(doc) for doc in self.documents}
+        # Principal: el Estatuto si está; si no, el de más artículos.
+        self.primary = max(self.documents, key=lambda d: ("estatuto" in self._terms[d], len(self.documents[d].articles)),
+                           default=None)
+
+    def __len__(self) -> int:
+        return sum(len(d.articles) for d in self.documents.values())
+
+    def _scope(self, q: str) -> List[_DocumentSections]:  # Documentos nombrados en la pregunta, o el principal.
+        words = set(re.findall(r"[a-z]+|\d+", _Q_ARTICLE.sub(" ", q)))  # Sin los números citados ("artículo 304").
+        named = [d for d in self.documents if self._terms[d] & words]
+        if named:
+            return [self.documents[d] for d in named]
+        return [self.documents[self.primary]] if self.primary is not None else []
+
+    def match(self, question: str) -> Optional[Tuple[str, List[int]]]:
+        """(tipo, posiciones) si la pregunta cita un artículo/capítulo/título indexado; si no, None."""
+        q = fold(question)
+        docs = self._scope(q)
+        m = _Q_ARTICLE.search(q)
+        if m and docs:
+            nums: List[int] = []
+            spec = m.group(1)
+            for lo, hi in _RANGE.findall(spec):
+                nums.extend(range(int(lo), min(int(hi), int(lo) + MAX_ARTICLES - 1) + 1))
+            nums.extend(int(n) for n in re.findall(r"\d{1,3}", _RANGE.sub(" ", spec)))
+            idxs = [i for n in dict.fromkeys(nums) for d in docs for i in d.articles.get(n, [])][:MAX_ARTICLES]
+            if idxs:
+                return "articulo", idxs
+        title = _section_num(_Q_TITLE, q)
+        chapter = _section_num(_Q_CHAPTER, q)
+        for d in docs:
+            t = title
+            if chapter is not None:
+                if t is None and len(d.chapter_titles.get(chapter, ())) == 1:
+                    t = next(iter(d.chapter_titles[chapter]))
+                idxs = d.chapters.get((t, chapter)) if t is not None else None
+                if idxs:
+                    return "capitulo", idxs[:MAX_SECTION_CHUNKS]
+            if title is not None and d.titles.get(title):
+                return "titulo", d.titles[title][:MAX_SECTION_CHUNKS]
+        return None
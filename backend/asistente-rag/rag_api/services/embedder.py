@@ -0,0 +1,172 @@
+"""Servicio de embeddings con micro-batching dinámico.
+
+Antes cada petición llamaba `SentenceTransformer.encode` con UNA pregunta desde su propio hilo
+del threadpool: en hora punta varios encodes de tamaño 1 compiten por la CPU. Ahora:
+    - Las peticiones dejan su texto en una cola y reciben un Future.
+    - Un hilo trabajador toma el primer texto, espera hasta EMBED_MAX_WAIT_MS (o hasta juntar
+      EMBED_MAX_BATCH textos) y ejecuta UN `encode` por lote; luego resuelve cada Future.
+    - EMBED_WORKERS acota cuántos lotes corren a la vez (= trabajo concurrente del modelo).
+    - EMBED_QUEUE_MAX acota la cola; si se llena, `submit` falla rápido con EmbedderOverloaded.
+El cache de embeddings (embedding_cache.py) se consulta antes de encolar (memoria) y dentro del
+trabajador (SQLite), así el event loop nunca toca disco.
+`encode_many` es la vía para trabajo en segundo plano (indexador de mensajes): usa la misma cola y
+los mismos trabajadores (el modelo nunca corre en más de EMBED_WORKERS hilos), espera si la cola
+está llena en vez de fallar y no pasa por el cache (textos que no se repiten como consultas).
+"""
+from __future__ import annotations  # Tipos adelantados.
+import os, time, queue, asyncio, threading  # Cola, hilos y puente con asyncio.
+from concurrent.futures import Future  # Resultado entregado a cada petición.
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple  # Tipos.
+import numpy as np  # Vectores.
+from .embedding_cache import EmbeddingCache  # Cache LRU (+ SQLite) de embeddings.
+
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))  # Textos máximos por encode.
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))  # Espera máxima para juntar un lote.
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "1"))  # Lotes concurrentes (hilos trabajadores).
+EMBED_QUEUE_MAX = int(os.getenv("EMBED_QUEUE_MAX", "1024"))  # Peticiones pendientes antes de rechazar.
+
+class EmbedderOverloaded(Exception):  # Cola llena: el llamador decide el fallback.
+    pass
+
+_STOP = object()  # Centinela para apagar trabajadores.
+
+class EmbeddingService:
+    def __init__(self, encode_batch: Callable[[List[str]], Any], cache: Optional[EmbeddingCache] = None,
+                 max_batch: int = EMBED_MAX_BATCH, max_wait_ms: float = EMBED_MAX_WAIT_MS,
+                 workers: int = EMBED_WORKERS, queue_max: int = EMBED_QUEUE_MAX):
+        self._encode_batch = encode_batch  # Función lista[str] -> matriz (len x dim).
+        self.cache = cache
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(0, queue_max))
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+        self.rejected = 0
+        self.encode_seconds = 0.0
+        self._threads = [threading.Thread(target=self._run, name=f"embedder-{i}", daemon=True)
+                         for i in range(max(1, workers))]
+        for t in self._threads:
+            t.start()
+
+    @classmethod
+    def for_model(cls, model: Any, cache: Optional[EmbeddingCache] = None, **kw: Any) -> "EmbeddingService":
+        """Atajo para un SentenceTransformer (o cualquier objeto con `.encode(list, batch_size=...)`)."""
+        return cls(lambda texts: model.encode(texts, batch_size=len(texts), convert_to_numpy=True), cache, **kw)
+
+    # ------------------------- API pública -------------------------
+    def submit(self, text: str) -> "Future[np.ndarray]":
+        fut: "Future[np.ndarray]" = Future()
+        if self.cache is not None:
+            hit = self.cache.peek(text)
+            if hit is not None:
+                fut.set_result(hit)
+                return fut
+        try:
+            self._queue.put_nowait((text, fut, True))
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise EmbedderOverloaded("cola de embeddings llena")
+        return fut
+
+    def encode(self, text: str, timeout: Optional[float] = None) -> np.ndarray:  # Para código síncrono.
+        return self.submit(text).result(timeout)
+
+    async def encode_async(self, text: str) -> np.ndarray:  # Para endpoints async: no ocupa hilos del threadpool.
+        return await asyncio.wrap_future(self.submit(text))
+
+    def encode_many(self, texts: Sequence[str], timeout: Optional[float] = None) -> np.ndarray:
+        """Lote de fondo (len x dim) por los trabajadores del servicio; bloquea si la cola está llena."""
+        futs: List["Future[np.ndarray]"] = []
+        for text in texts:
+            fut: "Future[np.ndarray]" = Future()
+            self._queue.put((text, fut, False), timeout=timeout)
+            futs.append(fut)
+        return np.stack([f.result(timeout) for f in futs]) if futs else np.zeros((0, 0), dtype=np.float32)
+
+    def close(self) -> None:
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for t in self._threads:
+            t.join(timeout=5)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "max_batch_seen": self.max_batch_seen,
+                "rejected": self.rejected,
+                "encode_seconds": round(self.encode_seconds, 3),
+                "workers": len(self._threads),
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+    # ------------------------- Trabajador -------------------------
+    def _collect(self, first: Tuple[str, Future, bool]) -> Tuple[List[Tuple[str, Future, bool]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch, stop = self._collect(first)
+            self._process(batch)
+            if stop:
+                return
+
+    def _process(self, batch: Sequence[Tuple[str, Future, bool]]) -> None:
+        pending: Dict[str, List[Future]] = {}  # Texto -> futures (textos repetidos se calculan una vez).
+        cached = set()  # Textos que vinieron de consultas (entran al cache).
+        for text, fut, use_cache in batch:
+            if not fut.set_running_or_notify_cancel():
+                continue
+            if use_cache:
+                cached.add(text)
+            if use_cache and self.cache is not None and text not in pending:
+                hit = self.cache.get(text)  # Incluye nivel SQLite (estamos fuera del event loop).
+                if hit is not None:
+                    fut.set_result(hit)
+                    continue
+            pending.setdefault(text, []).append(fut)
+        if not pending:
+            return
+        texts = list(pending)
+        if self.cache is not None and cached:
+            self.cache.note_misses(sum(1 for t in texts if t in cached))
+        t0 = time.perf_counter()
+        try:
+            vecs = np.asarray(self._encode_batch(texts), dtype=np.float32).reshape(len(texts), -1)
+        except Exception as e:  # Propagamos el error a cada petición del lote.
+            for futs in pending.values():
+                for fut in futs:
+                    fut.set_exception(e)
+            return
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.batches += 1
+            self.items += len(texts)
+            self.max_batch_seen = max(self.max_batch_seen, len(texts))
+            self.encode_seconds += elapsed
+        for text, vec in zip(texts, vecs):
+            if self.cache is not None and text in cached:
+                vec = self.cache.put(text, vec)
+            for fut in pending[text]:
+                fut.set_result(vec)
@@ -0,0 +1,77 @@
+"""Selección del backend de inferencia del modelo de embeddings (EMBED_BACKEND).
+
+    torch      -> SentenceTransformer con PyTorch (comportamiento original).
+    onnx       -> mismo modelo exportado a ONNX y ejecutado con ONNX Runtime.
+    onnx-int8  -> ONNX con cuantización dinámica int8 (pesos int8, activaciones cuantizadas al vuelo).
+
+Todos devuelven un objeto SentenceTransformer, así que la interfaz `encode` no cambia y
+EmbeddingService.for_model funciona igual. Requiere sentence-transformers>=3.2 y
+`optimum[onnxruntime]` para los backends ONNX; si faltan se vuelve a torch con un aviso.
+
+Para int8 se intenta primero el archivo precuantizado publicado en el repo del modelo
+(`onnx/model_qint8_<arch>.onnx`, elegido según la CPU); si no existe se cuantiza localmente
+una vez y se guarda en EMBED_ONNX_CACHE.
+"""
+from __future__ import annotations  # Tipos adelantados.
+import os, platform  # Config y detección de arquitectura.
+from typing import Any, Tuple  # Tipos.
+
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch").lower()  # torch | onnx | onnx-int8
+EMBED_ONNX_FILE = os.getenv("EMBED_ONNX_FILE", "")  # Forzar un archivo ONNX concreto del repo del modelo.
+EMBED_ONNX_CACHE = os.getenv("EMBED_ONNX_CACHE", os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "fragments", "onnx_models"))
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+def _cpu_flags() -> str:
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+def quantization_target() -> str:  # Configuración de cuantización adecuada a esta CPU.
+    machine = platform.machine().lower()
+    if machine in ("arm64", "aarch64"):
+        return "arm64"
+    flags = _cpu_flags()
+    if "avx512_vnni" in flags:
+        return "avx512_vnni"
+    if "avx512" in flags:
+        return "avx512"
+    return "avx2"
+
+def _int8_file(target: str) -> str:  # Nombre que usa sentence-transformers para los modelos cuantizados.
+    return f"onnx/model_{'quint8' if target == 'avx2' else 'qint8'}_{target}.onnx"
+
+def load_embedding_model(model_name: str, backend: str = EMBED_BACKEND) -> Tuple[Any, str]:
+    """Devuelve (modelo, backend_efectivo)."""
+    from sentence_transformers import SentenceTransformer  # Import local: carga pesada.
+    if backend not in BACKENDS:
+        raise ValueError(f"EMBED_BACKEND desconocido: {backend!r} (opciones: {', '.join(BACKENDS)})")
+    if backend == "torch":
+        return SentenceTransformer(model_name), "torch"
+    try:
+        if backend == "onnx":
+            kwargs = {"file_name": EMBED_ONNX_FILE} if EMBED_ONNX_FILE else {}
+            return SentenceTransformer(model_name, backend="onnx", model_kwargs=kwargs), "onnx"
+        return _load_int8(model_name), "onnx-int8"
+    except (ImportError, TypeError) as e:  # Falta optimum/onnxruntime o sentence-transformers < 3.2.
+        print(f"⚠️ EMBED_BACKEND={backend} no disponible ({e}); usando torch.")
+        return SentenceTransformer(model_name), "torch"
+
+def _load_int8(model_name: str) -> Any:
+    from sentence_transformers import SentenceTransformer
+    target = quantization_target()
+    file_name = EMBED_ONNX_FILE or _int8_file(target)
+    try:  # 1) Archivo precuantizado publicado junto al modelo.
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs={"file_name": file_name})
+    except (OSError, ValueError):
+        pass
+    local_dir = os.path.join(EMBED_ONNX_CACHE, model_name.replace("/", "__"))
+    local_file = os.path.join(local_dir, _int8_file(target))
+    if not os.path.exists(local_file):  # 2) Cuantización dinámica local (una sola vez).
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+        base = SentenceTransformer(model_name, backend="onnx")
+        base.save(local_dir)
+        export_dynamic_quantized_onnx_model(base, quantization_config=target, model_name_or_path=local_dir)
+    return SentenceTransformer(local_dir, backend="onnx", model_kwargs={"file_name": _int8_file(target)})
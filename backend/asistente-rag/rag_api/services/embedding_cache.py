@@ -0,0 +1,129 @@
+"""Cache de embeddings de preguntas (LRU en memoria + nivel SQLite opcional).
+
+Los estudiantes repiten las mismas preguntas cada semestre ("requisitos de matrícula",
+"artículo 97"). En lugar de llamar a `model.encode` cada vez:
+    1. Normalizamos el texto (minúsculas, sin tildes ni signos ¿?¡!, espacios colapsados),
+       así preguntas casi idénticas comparten entrada.
+    2. La clave incluye el nombre del modelo (cambiar de modelo no reutiliza vectores viejos).
+    3. Nivel 1: OrderedDict LRU acotado. Nivel 2 (opcional): tabla SQLite que sobrevive reinicios.
+"""
+from __future__ import annotations  # Tipos adelantados.
+import os, re, time, sqlite3, hashlib, threading, unicodedata  # Normalización, persistencia y sincronización.
+from collections import OrderedDict  # LRU simple: move_to_end + popitem(last=False).
+from typing import Any, Callable, Dict, Optional  # Tipos.
+import numpy as np  # Vectores.
+
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "4096"))  # Entradas en memoria (0 = desactivado).
+EMBED_CACHE_DB = os.getenv("EMBED_CACHE_DB", "")  # Ruta SQLite del nivel persistente ("" = sin disco).
+EMBED_CACHE_DB_MAX = int(os.getenv("EMBED_CACHE_DB_MAX", "200000"))  # Tope de filas en disco.
+
+_PUNCT = re.compile(r"[¿?¡!.,;:\"'()]+")  # Signos que no cambian el sentido de la pregunta.
+_SPACES = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:  # "  ¿Requisitos de Matrícula? " -> "requisitos de matricula"
+    t = unicodedata.normalize("NFD", text.lower())
+    t = "".join(c for c in t if unicodedata.category(c) != "Mn")  # Quita tildes.
+    t = _PUNCT.sub(" ", t)
+    return _SPACES.sub(" ", t).strip()
+
+class EmbeddingCache:
+    """LRU thread-safe (encode corre en el threadpool) con contadores de aciertos/fallos."""
+
+    def __init__(self, model_name: str, max_entries: int = EMBED_CACHE_SIZE,
+                 db_path: Optional[str] = EMBED_CACHE_DB or None, db_max_rows: int = EMBED_CACHE_DB_MAX):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.db_max_rows = db_max_rows
+        self._mem: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0  # Aciertos en memoria.
+        self.disk_hits = 0  # Aciertos en SQLite (luego promovidos a memoria).
+        self.misses = 0  # Hubo que llamar al modelo.
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_inserts = 0
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)  # Acceso serializado con self._lock.
+            self._db.execute("PRAGMA journal_mode=WAL")  # Varios workers pueden leer mientras uno escribe.
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings (key TEXT PRIMARY KEY, vec BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def key(self, text: str) -> str:  # sha1(modelo + texto normalizado): clave corta y estable.
+        return hashlib.sha1(f"{self.model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vec: np.ndarray) -> None:  # Inserta en LRU (llamar con lock tomado).
+        if self.max_entries <= 0:
+            return
+        self._mem[key] = vec
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)  # Expulsa el menos usado recientemente.
+
+    def peek(self, text: str) -> Optional[np.ndarray]:  # Solo memoria: barato, apto para el event loop.
+        key = self.key(text)
+        with self._lock:
+            vec = self._mem.get(key)
+            if vec is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+            return vec
+
+    def get(self, text: str) -> Optional[np.ndarray]:  # Memoria y luego disco.
+        vec = self.peek(text)
+        if vec is not None or self._db is None:
+            return vec
+        key = self.key(text)
+        with self._lock:
+            row = self._db.execute("SELECT vec FROM query_embeddings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            vec = np.frombuffer(row[0], dtype=np.float32)
+            self._db.execute("UPDATE query_embeddings SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self.disk_hits += 1
+            self._remember(key, vec)
+            return vec
+
+    def put(self, text: str, vec: Any) -> np.ndarray:
+        arr = np.asarray(vec, dtype=np.float32).reshape(-1)
+        arr.setflags(write=False)  # Compartido entre peticiones: nadie debe mutarlo.
+        key = self.key(text)
+        with self._lock:
+            self._remember(key, arr)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO query_embeddings (key, vec, last_used) VALUES (?,?,?)",
+                                 (key, arr.tobytes(), time.time()))
+                self._db_inserts += 1
+                if self._db_inserts % 1000 == 0:  # Poda ocasional de las filas menos usadas.
+                    self._db.execute(
+                        "DELETE FROM query_embeddings WHERE key IN (SELECT key FROM query_embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                        (self.db_max_rows,),
+                    )
+                self._db.commit()
+        return arr
+
+    def note_misses(self, n: int = 1) -> None:  # Para quien calcula por lotes fuera de get_or_compute.
+        with self._lock:
+            self.misses += n
+
+    def get_or_compute(self, text: str, encode: Callable[[str], Any]) -> np.ndarray:
+        vec = self.get(text)
+        if vec is not None:
+            return vec
+        self.note_misses()
+        return self.put(text, encode(text))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._mem),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / total, 4) if total else 0.0,
+                "persistent": self._db is not None,
+            }
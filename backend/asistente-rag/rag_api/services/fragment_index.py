@@ -0,0 +1,85 @@
+"""Índice de fragmentos para la recuperación local de /ask.
+
+Antes, cada pregunta recalculaba `np.linalg.norm(embeddings, axis=1)` sobre toda la matriz
+float64 y ordenaba todas las similitudes con `np.argsort` solo para quedarse con TOP_K.
+Aquí la matriz se prepara UNA vez al cargar:
+    - float32 contigua (mitad de memoria que float64 y producto matriz-vector más rápido).
+    - Filas normalizadas L2, de modo que coseno = producto punto.
+La búsqueda se delega a un índice de `vector_store.search_engine` (Flat exacto por defecto;
+IVF o HNSW con RAG_INDEX_KIND). Los ids del índice son la posición del fragmento.
+Con el índice binario (vector_store/embedding_store.py) la matriz llega como memmap ya
+normalizado y se usa sin copiar.
+Con RAG_HYBRID=1 se construye además un índice BM25 (vector_store/lexical.py) sobre el campo
+`texto`; `search_hybrid` fusiona ambas listas de candidatos con RRF.
+`lookup` (article_lookup.py) resuelve "artículo 97" / "capítulo II del título V" sin búsqueda.
+"""
+from __future__ import annotations  # Tipos adelantados.
+import os  # Variables de entorno.
+from typing import Any, Dict, List, Optional, Sequence, Tuple  # Tipos.
+import numpy as np  # Álgebra vectorial.
+from vector_store.search_engine import (  # Motor vectorial (índices intercambiables) + utilidades re-exportadas.
+    VectorIndex, create_index, normalize_query, normalize_rows, parse_params, top_k,
+)
+from vector_store.lexical import BM25Index, rrf_fuse  # Pierna léxica (términos exactos, números de artículo).
+from .article_lookup import ArticleLookup  # Diccionarios artículo/título/capítulo -> posiciones.
+
+EMBED_DIM = 384  # Dimensión de all-MiniLM-L6-v2.
+INDEX_KIND = os.getenv("RAG_INDEX_KIND", "flat")  # flat | ivf | hnsw
+INDEX_PARAMS = parse_params(os.getenv("RAG_INDEX_PARAMS"))  # Ej: "nlist=256,nprobe=16" o "ef_search=128".
+HYBRID = os.getenv("RAG_HYBRID", "1") == "1"  # BM25 + denso con RRF.
+HYBRID_CANDIDATES = int(os.getenv("RAG_HYBRID_CANDIDATES", "50"))  # Candidatos por pierna antes de fusionar.
+RRF_K = float(os.getenv("RAG_RRF_K", "60"))  # Constante de RRF (más alta = rangos más parejos).
+
+class FragmentIndex:
+    """Fragmentos + matriz normalizada alineada por posición (fila i <-> fragments[i])."""
+
+    def __init__(self, fragments: List[Dict[str, Any]], vectors: np.ndarray, normalized: bool = False,
+                 kind: Optional[str] = None, params: Optional[Dict[str, Any]] = None, hybrid: Optional[bool] = None):
+        if len(fragments) != vectors.shape[0]:
+            raise ValueError("fragments y vectors deben tener la misma cantidad de filas")
+        self.fragments = fragments
+        if not vectors.size:
+            self.matrix = np.zeros((0, EMBED_DIM), dtype=np.float32)
+        elif normalized:  # Ya float32 normalizada (p.ej. memmap del índice binario): se usa tal cual, sin copiar.
+            self.matrix = vectors
+        else:
+            self.matrix = normalize_rows(vectors)
+        self.engine: VectorIndex = create_index(kind or INDEX_KIND, self.matrix.shape[1],
+                                                **(INDEX_PARAMS if params is None else params))
+        if len(fragments):
+            # normalized=True: el índice Flat comparte `self.matrix` sin copiarla.
+            self.engine.build(np.arange(len(fragments)), self.matrix, normalized=True)
+        use_lexical = HYBRID if hybrid is None else hybrid
+        self.lexical: Optional[BM25Index] = (BM25Index([f.get("texto") or "" for f in fragments])
+                                             if use_lexical and len(fragments) else None)
+        self.lookup = ArticleLookup(fragments)
+
+    @classmethod
+    def from_fragments(cls, fragments: Sequence[Dict[str, Any]], dim: int = EMBED_DIM, **kw: Any) -> "FragmentIndex":
+        """Construye desde la lista cargada de fragments_embedded.json (campo `embedding`).
+
+        Solo se indexan fragmentos con embedding, así fila y fragmento nunca se desalinean.
+        """
+        usable = [f for f in fragments if f.get("embedding") is not None]
+        if not usable:
+            return cls([], np.zeros((0, dim), dtype=np.float32), **kw)
+        vectors = np.asarray([f["embedding"] for f in usable], dtype=np.float32)
+        return cls(usable, vectors, **kw)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def search(self, query_vec: Any, k: int) -> Tuple[List[int], List[float]]:  # (índices, similitudes coseno).
+        if len(self) == 0:
+            return [], []
+        return self.engine.search(query_vec, k)
+
+    def search_hybrid(self, question: str, query_vec: Any, k: int) -> Tuple[List[int], List[float]]:
+        """Top-k por RRF de la búsqueda densa y BM25 -> (índices, scores RRF). Sin BM25 equivale a `search`."""
+        if self.lexical is None:
+            return self.search(query_vec, k)
+        n_cand = max(k, HYBRID_CANDIDATES)
+        q = np.asarray(query_vec, dtype=np.float32).reshape(-1)
+        dense = self.search(q, n_cand)[0] if np.any(q) else []  # Vector cero = falló el embedding: solo BM25.
+        lexical = self.lexical.search(question, n_cand)[0]
+        return rrf_fuse([dense, lexical], k, RRF_K)
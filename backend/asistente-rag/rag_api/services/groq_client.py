@@ -0,0 +1,140 @@
+"""Cliente HTTP asíncrono compartido para la API de Groq.
+
+Antes cada pregunta abría una conexión nueva con `requests.post` y reintentaba con
+`time.sleep`, bloqueando un hilo del pool de AnyIO por hasta ~75 s. Ahora:
+    - Un único httpx.AsyncClient por proceso (pool de conexiones + HTTP keep-alive).
+    - Reintentos con `asyncio.sleep` y backoff exponencial con jitter (no bloquea el event loop).
+    - Límites de pool y timeouts configurables por variables de entorno.
+    - Modo streaming (`stream: true`) para reenviar tokens por SSE desde /ask/stream.
+"""
+from __future__ import annotations  # Tipos adelantados.
+import os, json, random, asyncio  # os: config; json: parseo de eventos stream; random: jitter; asyncio: sleep no bloqueante.
+from typing import Any, AsyncIterator, Dict, Optional, Tuple  # Tipos.
+import httpx  # Cliente HTTP asíncrono con pool de conexiones.
+
+# ---- Límites del pool (cuántas conexiones simultáneas / vivas mantenemos hacia Groq) ----
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "20"))  # Conexiones totales máximas.
+GROQ_MAX_KEEPALIVE = int(os.getenv("GROQ_MAX_KEEPALIVE", "10"))  # Conexiones ociosas que se mantienen abiertas.
+GROQ_KEEPALIVE_EXPIRY = float(os.getenv("GROQ_KEEPALIVE_EXPIRY", "30"))  # Segundos antes de cerrar una conexión ociosa.
+# ---- Timeouts (segundos) ----
+GROQ_CONNECT_TIMEOUT = float(os.getenv("GROQ_CONNECT_TIMEOUT", "5"))  # Establecer TCP/TLS.
+GROQ_READ_TIMEOUT = float(os.getenv("GROQ_READ_TIMEOUT", "25"))  # Esperar bytes de respuesta.
+GROQ_WRITE_TIMEOUT = float(os.getenv("GROQ_WRITE_TIMEOUT", "10"))  # Enviar el cuerpo.
+GROQ_POOL_TIMEOUT = float(os.getenv("GROQ_POOL_TIMEOUT", "5"))  # Esperar una conexión libre del pool.
+# ---- Reintentos ----
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "3"))  # Intentos totales.
+GROQ_BACKOFF_BASE = float(os.getenv("GROQ_BACKOFF_BASE", "0.5"))  # Base del backoff exponencial.
+GROQ_BACKOFF_MAX = float(os.getenv("GROQ_BACKOFF_MAX", "8"))  # Tope de espera entre intentos.
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}  # Códigos temporales que vale la pena reintentar.
+
+class GroqError(Exception):  # Fallo definitivo de Groq (tras reintentos) durante un stream.
+    pass
+
+_client: Optional[httpx.AsyncClient] = None  # Cliente compartido (se crea perezosamente).
+
+def get_client() -> httpx.AsyncClient:  # Devuelve el cliente compartido, creándolo si hace falta.
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=GROQ_MAX_CONNECTIONS,
+                max_keepalive_connections=GROQ_MAX_KEEPALIVE,
+                keepalive_expiry=GROQ_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                connect=GROQ_CONNECT_TIMEOUT,
+                read=GROQ_READ_TIMEOUT,
+                write=GROQ_WRITE_TIMEOUT,
+                pool=GROQ_POOL_TIMEOUT,
+            ),
+        )
+    return _client
+
+async def aclose() -> None:  # Cierra el pool (llamado en el shutdown de la app).
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:  # Segundos a esperar antes del siguiente intento.
+    """Backoff exponencial con "full jitter": uniforme en [0, min(max, base * 2^attempt)].
+
+    Si Groq manda `Retry-After` (típico en 429) lo respetamos, acotado por GROQ_BACKOFF_MAX.
+    """
+    if retry_after:
+        try:
+            return min(float(retry_after), GROQ_BACKOFF_MAX)
+        except ValueError:
+            pass  # Retry-After en formato fecha HTTP: usamos el backoff normal.
+    cap = min(GROQ_BACKOFF_MAX, GROQ_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, cap)
+
+async def chat_completion(url: str, api_key: str, payload: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """Envía una petición chat/completions y devuelve (respuesta, último_error).
+
+    respuesta es None si se agotaron los intentos o hubo un error no recuperable.
+    """
+    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    client = get_client()
+    last_error: Optional[str] = None
+    for attempt in range(GROQ_MAX_RETRIES):
+        retry_after = None
+        try:
+            resp = await client.post(url, headers=headers, json=payload)
+            if resp.status_code == 200:
+                return resp.json()["choices"][0]["message"]["content"], None
+            last_error = resp.text
+            if resp.status_code not in RETRYABLE_STATUS:  # Error no recuperable -> salimos.
+                return None, last_error
+            retry_after = resp.headers.get("retry-after")
+        except httpx.HTTPError as e:  # Timeout, conexión rechazada, pool agotado, etc.
+            last_error = str(e) or e.__class__.__name__
+        except (KeyError, IndexError, ValueError) as e:  # Respuesta 200 con formato inesperado.
+            return None, f"respuesta_invalida: {e}"
+        if attempt < GROQ_MAX_RETRIES - 1:
+            await asyncio.sleep(backoff_delay(attempt, retry_after))
+    return None, last_error
+
+async def stream_chat_completion(url: str, api_key: str, payload: Dict[str, Any]) -> AsyncIterator[str]:
+    """Igual que chat_completion pero con `stream: true`: produce cada fragmento de texto al llegar.
+
+    Solo se reintenta mientras no se haya emitido ningún token (reintentar a mitad de
+    respuesta duplicaría texto en el cliente). Si todo falla lanza GroqError.
+    """
+    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    body = {**payload, "stream": True}
+    client = get_client()
+    last_error: Optional[str] = None
+    for attempt in range(GROQ_MAX_RETRIES):
+        retry_after = None
+        emitted = False  # True en cuanto enviamos el primer token.
+        try:
+            async with client.stream("POST", url, headers=headers, json=body) as resp:
+                if resp.status_code == 200:
+                    async for line in resp.aiter_lines():  # Formato SSE estilo OpenAI: "data: {...}".
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            return
+                        try:
+                            delta = json.loads(data)["choices"][0].get("delta") or {}
+                        except (ValueError, KeyError, IndexError):
+                            continue  # Evento malformado: lo saltamos.
+                        token = delta.get("content")
+                        if token:
+                            emitted = True
+                            yield token
+                    return
+                last_error = (await resp.aread()).decode("utf-8", "replace")
+                if resp.status_code not in RETRYABLE_STATUS:
+                    raise GroqError(last_error)
+                retry_after = resp.headers.get("retry-after")
+        except httpx.HTTPError as e:
+            last_error = str(e) or e.__class__.__name__
+            if emitted:  # Corte a mitad del stream: no reintentamos.
+                raise GroqError(last_error) from e
+        if attempt < GROQ_MAX_RETRIES - 1:
+            await asyncio.sleep(backoff_delay(attempt, retry_after))
+    raise GroqError(last_error or "groq_error")
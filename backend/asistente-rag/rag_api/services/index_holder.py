@@ -0,0 +1,109 @@
+"""Contenedor recargable del índice de fragmentos (sin reiniciar workers).
+
+Antes `fragments`/`embeddings` eran globales cargados al importar main.py: agregar documentos
+obligaba a reiniciar cada worker (y pagar de nuevo el arranque del modelo). Ahora:
+    - Cada petición toma `holder.current()` UNA vez y trabaja con ese snapshot hasta el final.
+    - `reload()` construye el índice nuevo fuera del lock (en un hilo) y luego cambia la
+      referencia de forma atómica. Las peticiones en curso terminan con el snapshot viejo; cuando
+      sueltan su referencia, Python lo libera (incluido el memmap, cuyo archivo viejo sigue
+      válido: save_store escribe cada generación en una matriz nueva y solo reemplaza el meta).
+    - `signature()` (mtime + tamaño de los archivos del índice) permite detectar cambios: un
+      vigilante asíncrono recarga solo si la firma cambió (RAG_INDEX_WATCH_S; 0 = sin vigilar).
+    - `on_swap(viejo, nuevo)` deja enganchar invalidaciones (p.ej. el cache de respuestas).
+"""
+from __future__ import annotations  # Tipos adelantados.
+import os, time, asyncio, threading  # Config, tiempos, vigilante y sincronización.
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple  # Tipos.
+
+RAG_INDEX_WATCH_S = float(os.getenv("RAG_INDEX_WATCH_S", "30"))  # Intervalo de sondeo de los archivos (0 = desactivado).
+
+Signature = Tuple[Tuple[str, int, int], ...]
+
+def file_signature(paths: Sequence[str]) -> Signature:  # (ruta, mtime_ns, tamaño) de los archivos existentes.
+    out = []
+    for p in paths:
+        try:
+            st = os.stat(p)
+        except OSError:
+            continue
+        out.append((p, st.st_mtime_ns, st.st_size))
+    return tuple(out)
+
+class IndexHolder:
+    def __init__(self, loader: Callable[[], Any], watch_paths: Sequence[str] = (),
+                 on_swap: Optional[Callable[[Any, Any], None]] = None):
+        self._loader = loader
+        self.watch_paths = list(watch_paths)
+        self._on_swap = on_swap
+        self._reload_lock = threading.Lock()  # Una recarga a la vez.
+        self._signature = file_signature(self.watch_paths)
+        self._current = loader()
+        self.version = 1
+        self.loaded_at = time.time()
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_reload_ms: Optional[float] = None
+
+    def current(self) -> Any:  # Lectura de una referencia: atómica bajo el GIL, sin lock.
+        return self._current
+
+    def changed(self) -> bool:
+        return file_signature(self.watch_paths) != self._signature
+
+    def reload(self, force: bool = True) -> Dict[str, Any]:
+        """Carga y publica un índice nuevo (bloqueante: llamar desde un hilo).
+
+        force=False solo recarga si cambió la firma de los archivos. Si la carga falla se
+        conserva el índice actual.
+        """
+        with self._reload_lock:
+            sig = file_signature(self.watch_paths)
+            if not force and sig == self._signature:
+                return {"reloaded": False, "version": self.version}
+            t0 = time.perf_counter()
+            try:
+                new = self._loader()
+            except Exception as e:  # Índice a medio escribir o incompatible: seguimos con el viejo.
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                return {"reloaded": False, "version": self.version, "error": self.last_error}
+            old, self._current = self._current, new  # Publicación atómica.
+            self._signature = sig
+            self.version += 1
+            self.reloads += 1
+            self.loaded_at = time.time()
+            self.last_error = None
+            self.last_reload_ms = round((time.perf_counter() - t0) * 1000, 1)
+            result = {"reloaded": True, "version": self.version, "took_ms": self.last_reload_ms}
+            if self._on_swap is not None:
+                try:
+                    self._on_swap(old, new)
+                except Exception as e:  # El índice nuevo ya está publicado: un hook roto no lo deshace ni frena recargas.
+                    self.failures += 1
+                    self.last_error = f"on_swap {type(e).__name__}: {e}"
+                    result["error"] = self.last_error
+            del old  # Se libera cuando la última petición que lo usa termine.
+            return result
+
+    async def watch(self, interval: float = RAG_INDEX_WATCH_S) -> None:  # Tarea de fondo: recarga al cambiar los archivos.
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self.changed():
+                    await loop.run_in_executor(None, self.reload, False)
+            except Exception as e:  # La tarea no debe morir en silencio: se registra y se sigue sondeando.
+                self.failures += 1
+                self.last_error = f"watch {type(e).__name__}: {e}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_reload_ms": self.last_reload_ms,
+            "watch_interval_s": RAG_INDEX_WATCH_S,
+        }
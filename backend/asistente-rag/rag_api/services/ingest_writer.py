@@ -0,0 +1,210 @@
+"""Escritor con group commit para los mensajes ingeridos (data_ingest/messages/<plataforma>.jsonl).
+
+Antes cada POST a /ingest/messages abría el archivo, agregaba una línea y lo cerraba dentro de un
+`async def`: E/S síncrona en el event loop y una escritura por mensaje. Ahora:
+    - Los endpoints entregan registros ya validados con `submit` y reciben un Future; no tocan disco.
+    - Un hilo escritor junta lo encolado hasta INGEST_FLUSH_RECORDS registros o INGEST_FLUSH_MS
+      desde el primero, y hace UN commit: una escritura por plataforma sobre archivos que quedan
+      abiertos, flush y, según INGEST_FSYNC, fsync. Después resuelve los Futures del grupo: cuando
+      el endpoint responde, sus líneas ya están en el archivo (y en disco si hubo fsync).
+      Mientras un commit escribe, lo que llega se encola y forma el siguiente grupo; por eso la
+      espera es corta: con 64 productores de a un mensaje, 10 ms de espera dan ~5k msg/s y 2 ms
+      ~18k msg/s (`python -m benchmarks.bench_ingest`). Tramos de 500 superan 100k msg/s.
+    - INGEST_FSYNC: "none" (deja el volcado al SO), "commit" (fsync en cada commit, default) o
+      "interval" (como mucho un fsync cada INGEST_FSYNC_INTERVAL_S; un corte pierde ese intervalo).
+    - INGEST_QUEUE_MAX acota los envíos pendientes; si se llena, `submit` falla con IngestOverloaded.
+Las líneas se escriben completas en una sola llamada, así MessageIndexer (que solo lee líneas
+terminadas en \\n) nunca ve registros a medias.
+"""
+from __future__ import annotations  # Tipos adelantados.
+import os, json, time, queue, asyncio, threading  # Archivos, cola, hilo y puente con asyncio.
+from concurrent.futures import Future  # Confirmación entregada a cada envío.
+from typing import Any, Dict, IO, List, Optional, Sequence, Tuple  # Tipos.
+
+INGEST_FLUSH_RECORDS = int(os.getenv("INGEST_FLUSH_RECORDS", "1000"))  # Registros por commit como máximo.
+INGEST_FLUSH_MS = float(os.getenv("INGEST_FLUSH_MS", "2"))  # Espera máxima para juntar un commit (0 = lo ya encolado).
+INGEST_FSYNC = os.getenv("INGEST_FSYNC", "commit")  # none | commit | interval
+INGEST_FSYNC_INTERVAL_S = float(os.getenv("INGEST_FSYNC_INTERVAL_S", "1"))  # Solo con INGEST_FSYNC=interval.
+INGEST_QUEUE_MAX = int(os.getenv("INGEST_QUEUE_MAX", "10000"))  # Envíos pendientes antes de rechazar.
+
+FSYNC_POLICIES = ("none", "commit", "interval")
+
+class IngestOverloaded(Exception):  # Cola llena: el endpoint responde 503 y el cliente reintenta.
+    pass
+
+_STOP = object()  # Centinela para apagar el escritor.
+
+Item = Tuple[Sequence[Dict[str, Any]], Future]
+
+class GroupCommitWriter:
+    def __init__(self, directory: str, flush_records: int = INGEST_FLUSH_RECORDS, flush_ms: float = INGEST_FLUSH_MS,
+                 fsync: str = INGEST_FSYNC, fsync_interval_s: float = INGEST_FSYNC_INTERVAL_S,
+                 queue_max: int = INGEST_QUEUE_MAX):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"INGEST_FSYNC inválido: {fsync!r} (opciones: {', '.join(FSYNC_POLICIES)})")
+        self.directory = directory
+        self.flush_records = max(1, flush_records)
+        self.flush_wait = max(0.0, flush_ms) / 1000.0
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval_s
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(0, queue_max))
+        self._files: Dict[str, IO[bytes]] = {}  # plataforma -> archivo abierto en modo append (solo el hilo escritor).
+        self._dirty: Dict[str, IO[bytes]] = {}  # Archivos escritos desde el último fsync.
+        self._lock = threading.Lock()
+        self._last_fsync = time.monotonic()
+        self.records = 0
+        self.commits = 0
+        self.fsyncs = 0
+        self.bytes = 0
+        self.rejected = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.max_commit_seen = 0
+        self.commit_seconds = 0.0
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+        self._thread.start()
+
+    # ------------------------- API pública -------------------------
+    def submit(self, records: Sequence[Dict[str, Any]]) -> "Future[int]":
+        """Encola registros (con clave "platform"); el Future devuelve cuántos quedaron escritos."""
+        fut: "Future[int]" = Future()
+        if not records:
+            fut.set_result(0)
+            return fut
+        try:
+            self._queue.put_nowait((records, fut))
+        except queue.Full:
+            with self._lock:
+                self.rejected += len(records)
+            raise IngestOverloaded("cola de ingesta llena")
+        return fut
+
+    def write(self, records: Sequence[Dict[str, Any]], timeout: Optional[float] = None) -> int:  # Para código síncrono.
+        return self.submit(records).result(timeout)
+
+    async def write_async(self, records: Sequence[Dict[str, Any]]) -> int:  # Para endpoints async.
+        return await asyncio.wrap_future(self.submit(records))
+
+    def close(self) -> None:  # Escribe lo pendiente, hace fsync y cierra archivos.
+        self._queue.put(_STOP)
+        self._thread.join(timeout=10)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "records": self.records,
+                "commits": self.commits,
+                "avg_commit": round(self.records / self.commits, 2) if self.commits else 0.0,
+                "max_commit_seen": self.max_commit_seen,
+                "fsyncs": self.fsyncs,
+                "bytes": self.bytes,
+                "rejected": self.rejected,
+                "errors": self.errors,
+                "last_error": self.last_error,
+                "commit_seconds": round(self.commit_seconds, 3),
+                "fsync_policy": self.fsync,
+                "flush_records": self.flush_records,
+                "flush_ms": self.flush_wait * 1000,
+            }
+
+    # ------------------------- Escritor -------------------------
+    def _collect(self, first: Item) -> Tuple[List[Item], bool]:
+        group, n = [first], len(first[0])
+        deadline = time.monotonic() + self.flush_wait
+        while n < self.flush_records:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return group, True
+            group.append(item)
+            n += len(item[0])
+        return group, False
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            group, stop = self._collect(first)
+            self._commit(group)
+            if stop:
+                break
+        self._close_files()
+
+    def _file(self, platform: str) -> IO[bytes]:
+        f = self._files.get(platform)
+        if f is None:
+            f = self._files[platform] = open(os.path.join(self.directory, f"{platform}.jsonl"), "ab")
+        return f
+
+    def _commit(self, group: Sequence[Item]) -> None:
+        t0 = time.perf_counter()
+        waiting = [(len(records), fut) for records, fut in group
+                   if fut.set_running_or_notify_cancel()]  # Cliente desconectado: se escribe igual, sin avisar.
+        chunks: Dict[str, List[str]] = {}
+        for records, _ in group:
+            for r in records:
+                chunks.setdefault(r["platform"], []).append(json.dumps(r, ensure_ascii=False) + "\n")
+        n = sum(len(lines) for lines in chunks.values())
+        written = 0
+        try:
+            for platform, lines in chunks.items():
+                data = "".join(lines).encode("utf-8")
+                f = self._file(platform)
+                f.write(data)
+                f.flush()
+                self._dirty[platform] = f
+                written += len(data)
+            synced = self._maybe_fsync()
+        except Exception as e:  # Disco lleno, permisos...: el grupo entero falla y los clientes reintentan.
+            for f in self._files.values():  # Reabrir en el próximo commit por si el archivo quedó inválido.
+                try:
+                    f.close()
+                except OSError:
+                    pass
+            self._files.clear()
+            self._dirty.clear()
+            with self._lock:
+                self.errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+            for _, fut in waiting:
+                fut.set_exception(e)
+            return
+        with self._lock:
+            self.records += n
+            self.commits += 1
+            self.fsyncs += synced
+            self.bytes += written
+            self.max_commit_seen = max(self.max_commit_seen, n)
+            self.commit_seconds += time.perf_counter() - t0
+        for n_records, fut in waiting:
+            fut.set_result(n_records)
+
+    def _maybe_fsync(self) -> int:
+        if self.fsync == "none":
+            self._dirty.clear()
+            return 0
+        if self.fsync == "interval" and time.monotonic() - self._last_fsync < self.fsync_interval:
+            return 0  # Se sincronizan en el próximo commit que caiga fuera del intervalo (o al cerrar).
+        for f in self._dirty.values():
+            os.fsync(f.fileno())
+        synced = len(self._dirty)
+        self._dirty.clear()
+        self._last_fsync = time.monotonic()
+        return synced
+
+    def _close_files(self) -> None:
+        for f in self._files.values():
+            try:
+                f.flush()
+                if self.fsync != "none":
+                    os.fsync(f.fileno())
+                f.close()
+            except OSError:
+                pass
+        self._files.clear()
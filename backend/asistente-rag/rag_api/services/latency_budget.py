@@ -0,0 +1,61 @@
+"""Presupuesto de latencia por petición para las etapas previas al LLM.
+
+/ask lanza a la vez la recuperación local (embedding + top-k) y la búsqueda web. Cada etapa se
+espera como mucho hasta su plazo, medido desde el inicio de la petición:
+    - RAG_BUDGET_MS: tope global para tener el contexto listo (ambas etapas).
+    - WEB_SEARCH_DEADLINE_MS: plazo propio de la búsqueda web; si no llegó, se descarta y el
+      prompt se arma solo con lo que terminó a tiempo.
+Así un DuckDuckGo lento nunca suma más de WEB_SEARCH_DEADLINE_MS a la respuesta.
+"""
+from __future__ import annotations  # Tipos adelantados.
+import os, time, asyncio, threading  # Config, reloj y espera con plazo.
+from typing import Any, Dict, Optional, Tuple  # Tipos.
+
+RAG_BUDGET_MS = float(os.getenv("RAG_BUDGET_MS", "2000"))  # Tope para reunir contexto local + web.
+WEB_SEARCH_DEADLINE_MS = float(os.getenv("WEB_SEARCH_DEADLINE_MS", "800"))  # Plazo de la búsqueda web.
+
+class BudgetStats:  # Contadores globales de etapas que llegaron o no a tiempo (para /admin/metrics).
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, stage: str, on_time: bool) -> None:
+        with self._lock:
+            c = self._counts.setdefault(stage, {"on_time": 0, "dropped": 0})
+            c["on_time" if on_time else "dropped"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "budget_ms": RAG_BUDGET_MS,
+                "web_deadline_ms": WEB_SEARCH_DEADLINE_MS,
+                **{stage: dict(c) for stage, c in self._counts.items()},
+            }
+
+stats = BudgetStats()
+
+class LatencyBudget:
+    def __init__(self, total_ms: float = RAG_BUDGET_MS):
+        self.t0 = time.monotonic()
+        self.total_ms = total_ms
+
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self.t0) * 1000
+
+    def remaining_s(self, deadline_ms: Optional[float] = None) -> float:
+        """Segundos que quedan hasta el plazo (el menor entre el global y `deadline_ms`)."""
+        limit = self.total_ms if deadline_ms is None else min(self.total_ms, deadline_ms)
+        return max(0.0, (limit - self.elapsed_ms()) / 1000)
+
+    async def wait(self, task: "asyncio.Future[Any]", stage: str, default: Any,
+                   deadline_ms: Optional[float] = None) -> Tuple[Any, bool]:
+        """Espera `task` hasta su plazo. Devuelve (resultado, a_tiempo); si no llegó, cancela y usa `default`."""
+        done, _ = await asyncio.wait({task}, timeout=self.remaining_s(deadline_ms))
+        if not done:
+            task.cancel()  # Un hilo de executor sigue hasta terminar, pero su resultado ya no se espera.
+            stats.record(stage, False)
+            return default, False
+        stats.record(stage, True)
+        if task.exception() is not None:  # La etapa falló: se trata como vacía.
+            return default, True
+        return task.result(), True
@@ -0,0 +1,464 @@
+"""Indexación incremental en segundo plano de los mensajes ingeridos (data_ingest/messages/*.jsonl).
+
+/ingest/messages solo agrega líneas a `<plataforma>.jsonl`. Este módulo las vuelve consultables
+en segundos, sin bloquear peticiones:
+    - MessageIndexer (hilo daemon) sigue cada archivo desde su offset en bytes, lee solo líneas
+      completas, agrupa hasta INGEST_INDEX_BATCH mensajes, calcula embeddings y los agrega a LiveIndex.
+    - LiveIndex es un índice denso solo-agregar: matriz float32 preasignada que crece por
+      duplicación. Los lectores toman (matriz, n) sin lock; una fila se publica después de
+      escribirse, así nunca ven vectores a medio copiar. Vive aparte del índice de documentos, así
+      que una recarga en caliente de éste no pierde los mensajes.
+    - Persistencia en INGEST_INDEX_DIR: `messages.f32` (filas float32 crudas, solo-agregar) y
+      `messages.jsonl` (metadatos, una línea por fila, con plataforma y offset final en el .jsonl
+      de origen). Se escriben vectores y luego metadatos; al arrancar se recortan filas sin
+      metadatos y el offset de cada plataforma sale de su último registro.
+    - Identidad del archivo: cada registro guarda además inodo, hash de la primera línea y una
+      generación por plataforma. Si el .jsonl se trunca o se rota (inodo o primera línea distintos,
+      o tamaño menor al offset), también entre reinicios, la generación sube y se lee desde 0. El id
+      del fragmento (`msg:<plataforma>:<generación>:<offset>`) la incluye, así no se repite.
+    - Casi-duplicados (services/near_dup.py): antes de calcular embeddings cada mensaje se compara
+      por SimHash con los ya indexados (y con los del mismo lote). Un reenvío no se indexa: suma 1 a
+      `repeats` del fragmento original y queda registrado en `repeats.jsonl` (fila, plataforma,
+      offset), de donde se reconstruyen los conteos al arrancar.
+    - Lag: bytes, mensajes y segundos pendientes por plataforma (para /admin/metrics).
+    - Varios workers: todos cargan el índice vivo, pero solo el que tiene el flock de
+      `indexer.lock` indexa y escribe; los demás agregan a su LiveIndex lo que aquél persiste
+      (follow_once) y toman el lock si queda libre. Las colas a medias se recortan al tomarlo.
+    - Privacidad: el remitente (en WhatsApp, un número de teléfono) no entra al texto indexado, que
+      se devuelve como fuente y se envía a Groq. Con INGEST_AUTHOR_SALT el fragmento guarda solo
+      `author_hash` (HMAC-SHA256 truncado) para agrupar por remitente sin exponerlo. Fragmentos
+      persistidos con el formato anterior (`[plataforma · autor · fecha]`) se limpian al arrancar.
+"""
+from __future__ import annotations  # Tipos adelantados.
+import os, re, hmac, json, glob, time, hashlib, threading  # Archivos, reloj, hash del remitente y el hilo indexador.
+from typing import Any, Callable, Dict, List, Optional, Tuple  # Tipos.
+import numpy as np  # Vectores.
+try:
+    import fcntl  # Lock entre workers (POSIX).
+except ImportError:  # Windows: sin lock, cada proceso indexa (un solo worker).
+    fcntl = None
+from vector_store.search_engine import normalize_rows, normalize_query, top_k  # Utilidades de búsqueda densa.
+from .near_dup import INGEST_DEDUP, NearDupIndex, simhash  # Reenvíos y avisos casi idénticos.
+
+INGEST_INDEXER = os.getenv("INGEST_INDEXER", "1") == "1"  # Activar el indexador de mensajes.
+INGEST_INDEX_BATCH = int(os.getenv("INGEST_INDEX_BATCH", "64"))  # Mensajes por lote de embeddings.
+INGEST_INDEX_POLL_S = float(os.getenv("INGEST_INDEX_POLL_S", "1.0"))  # Espera entre sondeos si no hay nada nuevo.
+INGEST_INDEX_DIR = os.getenv("INGEST_INDEX_DIR", "")  # Carpeta de persistencia ("" = fragments/live).
+INGEST_MIN_CHARS = int(os.getenv("INGEST_MIN_CHARS", "8"))  # Mensajes más cortos ("ok", "👍") no se indexan.
+INGEST_AUTHOR_SALT = os.getenv("INGEST_AUTHOR_SALT", "")  # Sal del hash del remitente ("" = no se guarda nada del remitente).
+
+VECTORS_FILE = "messages.f32"
+META_FILE = "messages.jsonl"
+REPEATS_FILE = "repeats.jsonl"
+LOCK_FILE = "indexer.lock"
+MESSAGE_ID_PREFIX = "msg:"  # Ids de fragmentos de mensajes (no son del índice de documentos).
+_LAG_SCAN_BYTES = 4 << 20  # Más allá de esto, mensajes pendientes se estiman por tamaño medio de línea.
+_LEGACY_AUTHOR = re.compile(r"^\[([^·\]]+) · .*? · (\d{4}-\d{2}-\d{2} \d{2}:\d{2})\] ")  # Prefijo anterior con remitente.
+
+def author_hash(author: Optional[str], salt: Optional[str] = None) -> Optional[str]:
+    salt = INGEST_AUTHOR_SALT if salt is None else salt
+    if not author or not salt:
+        return None
+    return hmac.new(salt.encode("utf-8"), author.encode("utf-8"), hashlib.sha256).hexdigest()[:16]
+
+def _scrub_author(frag: Dict[str, Any]) -> bool:  # Quita el remitente de un fragmento persistido con el formato anterior.
+    texto = frag.get("texto") or ""
+    clean = _LEGACY_AUTHOR.sub(r"[\1 · \2] ", texto, count=1)
+    frag["texto"] = clean
+    return clean != texto
+
+class LiveIndex:
+    def __init__(self, dim: int = 384, capacity: int = 1024):
+        self.dim = dim
+        self._mat = np.zeros((capacity, dim), dtype=np.float32)
+        self._frags: List[Dict[str, Any]] = []
+        self._n = 0
+        self._lock = threading.Lock()  # Solo entre escritores.
+
+    def __len__(self) -> int:
+        return self._n
+
+    def add(self, fragments: List[Dict[str, Any]], vectors: Any) -> None:
+        if not fragments:
+            return
+        rows = normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(len(fragments), self.dim))
+        with self._lock:
+            n = self._n
+            if n + len(rows) > self._mat.shape[0]:  # Crecer: copia a una matriz nueva y cambio de referencia.
+                cap = max(self._mat.shape[0] * 2, n + len(rows))
+                grown = np.zeros((cap, self.dim), dtype=np.float32)
+                grown[:n] = self._mat[:n]
+                self._mat = grown
+            self._mat[n:n + len(rows)] = rows
+            self._frags.extend(fragments)
+            self._n = n + len(rows)  # Publicación: a partir de aquí los lectores ven las filas nuevas.
+
+    def fragment(self, row: int) -> Dict[str, Any]:
+        return self._frags[row]
+
+    def search(self, query_vec: Any, k: int, min_score: float = -1.0) -> List[Tuple[Dict[str, Any], float]]:
+        n = self._n  # Primero n y después la matriz: una matriz recién crecida ya contiene las n filas.
+        mat, frags = self._mat, self._frags
+        if n == 0:
+            return []
+        q = normalize_query(query_vec)
+        if not np.any(q):
+            return []
+        scores = mat[:n] @ q
+        return [(frags[i], float(scores[i])) for i in top_k(scores, k) if scores[i] >= min_score]
+
+class MessageIndexer:
+    def __init__(self, messages_dir: str, store_dir: str, encode_batch: Callable[[List[str]], Any],
+                 live: LiveIndex, batch_size: int = INGEST_INDEX_BATCH, poll_s: float = INGEST_INDEX_POLL_S,
+                 min_chars: int = INGEST_MIN_CHARS, dedup: bool = INGEST_DEDUP):
+        self.messages_dir = messages_dir
+        self.store_dir = store_dir
+        self._encode = encode_batch
+        self.live = live
+        self.batch_size = max(1, batch_size)
+        self.poll_s = poll_s
+        self.min_chars = min_chars
+        self.near_dup: Optional[NearDupIndex] = NearDupIndex() if dedup else None
+        self.offsets: Dict[str, int] = {}  # plataforma -> bytes ya indexados del .jsonl.
+        self.files: Dict[str, Dict[str, Any]] = {}  # plataforma -> identidad del .jsonl leído (ino, head, gen).
+        self.pending: Dict[str, Dict[str, Any]] = {}  # plataforma -> lag del último sondeo.
+        self.indexed = 0
+        self.skipped = 0
+        self.duplicates = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.last_batch_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.leader = False  # Solo el dueño del lock escribe (ver acquire).
+        self._lock_file: Optional[Any] = None
+        self._meta_pos = 0  # Bytes de messages.jsonl ya cargados.
+        self._repeats_pos = 0  # Bytes de repeats.jsonl ya cargados.
+        os.makedirs(store_dir, exist_ok=True)
+        self.follow_once()  # Carga lo persistido sin escribir: otro worker puede estar indexando.
+
+    # ------------------------- Persistencia -------------------------
+    def _paths(self) -> Tuple[str, str]:
+        return os.path.join(self.store_dir, VECTORS_FILE), os.path.join(self.store_dir, META_FILE)
+
+    @staticmethod
+    def _tail_log(path: str, pos: int) -> List[Tuple[Dict[str, Any], int]]:
+        """Registros completos desde el byte `pos` -> [(registro, byte final)] (la última línea puede estar a medias)."""
+        out: List[Tuple[Dict[str, Any], int]] = []
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                f.seek(pos)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Última línea incompleta (o el indexador la está escribiendo).
+                    pos += len(line)
+                    out.append((json.loads(line), pos))
+        return out
+
+    @staticmethod
+    def _append_log(path: str, records: List[Dict[str, Any]]) -> int:  # Devuelve el tamaño final del archivo.
+        with open(path, "ab") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+    def follow_once(self) -> int:
+        """Agrega al LiveIndex las filas persistidas que aún no tiene (y sus repetidos); no escribe nada.
+
+        Es la carga inicial y lo que hacen los workers sin el lock mientras otro proceso indexa.
+        Una fila cuenta si tiene vector y metadatos; un repetido, si su fila ya se cargó.
+        """
+        vec_path, meta_path = self._paths()
+        row_bytes = 4 * self.live.dim
+        base = len(self.live)
+        n_vecs = os.path.getsize(vec_path) // row_bytes if os.path.exists(vec_path) else 0
+        metas = self._tail_log(meta_path, self._meta_pos)[:max(0, n_vecs - base)]
+        if metas:
+            vecs = np.fromfile(vec_path, dtype=np.float32, count=len(metas) * self.live.dim, offset=base * row_bytes)
+            frags = [m["fragment"] for m, _ in metas]
+            for frag in frags:
+                _scrub_author(frag)  # Formato anterior: el texto en disco se deja, el que se sirve va limpio.
+            self.live.add(frags, vecs.reshape(len(metas), self.live.dim))
+            for j, (m, _) in enumerate(metas):
+                self._restore_position(m)
+                if self.near_dup is not None and m.get("simhash"):
+                    self.near_dup.add(base + j, m["simhash"])
+            self._meta_pos = metas[-1][1]
+            self.indexed += len(metas)
+        repeats: List[Dict[str, Any]] = []
+        for r, pos in self._tail_log(os.path.join(self.store_dir, REPEATS_FILE), self._repeats_pos):
+            if r["row"] >= len(self.live):  # Su fila todavía no se ve: se retoma en el próximo sondeo.
+                break
+            repeats.append(r)
+            self._repeats_pos = pos
+        self._count_repeats(repeats)
+        for r in repeats:
+            self._restore_position(r)
+        return len(metas) + len(repeats)
+
+    def _repair(self) -> None:  # Recorta lo que un indexador anterior dejó a medias (solo el dueño del lock).
+        vec_path, meta_path = self._paths()
+        for path, size in ((vec_path, len(self.live) * 4 * self.live.dim), (meta_path, self._meta_pos),
+                           (os.path.join(self.store_dir, REPEATS_FILE), self._repeats_pos)):
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def _take_over(self) -> None:  # Pasa a ser el indexador: se pone al día con disco y limpia colas a medias.
+        self.follow_once()
+        self._repair()
+        self.leader = True
+
+    def acquire(self) -> bool:
+        """Intenta ser el único indexador del store (flock en `indexer.lock`); True si lo es.
+
+        Con varios workers de uvicorn todos arrancan un MessageIndexer, pero solo el dueño del lock lee
+        los .jsonl, calcula embeddings y escribe; el resto sigue los archivos con follow_once. Si el
+        dueño muere el sistema libera el lock y otro worker lo toma en su siguiente sondeo.
+        """
+        if self.leader:
+            return True
+        if fcntl is not None:
+            f = open(os.path.join(self.store_dir, LOCK_FILE), "a+b")
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                return False
+            self._lock_file = f
+        self._take_over()
+        return True
+
+    def release(self) -> None:
+        self.leader = False
+        if self._lock_file is not None:
+            self._lock_file.close()  # Cerrar el descriptor libera el flock.
+            self._lock_file = None
+
+    def _restore_position(self, rec: Dict[str, Any]) -> None:  # Se queda con el registro de mayor (generación, offset).
+        platform, gen = rec["platform"], rec.get("gen", 0)  # Registros anteriores a la identidad: generación 0.
+        known = self.files.get(platform)
+        if known is None or gen > known["gen"] or (gen == known["gen"] and rec["end_offset"] >= self.offsets.get(platform, 0)):
+            self.files[platform] = {"ino": rec.get("ino"), "head": rec.get("head", ""), "gen": gen}
+            self.offsets[platform] = rec["end_offset"]
+
+    def _position(self, rec: Dict[str, Any], platform: str) -> Dict[str, Any]:  # Marca un registro con la identidad actual.
+        known = self.files[platform]
+        rec.update(gen=known["gen"], ino=known["ino"], head=known["head"])
+        return rec
+
+    def _persist(self, metas: List[Dict[str, Any]], vecs: np.ndarray) -> None:
+        vec_path, meta_path = self._paths()
+        with open(vec_path, "ab") as f:  # Primero vectores...
+            f.write(np.ascontiguousarray(vecs, dtype=np.float32).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self._meta_pos = self._append_log(meta_path, metas)  # ...luego metadatos (marcan la fila como válida).
+
+    def _count_repeats(self, repeats: List[Dict[str, Any]]) -> None:
+        for r in repeats:
+            frag = self.live.fragment(r["row"])
+            frag["repeats"] = frag.get("repeats", 1) + 1
+            frag["last_ts"] = max(frag.get("last_ts") or 0, r.get("ts") or 0)
+        self.duplicates += len(repeats)
+
+    # ------------------------- Lectura -------------------------
+    @staticmethod
+    def _identity(path: str) -> Tuple[int, str, int]:  # (inodo, hash de la primera línea completa o "", tamaño).
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            first = f.readline()
+        head = hashlib.sha1(first).hexdigest()[:16] if first.endswith(b"\n") else ""
+        return st.st_ino, head, st.st_size
+
+    def _check_file(self, path: str, platform: str) -> int:
+        """Offset desde el que leer; si el archivo ya no es el que se venía leyendo, nueva generación desde 0."""
+        ino, head, size = self._identity(path)
+        offset = self.offsets.get(platform, 0)
+        known = self.files.get(platform)
+        if known is None:
+            self.files[platform] = {"ino": ino, "head": head, "gen": 0}
+            return offset
+        rotated = (known["ino"] is not None and known["ino"] != ino) or (known["head"] and head and known["head"] != head)
+        if rotated or size < offset:  # Rotado o truncado (aunque haya vuelto a crecer): empezamos de nuevo.
+            self.files[platform] = {"ino": ino, "head": head, "gen": known["gen"] + 1}
+            self.offsets[platform] = 0
+            return 0
+        if known["ino"] is None:  # Registro anterior a la identidad: se adopta el archivo actual.
+            known["ino"] = ino
+        if not known["head"]:  # Primera línea recién completada.
+            known["head"] = head
+        return offset
+
+    def _read_new(self, path: str, platform: str) -> List[Tuple[Dict[str, Any], int]]:
+        """Registros completos desde el offset -> [(registro, offset_final)] (como mucho batch_size)."""
+        offset = self._check_file(path, platform)
+        out: List[Tuple[Dict[str, Any], int]] = []
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while len(out) < self.batch_size:
+                line = f.readline()
+                if not line.endswith(b"\n"):  # Fin de archivo o línea que aún se está escribiendo.
+                    break
+                offset += len(line)
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    self.skipped += 1
+                    rec = None
+                out.append((rec, offset))
+        return out
+
+    def _lag(self, path: str, platform: str, offset: int) -> Dict[str, Any]:
+        size = os.path.getsize(path)
+        behind, oldest_ts = 0, None
+        if size > offset:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                tail = f.read(min(size - offset, _LAG_SCAN_BYTES))
+            behind = tail.count(b"\n")
+            if size - offset > len(tail) and behind:  # Backlog grande: extrapolamos.
+                behind = int(behind * (size - offset) / len(tail))
+            first = tail.split(b"\n", 1)[0]
+            try:
+                ts = json.loads(first).get("ts")
+            except (ValueError, AttributeError, TypeError):  # JSON roto o línea que no es objeto.
+                ts = None
+            if isinstance(ts, (int, float)) and not isinstance(ts, bool):
+                oldest_ts = ts
+        return {
+            "offset": offset,
+            "size": size,
+            "bytes_behind": size - offset,
+            "messages_behind": behind,
+            "seconds_behind": round(max(0.0, time.time() - oldest_ts), 1) if behind and oldest_ts else 0.0,
+        }
+
+    @staticmethod
+    def _fragment(platform: str, rec: Dict[str, Any], end_offset: int, gen: int = 0) -> Dict[str, Any]:
+        ts = rec.get("ts") or time.time()
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(ts))
+        frag = {
+            "id": f"{MESSAGE_ID_PREFIX}{platform}:{gen}:{end_offset}",
+            "texto": f"[{platform} · {when}] {rec.get('text', '').strip()}",  # Sin remitente: este texto sale hacia Groq y el cliente.
+            "source": "messages",
+            "platform": platform,
+            "ts": ts,
+            "repeats": 1,  # Veces que llegó (el original + reenvíos casi idénticos).
+        }
+        h = author_hash(rec.get("author"))
+        if h:
+            frag["author_hash"] = h
+        return frag
+
+    def _split_duplicates(self, platform: str, batch: List[Tuple[Any, int]]) -> Tuple[list, list]:
+        """Separa el lote en (nuevos [(registro, offset, huella)], repetidos [registro de repeats.jsonl])."""
+        keep: List[Tuple[Dict[str, Any], int, int]] = []
+        repeats: List[Dict[str, Any]] = []
+        base = len(self.live)  # Fila que tendrá el primer mensaje nuevo del lote.
+        in_batch = NearDupIndex(self.near_dup.max_distance) if self.near_dup is not None else None
+        for rec, off in batch:
+            if not isinstance(rec, dict):
+                continue
+            text = (rec.get("text") or "").strip()
+            if len(text) < self.min_chars:
+                self.skipped += 1
+                continue
+            h, row = 0, None
+            if self.near_dup is not None:
+                h = simhash(text)
+                row = self.near_dup.find(h)
+                if row is None:
+                    j = in_batch.find(h)
+                    row = None if j is None else base + j
+            if row is not None:
+                repeats.append(self._position({"platform": platform, "end_offset": off, "row": row, "ts": rec.get("ts") or time.time()}, platform))
+                continue
+            if in_batch is not None:
+                in_batch.add(len(keep), h)
+            keep.append((rec, off, h))
+        return keep, repeats
+
+    def run_once(self) -> int:
+        """Procesa un lote por plataforma con datos nuevos; devuelve cuántos mensajes consumió (nuevos + repetidos)."""
+        if not self.leader:  # Llamada directa (sin start/acquire): este proceso se asume único indexador.
+            self._take_over()
+        total = 0
+        for path in sorted(glob.glob(os.path.join(self.messages_dir, "*.jsonl"))):
+            platform = os.path.splitext(os.path.basename(path))[0]
+            batch = self._read_new(path, platform)
+            if batch:
+                end = batch[-1][1]
+                keep, repeats = self._split_duplicates(platform, batch)
+                gen = self.files[platform]["gen"]
+                metas = [self._position({"platform": platform, "end_offset": off, "simhash": h,
+                                         "fragment": self._fragment(platform, r, off, gen)}, platform)
+                         for r, off, h in keep]
+                # El último registro escrito cubre también las líneas descartadas. Si un corte cae entre
+                # messages.jsonl y repeats.jsonl, los reenvíos del lote se releen: se pierde como mucho el
+                # conteo de los que estaban antes del último mensaje nuevo, nunca un mensaje.
+                (repeats or metas or [{}])[-1]["end_offset"] = end
+                if metas:
+                    vecs = np.asarray(self._encode([m["fragment"]["texto"] for m in metas]), dtype=np.float32)
+                    vecs = vecs.reshape(len(metas), self.live.dim)
+                    base = len(self.live)
+                    self._persist(metas, vecs)
+                    self.live.add([m["fragment"] for m in metas], vecs)
+                    if self.near_dup is not None:
+                        for j, m in enumerate(metas):
+                            self.near_dup.add(base + j, m["simhash"])
+                    self.indexed += len(metas)
+                    total += len(metas)
+                    self.last_batch_at = time.time()
+                if repeats:
+                    self._repeats_pos = self._append_log(os.path.join(self.store_dir, REPEATS_FILE), repeats)
+                    self._count_repeats(repeats)
+                    total += len(repeats)
+                self.offsets[platform] = end  # Sin registros (todo descartado) se re-leerán tras reiniciar: inocuo.
+            self.pending[platform] = self._lag(path, platform, self.offsets.get(platform, 0))
+        return total
+
+    # ------------------------- Hilo -------------------------
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.acquire():
+                    done = self.run_once()
+                else:  # Otro worker indexa: solo cargamos lo que persiste.
+                    self.follow_once()
+                    done = 0
+            except Exception as e:  # El indexador no debe morir por un archivo raro o un fallo del modelo.
+                self.errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                done = 0
+            if not done:
+                self._stop.wait(self.poll_s)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="message-indexer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        pending = dict(self.pending)
+        return {
+            "role": "indexer" if self.leader else "follower",
+            "indexed": self.indexed,
+            "live_size": len(self.live),
+            "skipped": self.skipped,
+            "duplicates": self.duplicates,
+            "dedup_hashes": len(self.near_dup) if self.near_dup is not None else None,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "last_batch_at": self.last_batch_at,
+            "messages_behind": sum(p["messages_behind"] for p in pending.values()),
+            "seconds_behind": max((p["seconds_behind"] for p in pending.values()), default=0.0),
+            "platforms": pending,
+        }
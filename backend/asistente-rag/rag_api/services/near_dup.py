@@ -0,0 +1,85 @@
+"""Detección de casi-duplicados (SimHash de 64 bits + buckets por bandas) para los mensajes ingeridos.
+
+Los grupos de WhatsApp/Telegram están llenos de reenvíos y avisos casi idénticos ("Se comunica a
+los estudiantes..." con otra hora o un emoji de más). Cada copia costaría un embedding y ocuparía
+varios puestos del top-k. Por eso, antes de calcular embeddings, MessageIndexer consulta aquí:
+    - `simhash(texto)`: huella de 64 bits sobre palabras y pares de palabras consecutivas (texto
+      plegado con el mismo criterio que BM25, sin links). Textos casi iguales difieren en pocos
+      bits: un saludo agregado o "alumnos" por "estudiantes" mueve ~4-6 bits en un aviso típico,
+      mientras que cambiar la fecha del aviso mueve más de 10 (es otro aviso y se indexa).
+    - `NearDupIndex`: la huella se parte en `max_distance + 1` bandas; por el principio del
+      palomar, dos huellas a distancia de Hamming <= max_distance coinciden en al menos una banda
+      completa. Cada banda es un dict valor -> filas, así que consultar cuesta (bandas x tope del
+      bucket) comparaciones sin importar cuántos mensajes haya: costo constante por mensaje.
+El índice vive en memoria y se reconstruye al arrancar desde las huellas guardadas en los
+metadatos de cada fila (messages.jsonl); no necesita archivo propio.
+"""
+from __future__ import annotations  # Tipos adelantados.
+import os, re, hashlib  # Config, tokens y hash de shingles.
+from typing import Dict, List, Optional  # Tipos.
+import numpy as np  # Suma de bits vectorizada.
+from vector_store.lexical import fold  # Minúsculas + plegado de tildes.
+
+INGEST_DEDUP = os.getenv("INGEST_DEDUP", "1") == "1"  # Colapsar casi-duplicados antes de indexar.
+INGEST_DEDUP_DISTANCE = int(os.getenv("INGEST_DEDUP_DISTANCE", "6"))  # Bits distintos tolerados (de 64).
+INGEST_DEDUP_BUCKET = int(os.getenv("INGEST_DEDUP_BUCKET", "64"))  # Filas recordadas por bucket (acota el costo).
+
+BITS = 64
+_WORD = re.compile(r"[a-z0-9]+")
+_URL = re.compile(r"https?://\S+")
+_BIT_WEIGHTS = np.left_shift(np.uint64(1), np.arange(BITS, dtype=np.uint64))
+
+def simhash(text: str) -> int:
+    """Huella de 64 bits; textos sin palabras devuelven 0."""
+    words = _WORD.findall(fold(_URL.sub(" ", text or "")))  # Los links acortados cambian en cada reenvío.
+    if not words:
+        return 0
+    shingles = words + [f"{a} {b}" for a, b in zip(words, words[1:])]  # Unigramas + bigramas (orden local).
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles],
+        dtype=np.uint64,
+    )
+    bits = (hashes[:, None] >> np.arange(BITS, dtype=np.uint64)) & np.uint64(1)  # (shingles, 64)
+    votes = bits.sum(axis=0) * 2 > len(shingles)  # Mayoría por bit.
+    return int(_BIT_WEIGHTS[votes].sum())
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+class NearDupIndex:
+    def __init__(self, max_distance: int = INGEST_DEDUP_DISTANCE, bucket_cap: int = INGEST_DEDUP_BUCKET):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self._width = BITS // self.bands
+        self._mask = (1 << self._width) - 1
+        self.bucket_cap = max(1, bucket_cap)
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(self.bands)]
+        self._hashes: Dict[int, int] = {}  # fila -> huella.
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def _keys(self, h: int) -> List[int]:
+        return [(h >> (i * self._width)) & self._mask for i in range(self.bands)]
+
+    def find(self, h: int) -> Optional[int]:
+        """Fila de un mensaje casi idéntico ya indexado (la más cercana) o None."""
+        if not h:
+            return None
+        best, best_d = None, self.max_distance + 1
+        for band, key in zip(self._buckets, self._keys(h)):
+            for row in band.get(key, ()):
+                d = hamming(h, self._hashes[row])
+                if d < best_d:
+                    best, best_d = row, d
+        return best
+
+    def add(self, row: int, h: int) -> None:
+        if not h:
+            return
+        self._hashes[row] = h
+        for band, key in zip(self._buckets, self._keys(h)):
+            rows = band.setdefault(key, [])
+            rows.append(row)
+            if len(rows) > self.bucket_cap:  # Bucket saturado (p.ej. plantillas muy repetidas): olvida el más viejo.
+                rows.pop(0)
@@ -0,0 +1,162 @@
+"""Cache del contexto web (líneas de DuckDuckGo) por pregunta normalizada.
+
+Dos niveles:
+    1. LRU en memoria por worker (WEB_CACHE_SIZE entradas).
+    2. Tabla SQLite en WAL (WEB_CACHE_DB) compartida por todos los workers de uvicorn y que
+       sobrevive reinicios.
+Cada entrada guarda cuándo se obtuvo. Según su edad:
+    - edad < WEB_CACHE_TTL                 -> fresca: se usa tal cual.
+    - TTL <= edad < TTL + WEB_CACHE_STALE  -> vencida pero servible: se devuelve al instante y se
+                                              revalida en segundo plano (stale-while-revalidate).
+    - más vieja                            -> se ignora y se vuelve a buscar.
+Los fallos de DDGS (timeout, rate limit) nunca sobrescriben una entrada buena.
+"""
+from __future__ import annotations  # Tipos adelantados.
+import os, time, sqlite3, hashlib, threading  # Persistencia, edad de entradas y sincronización.
+from collections import OrderedDict  # LRU simple.
+from typing import Any, Dict, Optional, Tuple  # Tipos.
+from .embedding_cache import normalize_text  # Misma normalización que el cache de embeddings.
+
+_DEFAULT_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "fragments", "web_cache.sqlite3")
+WEB_CACHE_SIZE = int(os.getenv("WEB_CACHE_SIZE", "2048"))  # Entradas en memoria (0 = sin nivel memoria).
+WEB_CACHE_TTL = float(os.getenv("WEB_CACHE_TTL", "86400"))  # Segundos que una entrada se considera fresca (24 h).
+WEB_CACHE_STALE = float(os.getenv("WEB_CACHE_STALE", "604800"))  # Ventana extra servible mientras se revalida (7 días).
+WEB_CACHE_DB = os.getenv("WEB_CACHE_DB", _DEFAULT_DB)  # Ruta SQLite ("" = solo memoria).
+WEB_CACHE_DB_MAX = int(os.getenv("WEB_CACHE_DB_MAX", "50000"))  # Tope de filas en disco.
+
+FRESH, STALE = "fresh", "stale"
+
+class WebContextCache:
+    def __init__(self, max_entries: int = WEB_CACHE_SIZE, ttl: float = WEB_CACHE_TTL, stale: float = WEB_CACHE_STALE,
+                 db_path: Optional[str] = WEB_CACHE_DB or None, db_max_rows: int = WEB_CACHE_DB_MAX):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale = stale
+        self.db_max_rows = db_max_rows
+        self._mem: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()  # clave -> (web_context, fetched_at)
+        self._lock = threading.Lock()
+        self._inflight: set = set()  # Claves con revalidación en curso (una sola por clave).
+        self.hits = self.stale_hits = self.disk_hits = self.misses = self.fetch_errors = self.refreshes = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_inserts = 0
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5)  # Acceso serializado con self._lock.
+            self._db.execute("PRAGMA journal_mode=WAL")  # Lectores de otros workers no se bloquean con el escritor.
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS web_context (key TEXT PRIMARY KEY, context TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def key(question: str) -> str:
+        return hashlib.sha1(normalize_text(question).encode("utf-8")).hexdigest()
+
+    def _state(self, fetched_at: float, now: float) -> Optional[str]:
+        age = now - fetched_at
+        if age < self.ttl:
+            return FRESH
+        if age < self.ttl + self.stale:
+            return STALE
+        return None
+
+    def _remember(self, key: str, context: str, fetched_at: float) -> None:  # Llamar con lock tomado.
+        if self.max_entries <= 0:
+            return
+        self._mem[key] = (context, fetched_at)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def peek(self, question: str) -> Optional[Tuple[str, str]]:
+        """Solo memoria (apto para el event loop): (web_context, FRESH|STALE) o None."""
+        key = self.key(question)
+        with self._lock:
+            item = self._mem.get(key)
+            if item is None:
+                return None
+            state = self._state(item[1], time.time())
+            if state is None:
+                del self._mem[key]
+                return None
+            self._mem.move_to_end(key)
+            if state == FRESH:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return item[0], state
+
+    def get(self, question: str) -> Optional[Tuple[str, str]]:  # Memoria y luego SQLite (desde un hilo).
+        hit = self.peek(question)
+        if hit is not None and (hit[1] == FRESH or self._db is None):
+            return hit
+        row = self._read_db(self.key(question))  # En memoria vencida: quizá otro worker ya la refrescó.
+        if row is None:
+            return hit
+        state = self._state(row[1], time.time())
+        if state is None:
+            return hit
+        with self._lock:
+            self._remember(self.key(question), row[0], row[1])
+            if hit is None:
+                self.disk_hits += 1
+        return row[0], state
+
+    def _read_db(self, key: str) -> Optional[Tuple[str, float]]:
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT context, fetched_at FROM web_context WHERE key = ?", (key,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put(self, question: str, context: str, fetched_at: Optional[float] = None) -> None:
+        key = self.key(question)
+        ts = time.time() if fetched_at is None else fetched_at
+        with self._lock:
+            self._remember(key, context, ts)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO web_context (key, context, fetched_at) VALUES (?,?,?)",
+                                 (key, context, ts))
+                self._db_inserts += 1
+                if self._db_inserts % 500 == 0:  # Poda ocasional de las entradas más viejas.
+                    self._db.execute(
+                        "DELETE FROM web_context WHERE key IN (SELECT key FROM web_context ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)",
+                        (self.db_max_rows,),
+                    )
+                self._db.commit()
+
+    def claim_refresh(self, question: str) -> bool:  # True si este llamador debe revalidar (single-flight).
+        key = self.key(question)
+        with self._lock:
+            if key in self._inflight:
+                return False
+            self._inflight.add(key)
+            return True
+
+    def release_refresh(self, question: str) -> None:
+        with self._lock:
+            self._inflight.discard(self.key(question))
+
+    def note(self, miss: bool = False, error: bool = False, refresh: bool = False) -> None:
+        with self._lock:
+            self.misses += miss
+            self.fetch_errors += error
+            self.refreshes += refresh
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.stale_hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._mem),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl,
+                "stale_s": self.stale,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "fetch_errors": self.fetch_errors,
+                "hit_rate": round((self.hits + self.stale_hits + self.disk_hits) / total, 4) if total else 0.0,
+                "persistent": self._db is not None,
+            }
@@ -0,0 +1,81 @@
+"""Búsqueda web complementaria (DuckDuckGo) para el prompt de /ask.
+
+DDGS es bloqueante: corre en un executor propio de WEB_SEARCH_WORKERS hilos para que una
+búsqueda colgada no ocupe el threadpool compartido de Starlette. El timeout HTTP de DDGS se
+acota a WEB_SEARCH_TIMEOUT_S para que un hilo descartado por el presupuesto termine pronto.
+
+Los resultados pasan por WebContextCache (web_cache.py): un acierto en memoria se resuelve sin
+tocar el executor; una entrada vencida se sirve al instante y se revalida en segundo plano.
+"""
+from __future__ import annotations  # Tipos adelantados.
+import os, asyncio  # Config y puente con el event loop.
+from concurrent.futures import ThreadPoolExecutor  # Hilos dedicados a DDGS.
+from typing import Optional  # Tipos.
+from duckduckgo_search import DDGS  # Búsqueda web ligera contextual.
+from .web_cache import WebContextCache, STALE  # Cache memoria + SQLite con stale-while-revalidate.
+
+WEB_SEARCH_WORKERS = int(os.getenv("WEB_SEARCH_WORKERS", "4"))  # Búsquedas simultáneas como máximo.
+WEB_SEARCH_TIMEOUT_S = int(os.getenv("WEB_SEARCH_TIMEOUT_S", "3"))  # Timeout HTTP de cada búsqueda.
+WEB_SEARCH_RESULTS = 3  # Resultados por búsqueda.
+
+_pool = ThreadPoolExecutor(max_workers=max(1, WEB_SEARCH_WORKERS), thread_name_prefix="ddg")
+cache = WebContextCache()
+
+def fetch(question: str) -> Optional[str]:  # Búsqueda bloqueante -> líneas "- título: resumen (url)"; None si DDGS falla.
+    try:
+        with DDGS(timeout=WEB_SEARCH_TIMEOUT_S) as ddgs:
+            lines = []
+            for h in ddgs.text(question, max_results=WEB_SEARCH_RESULTS) or []:
+                title = (h.get('title') or '')[:80]
+                body = (h.get('body') or '')[:160]
+                url = h.get('href') or ''
+                lines.append(f"- {title}: {body} ({url})")
+            return "\n".join(lines)
+    except Exception:  # Timeout, rate limit, red: distinto de "sin resultados" para no cachearlo.
+        return None
+
+def _revalidate(question: str) -> None:  # Refresco en segundo plano (una sola vez por pregunta a la vez).
+    if not cache.claim_refresh(question):
+        return
+    def job() -> None:
+        try:
+            hit = cache.get(question)  # Otro worker pudo haberla refrescado ya en SQLite.
+            if hit is not None and hit[1] != STALE:
+                return
+            fresh = fetch(question)
+            if fresh is None:
+                cache.note(error=True)  # Seguimos sirviendo la vencida.
+            else:
+                cache.put(question, fresh)
+                cache.note(refresh=True)
+        finally:
+            cache.release_refresh(question)
+    _pool.submit(job)
+
+def search(question: str) -> str:  # Con cache (bloqueante: memoria, SQLite y luego DDGS); "" si no hay nada.
+    hit = cache.get(question)
+    if hit is not None:
+        if hit[1] == STALE:
+            _revalidate(question)
+        return hit[0]
+    cache.note(miss=True)
+    result = fetch(question)
+    if result is None:
+        cache.note(error=True)
+        return ""
+    cache.put(question, result)
+    return result
+
+def search_async(question: str) -> "asyncio.Future[str]":  # Lanza la búsqueda ya (o resuelve desde memoria).
+    loop = asyncio.get_running_loop()
+    hit = cache.peek(question)
+    if hit is not None:  # Acierto en memoria: sin pasar por el executor (que puede estar ocupado con DDGS lentos).
+        if hit[1] == STALE:
+            _revalidate(question)
+        fut = loop.create_future()
+        fut.set_result(hit[0])
+        return fut
+    return loop.run_in_executor(_pool, search, question)
+
+def shutdown() -> None:
+    _pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,212 @@
+"""Procesamiento en segundo plano del webhook de WhatsApp Cloud API.
+
+Antes el webhook leía solo `entry[0].changes[0]`, procesaba los mensajes dentro de la petición y
+se tragaba cualquier error. Meta espera un 200 rápido y reintenta (varias veces, con el mismo
+payload) si no llega. Ahora:
+    - `enqueue(payload)` deja el JSON crudo en una cola asyncio acotada y el endpoint responde al
+      instante. Si la cola está llena se cuenta como `dropped` y el endpoint responde 503, así
+      Meta reintenta más tarde en vez de perder el mensaje.
+    - WHATSAPP_WORKERS tareas toman payloads (varios a la vez si hay cola), recorren TODOS los
+      `entry[*].changes[*].value.messages[*]`, descartan ids ya vistos (conjunto acotado con
+      orden de llegada: absorbe los reintentos de Meta) y entregan los mensajes de texto al
+      escritor de ingesta en un solo envío por tanda.
+    - Un payload con forma inesperada o un error de escritura se cuenta (errors/last_error) y el
+      trabajador sigue; nada se silencia sin dejar rastro en /admin/metrics.
+"""
+from __future__ import annotations  # Tipos adelantados.
+import os, time, asyncio  # Config, timestamps y tareas.
+from collections import OrderedDict  # Conjunto de ids vistos con desalojo FIFO.
+from typing import Any, Dict, List, Optional, Tuple  # Tipos.
+from .ingest_writer import GroupCommitWriter, IngestOverloaded  # Destino de los mensajes.
+
+WHATSAPP_QUEUE_MAX = int(os.getenv("WHATSAPP_QUEUE_MAX", "1000"))  # Payloads pendientes antes de responder 503.
+WHATSAPP_WORKERS = int(os.getenv("WHATSAPP_WORKERS", "2"))  # Tareas que procesan la cola.
+WHATSAPP_SEEN_MAX = int(os.getenv("WHATSAPP_SEEN_MAX", "50000"))  # Ids de mensaje recordados para deduplicar.
+WHATSAPP_DRAIN_MAX = 64  # Payloads que un trabajador junta en una tanda.
+_WRITE_RETRIES = 3  # Reintentos si el escritor está saturado (con espera creciente).
+
+def extract_messages(payload: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], int]:
+    """Mensajes de texto de todas las entradas/cambios -> ([{"id", "record"}], elementos con forma inválida)."""
+    out: List[Dict[str, Any]] = []
+    malformed = 0
+    entries = payload.get("entry") or []
+    if not isinstance(entries, list):
+        return out, 1
+    for entry in entries:
+        changes = entry.get("changes") if isinstance(entry, dict) else None
+        if not isinstance(changes, list):
+            malformed += 1
+            continue
+        for change in changes:
+            value = change.get("value") if isinstance(change, dict) else None
+            if not isinstance(value, dict):
+                malformed += 1
+                continue
+            names: Dict[Any, Any] = {}
+            contacts = value.get("contacts") or []
+            for c in contacts if isinstance(contacts, list) else []:
+                if isinstance(c, dict) and isinstance(c.get("profile"), dict):
+                    names[c.get("wa_id")] = c["profile"].get("name")
+            metadata = value.get("metadata")
+            phone_id = metadata.get("phone_number_id") if isinstance(metadata, dict) else None
+            messages = value.get("messages") or []
+            if not isinstance(messages, list):
+                malformed += 1
+                continue
+            for m in messages:
+                if not isinstance(m, dict):
+                    malformed += 1
+                    continue
+                if m.get("type") != "text":  # Solo texto simple (como antes).
+                    continue
+                body = m.get("text")
+                text = body.get("body") if isinstance(body, dict) else None
+                if not text or not isinstance(text, str):
+                    malformed += 1
+                    continue
+                try:
+                    ts = float(m.get("timestamp"))
+                except (TypeError, ValueError):
+                    ts = time.time()
+                mid = m.get("id") if isinstance(m.get("id"), str) else None
+                out.append({
+                    "id": mid,
+                    "record": {
+                        "platform": "whatsapp",
+                        "text": text,
+                        "author": m.get("from"),
+                        "ts": ts,
+                        "meta": {"wa_message_id": mid, "phone_number_id": phone_id, "name": names.get(m.get("from"))},
+                    },
+                })
+    return out, malformed
+
+class WhatsAppQueue:
+    def __init__(self, writer: GroupCommitWriter, queue_max: int = WHATSAPP_QUEUE_MAX,
+                 workers: int = WHATSAPP_WORKERS, seen_max: int = WHATSAPP_SEEN_MAX):
+        self.writer = writer
+        self.queue_max = max(1, queue_max)
+        self.n_workers = max(1, workers)
+        self.seen_max = max(1, seen_max)
+        self._queue: Optional[asyncio.Queue] = None  # Se crea dentro del event loop (enqueue/start).
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._tasks: List[asyncio.Task] = []
+        self.received = 0
+        self.dropped = 0
+        self.payloads = 0
+        self.messages = 0
+        self.duplicates = 0
+        self.malformed = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    def _q(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_max)
+        return self._queue
+
+    # ------------------------- API pública -------------------------
+    def enqueue(self, payload: Dict[str, Any]) -> bool:
+        """Encola sin esperar; False si la cola está llena (el endpoint responde 503)."""
+        self.received += 1
+        try:
+            self._q().put_nowait(payload)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        return True
+
+    def start(self) -> None:  # Llamar desde el startup de FastAPI (con el loop corriendo).
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.n_workers)]
+
+    async def stop(self, timeout: float = 5.0) -> None:  # Procesa lo encolado (con tope) y apaga los trabajadores.
+        if self._tasks:
+            try:
+                await asyncio.wait_for(self._q().join(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_max": self.queue_max,
+            "received": self.received,
+            "dropped": self.dropped,
+            "payloads": self.payloads,
+            "messages": self.messages,
+            "duplicates": self.duplicates,
+            "malformed": self.malformed,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "seen_ids": len(self._seen),
+            "workers": len(self._tasks),
+        }
+
+    # ------------------------- Trabajadores -------------------------
+    async def _worker(self) -> None:
+        q = self._q()
+        while True:
+            batch = [await q.get()]
+            while len(batch) < WHATSAPP_DRAIN_MAX and not q.empty():
+                batch.append(q.get_nowait())
+            try:
+                await self.process(batch)
+            except Exception as e:  # El trabajador no muere por un payload raro.
+                self.errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+            finally:
+                for _ in batch:
+                    q.task_done()
+
+    async def process(self, payloads: List[Dict[str, Any]]) -> int:
+        """Extrae, deduplica y escribe; devuelve cuántos mensajes nuevos se entregaron al escritor."""
+        fresh: List[Dict[str, Any]] = []
+        ids: List[str] = []
+        for payload in payloads:
+            self.payloads += 1
+            if not isinstance(payload, dict):
+                self.malformed += 1
+                continue
+            try:  # Un payload raro no tumba el resto de la tanda (Meta ya recibió su 200).
+                found, malformed = extract_messages(payload)
+            except Exception as e:
+                self.malformed += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                continue
+            self.malformed += malformed
+            for item in found:
+                mid = item["id"]
+                if mid and mid in self._seen:  # Reintento de Meta (o repetido en la tanda / en otro trabajador).
+                    self.duplicates += 1
+                    continue
+                if mid:
+                    self._seen[mid] = None  # Reservado ya: otro trabajador con el mismo id lo descarta.
+                    ids.append(mid)
+                fresh.append(item["record"])
+        if not fresh:
+            return 0
+        try:
+            await self._write(fresh)
+        except Exception:  # No escrito: liberar los ids para que un reintento de Meta no se descarte.
+            for mid in ids:
+                self._seen.pop(mid, None)
+            raise
+        while len(self._seen) > self.seen_max:
+            self._seen.popitem(last=False)
+        self.messages += len(fresh)
+        return len(fresh)
+
+    async def _write(self, records: List[Dict[str, Any]]) -> None:
+        for attempt in range(_WRITE_RETRIES + 1):
+            try:
+                await asyncio.wrap_future(self.writer.submit(records))
+                return
+            except IngestOverloaded:
+                if attempt == _WRITE_RETRIES:
+                    raise
+                await asyncio.sleep(0.05 * 2 ** attempt)
@@ -0,0 +1,128 @@
+"""Búsqueda de texto completo para los stores (FTS5 en SQLite, tsvector + GIN en Postgres).
+
+Antes `search_news` / `oportunidades_store.search` filtraban con `lower(col) LIKE '%q%'`: ningún
+índice sirve para eso, así que cada búsqueda recorría la tabla entera. Ahora cada tabla tiene un
+índice de texto completo que se mantiene solo:
+    - SQLite: tabla virtual FTS5 `<tabla>_fts` de contenido externo (no duplica el texto), con
+      tokenizador `unicode61 remove_diacritics 2` (minúsculas + sin tildes) y triggers AFTER
+      INSERT / DELETE / UPDATE OF <columnas de texto> sobre la tabla base: upsert y delete la
+      sincronizan en la misma transacción (incrementar `vistas` no la toca). FTS5 no trae
+      stemmer español: la consulta se tokeniza como BM25 (vector_store.lexical: plegado y
+      stopwords), cada término se recorta con `stem()` y se busca como prefijo
+      ("becas" -> `"bec"*`, que cubre beca/becas/becario). Orden por bm25() con pesos por
+      columna y `snippet()` con <mark>...</mark>.
+    - Postgres: configuración `es_unaccent` (spanish + unaccent; si la extensión no se puede
+      crear se usa `spanish`), columna generada `search_tsv` con setweight A/B/C por columna e
+      índice GIN. Consulta con websearch_to_tsquery, orden por ts_rank_cd y `ts_headline`
+      calculado solo sobre la página pedida.
+Si la consulta no deja términos (solo stopwords o símbolos) el store vuelve al LIKE anterior.
+"""
+from __future__ import annotations  # Tipos adelantados.
+from typing import Any, List, Optional, Sequence  # Tipos.
+from vector_store.lexical import tokenize  # Minúsculas + plegado de tildes + stopwords (mismo criterio que BM25).
+
+MARK_START, MARK_END = "<mark>", "</mark>"  # Resaltado de los términos en el snippet.
+SNIPPET_TOKENS = 24  # Largo aproximado del snippet (palabras).
+PG_TS_CONFIG = "es_unaccent"  # Configuración de texto en Postgres (spanish_stem + unaccent).
+_pg_config = PG_TS_CONFIG  # Configuración efectiva (la fija pg_init).
+
+# Sufijos flexivos/derivativos frecuentes (sin tildes), del más largo al más corto.
+_SUFFIXES = (
+    "amientos", "imientos", "amiento", "imiento", "aciones", "iciones", "uciones", "idades",
+    "ciones", "mente", "acion", "icion", "ucion", "ables", "ibles", "istas", "ismos", "adora",
+    "adores", "adoras", "ancia", "encia", "idad", "cion", "ador", "able", "ible", "ista", "ismo",
+    "osos", "osas", "ivos", "ivas", "oso", "osa", "ivo", "iva", "es", "os", "as", "s", "o", "a", "e",
+)
+_MIN_STEM = 3
+
+def stem(term: str) -> str:  # Stemmer ligero para español: quita un sufijo dejando al menos 3 letras.
+    if term.isdigit():
+        return term
+    for suf in _SUFFIXES:
+        if term.endswith(suf) and len(term) - len(suf) >= _MIN_STEM:
+            return term[: -len(suf)]
+    return term
+
+def terms(q: Optional[str]) -> List[str]:  # Raíces únicas de la consulta, en orden.
+    seen: List[str] = []
+    for t in tokenize(q or ""):
+        s = stem(t)
+        if s not in seen:
+            seen.append(s)
+    return seen
+
+def fts5_match(q: Optional[str]) -> Optional[str]:  # Expresión MATCH de FTS5 o None si no quedan términos.
+    ts = terms(q)
+    if not ts:
+        return None
+    return " AND ".join(f'"{t}"*' for t in ts)  # Solo [a-z0-9]: sin comillas que escapar.
+
+# ------------------------- SQLite (FTS5) -------------------------
+def sqlite_init(cur: Any, table: str, columns: Sequence[str]) -> None:
+    """Crea `<table>_fts` (contenido externo) + triggers; reconstruye el índice si la tabla es nueva."""
+    fts = f"{table}_fts"
+    cols = ", ".join(columns)
+    new_cols = ", ".join(f"new.{c}" for c in columns)
+    old_cols = ", ".join(f"old.{c}" for c in columns)
+    exists = cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (fts,)).fetchone() is not None
+    cur.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', content_rowid='rowid', "
+        "tokenize='unicode61 remove_diacritics 2')"
+    )
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_cols}); END"
+    )
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_cols}); END"
+    )
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_cols}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_cols}); END"
+    )
+    if not exists:  # Base con filas previas al índice: se indexan una vez.
+        cur.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+def sqlite_rank(table: str, weights: Sequence[float]) -> str:  # Menor = más relevante (bm25 de FTS5 es negativo).
+    return f"bm25({table}_fts, {', '.join(str(w) for w in weights)})"
+
+def sqlite_snippet(table: str) -> str:
+    return f"snippet({table}_fts, -1, '{MARK_START}', '{MARK_END}', '…', {SNIPPET_TOKENS})"
+
+# ------------------------- Postgres (tsvector + GIN) -------------------------
+def pg_init(conn: Any, cur: Any, table: str, columns: Sequence[str]) -> None:
+    """Columna generada `search_tsv` (pesos A, B, C... en el orden de `columns`) + índice GIN."""
+    global _pg_config
+    config = PG_TS_CONFIG
+    try:
+        with conn.transaction():  # Savepoint: sin permiso para la extensión no se aborta init_db.
+            cur.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+            cur.execute(
+                f"""DO $$ BEGIN
+                  IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{PG_TS_CONFIG}') THEN
+                    CREATE TEXT SEARCH CONFIGURATION {PG_TS_CONFIG} (COPY = spanish);
+                    ALTER TEXT SEARCH CONFIGURATION {PG_TS_CONFIG}
+                      ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+                  END IF;
+                END $$"""
+            )
+    except Exception:
+        config = "spanish"  # Stemming sin plegado de tildes.
+    _pg_config = config
+    vector = " || ".join(
+        f"setweight(to_tsvector('{config}'::regconfig, coalesce({c}, '')), '{'ABCD'[min(i, 3)]}')"
+        for i, c in enumerate(columns)
+    )
+    cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_tsv tsvector GENERATED ALWAYS AS ({vector}) STORED")
+    cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_search ON {table} USING GIN (search_tsv)")
+
+def pg_config() -> str:
+    return _pg_config
+
+def pg_headline(config: str, column: str) -> str:  # Fragmento resaltado de `column` (parámetro: la consulta).
+    return (
+        f"ts_headline('{config}'::regconfig, {column}, websearch_to_tsquery('{config}'::regconfig, %s), "
+        f"'StartSel={MARK_START}, StopSel={MARK_END}, MaxWords={SNIPPET_TOKENS}, MinWords={SNIPPET_TOKENS // 2}, MaxFragments=1')"
+    )
@@ -4,14 +4,17 @@ Responsabilidad: hablar con la base de datos (SQLite o Postgres) para CRUD de la
 No conoce nada de HTTP ni de Pydantic: solo datos primitivos (dicts, listas).
 """
 from __future__ import annotations  # Soporte de anotaciones de tipos adelantadas.
-import json, os, threading, sqlite3  # json para serializar listas; threading.Lock para concurrencia en SQLite.
+import json, os, sqlite3  # json para serializar listas.
 from datetime import datetime  # Timestamps ISO.
 from typing import List, Dict, Any, Optional  # Tipos genéricos.
 from contextlib import contextmanager  # Para crear context manager de conexión.
 from ..core import db  # Módulo que abstrae conexión (Postgres o SQLite).
+from . import fulltext, paging  # Índice de texto completo (FTS5 / tsvector); cursores y totales cacheados.
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))  # Carpeta base (rag_api/)
-_lock = threading.Lock()  # Asegura que operaciones en SQLite no se pisen simultáneamente (no necesario estricto en Postgres pero seguro).
+FTS_COLUMNS = ("titulo", "descripcionCorta", "descripcionLarga")  # Columnas indexadas (orden = peso decreciente).
+FTS_WEIGHTS = (10.0, 4.0, 1.0)  # Pesos bm25 de SQLite (en Postgres: setweight A/B/C).
+ORDER_KEY = ("fecha", "created_at", "id")  # Orden de los listados (DESC) y clave del cursor.
 
 SEED_NEWS: List[Dict[str, Any]] = [  # Datos de ejemplo insertados solo si la tabla está vacía.
 	{
@@ -31,10 +34,10 @@ SEED_NEWS: List[Dict[str, Any]] = [  # Datos de ejemplo insertados solo si la ta
 @contextmanager  # Permite usar: with get_conn() as conn:
 def get_conn():
 	with db.get_connection() as conn:  # type: ignore  # Delegamos a core.db
-		yield conn  # Entregamos la conexión y luego se cierra automáticamente.
+		yield conn  # Entregamos la conexión; al salir vuelve al pool (Postgres) o queda abierta para este hilo (SQLite).
 
 def init_db():  # Crea tabla + índices si no existen; inserta seeds si está vacía.
-	with get_conn() as conn:
+	with db.write_connection() as conn:
 		cur = conn.cursor()
 		if db.is_postgres():
 			cur.execute(
@@ -58,8 +61,11 @@ def init_db():  # Crea tabla + índices si no existen; inserta seeds si está va
 			cur.execute("CREATE INDEX IF NOT EXISTS idx_news_fecha ON news(fecha)")
 			cur.execute("CREATE INDEX IF NOT EXISTS idx_news_destacada ON news(destacada)")
 			cur.execute("CREATE INDEX IF NOT EXISTS idx_news_autor ON news(autor)")
-			cur.execute("SELECT COUNT(*) FROM news")
-			if cur.fetchone()[0] == 0:
+			cur.execute("CREATE INDEX IF NOT EXISTS idx_news_orden ON news(fecha, created_at, id)")  # Paginación por cursor.
+			cur.execute("CREATE INDEX IF NOT EXISTS idx_news_destacada_orden ON news(destacada, fecha, created_at, id)")  # Cursor con ?destacada=.
+			fulltext.pg_init(conn, cur, "news", FTS_COLUMNS)
+			cur.execute("SELECT COUNT(*) AS total FROM news")
+			if cur.fetchone()["total"] == 0:  # Por nombre: las filas de Postgres son dicts.
 				for n in SEED_NEWS:
 					cur.execute(
 						"""INSERT INTO news (id, fecha, titulo, descripcionCorta, descripcionLarga, autor, categoria, imagen, destacada, vistas, created_at, updated_at)
@@ -91,8 +97,11 @@ def init_db():  # Crea tabla + índices si no existen; inserta seeds si está va
 			cur.execute("CREATE INDEX IF NOT EXISTS idx_news_fecha ON news(fecha)")
 			cur.execute("CREATE INDEX IF NOT EXISTS idx_news_destacada ON news(destacada)")
 			cur.execute("CREATE INDEX IF NOT EXISTS idx_news_autor ON news(autor)")
-			cur.execute("SELECT COUNT(*) FROM news")
-			if cur.fetchone()[0] == 0:
+			cur.execute("CREATE INDEX IF NOT EXISTS idx_news_orden ON news(fecha, created_at, id)")  # Paginación por cursor.
+			cur.execute("CREATE INDEX IF NOT EXISTS idx_news_destacada_orden ON news(destacada, fecha, created_at, id)")  # Cursor con ?destacada=.
+			fulltext.sqlite_init(cur, "news", FTS_COLUMNS)
+			cur.execute("SELECT COUNT(*) AS total FROM news")
+			if cur.fetchone()["total"] == 0:  # Por nombre: las filas de Postgres son dicts.
 				for n in SEED_NEWS:
 					now = datetime.utcnow().isoformat()
 					cur.execute(
@@ -126,7 +135,7 @@ def _row_to_dict(row: Any) -> Dict[str, Any]:  # Convierte fila DB a dict Python
 	else:
 		categoria_val = json.loads(categoria_raw) if categoria_raw else []
 	imagen_val = row["imagen"] if isinstance(row, (dict,)) or hasattr(row, "__getitem__") else None
-	return {
+	out = {
 		"id": row["id"],
 		"fecha": str(row["fecha"]),
 		"titulo": row["titulo"],
@@ -138,21 +147,26 @@ def _row_to_dict(row: Any) -> Dict[str, Any]:  # Convierte fila DB a dict Python
 		"destacada": bool(row["destacada"]),
 		"vistas": row["vistas"],
 	}
+	if "snippet" in row.keys():  # Solo en búsquedas de texto completo.
+		out["snippet"] = row["snippet"]
+	return out
 
 def list_news() -> List[Dict[str, Any]]:  # Devuelve todas las noticias ordenadas (para listados simples).
-	with _lock, get_conn() as conn:
+	with get_conn() as conn:  # Lectura sin lock (WAL / Postgres).
 		cur = conn.cursor()
 		cur.execute("SELECT * FROM news ORDER BY fecha DESC, created_at DESC")
 		return [_row_to_dict(r) for r in cur.fetchall()]
 
 def search_news(q: Optional[str] = None, categoria: Optional[str] = None, destacada: Optional[bool] = None,
-				page: int = 1, page_size: int = 10) -> Dict[str, Any]:  # Filtro + paginación.
+				page: int = 1, page_size: int = 10, cursor: Optional[str] = None, with_total: bool = True) -> Dict[str, Any]:
+	"""Filtro + paginación. Con `cursor` (el `next_cursor` de la página anterior) no hay OFFSET; con `q`, por relevancia."""
 	if page < 1: page = 1
 	if page_size < 1: page_size = 10
 	if page_size > 100: page_size = 100
 	where = []
 	params: list[Any] = []
-	if q:
+	full_text = bool(fulltext.terms(q))  # Con términos: índice de texto completo; solo stopwords/símbolos: LIKE.
+	if q and not full_text:
 		like = f"%{q.lower()}%"
 		where.append("(lower(titulo) LIKE ? OR lower(descripcionCorta) LIKE ? OR lower(descripcionLarga) LIKE ?)")
 		params.extend([like, like, like])
@@ -162,35 +176,90 @@ def search_news(q: Optional[str] = None, categoria: Optional[str] = None, destac
 	if destacada is not None:
 		where.append("destacada = ?")
 		params.append(1 if destacada else 0)
-	clause = (" WHERE " + " AND ".join(where)) if where else ""
-	offset = (page - 1) * page_size
-	with _lock, get_conn() as conn:
+	if full_text:
+		offset = paging.decode_cursor(cursor, paging.OFFSET, 1)[0] if cursor else (page - 1) * page_size
+		return _search_full_text(q, where, params, page if not cursor else None, page_size, int(offset), with_total)  # type: ignore[arg-type]
+	pg = db.is_postgres()
+	sql_where = [w.replace("?", "%s") for w in where] if pg else list(where)
+	ph = "%s" if pg else "?"
+	count_clause = (" WHERE " + " AND ".join(sql_where)) if sql_where else ""  # Filtros sin el cursor.
+	keyset: list[Any] = []
+	if cursor:
+		keyset = paging.decode_cursor(cursor, paging.KEYSET, len(ORDER_KEY))
+		sql_where.append(paging.keyset_condition(ORDER_KEY, ph))
+	clause = (" WHERE " + " AND ".join(sql_where)) if sql_where else ""
+	offset = 0 if cursor else (page - 1) * page_size
+	with get_conn() as conn:  # Lectura sin lock (WAL / Postgres).
 		cur = conn.cursor()
-		if db.is_postgres():
-			# Adapt placeholders
-			clause_pg = clause.replace("?", "%s")
-			cur.execute(f"SELECT COUNT(*) FROM news{clause_pg}", params)
-			total = cur.fetchone()[0]
-			cur.execute(f"SELECT * FROM news{clause_pg} ORDER BY fecha DESC, created_at DESC LIMIT %s OFFSET %s", params + [page_size, offset])
-		else:
-			cur.execute(f"SELECT COUNT(*) FROM news{clause}", params)
-			total = cur.fetchone()[0]
-			cur.execute(f"SELECT * FROM news{clause} ORDER BY fecha DESC, created_at DESC LIMIT ? OFFSET ?", params + [page_size, offset])
-		items = [_row_to_dict(r) for r in cur.fetchall()]
-	return {"items": items, "total": total, "page": page, "page_size": page_size}
+		total = None
+		if with_total:  # Total del filtro, cacheado hasta la próxima escritura.
+			total = paging.totals.get("news", (count_clause, tuple(params)), lambda: _count(cur, count_clause, params))
+		cur.execute(
+			f"SELECT * FROM news{clause} ORDER BY fecha DESC, created_at DESC, id DESC LIMIT {ph} OFFSET {ph}",
+			params + keyset + [page_size + 1, offset],
+		)
+		rows, next_cursor = paging.split_page(cur.fetchall(), page_size, lambda r: [r[c] for c in ORDER_KEY])
+		items = [_row_to_dict(r) for r in rows]
+	return {"items": items, "total": total, "page": page if not cursor else None, "page_size": page_size, "next_cursor": next_cursor}
 
-def get_news(nid: str) -> Optional[Dict[str, Any]]:  # Obtiene una noticia por ID.
-	with _lock, get_conn() as conn:
+def _count(cur: Any, clause: str, params: List[Any]) -> int:
+	cur.execute(f"SELECT COUNT(*) AS total FROM news{clause}", params)
+	return cur.fetchone()["total"]  # Por nombre: las filas de Postgres son dicts.
+
+def _search_full_text(q: str, where: List[str], params: List[Any], page: Optional[int], page_size: int, offset: int,
+					  with_total: bool = True) -> Dict[str, Any]:
+	"""Búsqueda por índice (FTS5 / tsvector + GIN): resultados por relevancia con `snippet` resaltado.
+
+	El orden por relevancia obliga a puntuar todas las coincidencias, así que el cursor guarda el offset.
+	"""
+	with get_conn() as conn:  # Lectura sin lock (WAL / Postgres).
 		cur = conn.cursor()
+		total = None
 		if db.is_postgres():
-			cur.execute("SELECT * FROM news WHERE id = %s", (nid,))
+			cfg = fulltext.pg_config()
+			tsq = f"websearch_to_tsquery('{cfg}'::regconfig, %s)"
+			clause = " AND ".join([f"search_tsv @@ {tsq}"] + [w.replace("?", "%s") for w in where])
+			if with_total:
+				total = paging.totals.get("news", ("fts", clause, q, tuple(params)), lambda: _count(cur, f" WHERE {clause}", [q] + params))
+			cur.execute(  # El headline se calcula solo para las filas de la página.
+				f"""SELECT p.*, {fulltext.pg_headline(cfg, "concat_ws(' ', p.titulo, p.descripcionCorta, p.descripcionLarga)")} AS snippet
+				FROM (SELECT *, ts_rank_cd(search_tsv, {tsq}) AS rank FROM news WHERE {clause}
+				      ORDER BY rank DESC, fecha DESC LIMIT %s OFFSET %s) p
+				ORDER BY p.rank DESC, p.fecha DESC""",
+				[q, q, q] + params + [page_size + 1, offset],
+			)
 		else:
-			cur.execute("SELECT * FROM news WHERE id = ?", (nid,))
-		row = cur.fetchone()
-		return _row_to_dict(row) if row else None
+			clause = " AND ".join(["news_fts MATCH ?"] + where)
+			join = "FROM news_fts JOIN news ON news.rowid = news_fts.rowid"
+			match = fulltext.fts5_match(q)
+			if with_total:
+				def count() -> int:
+					cur.execute(f"SELECT COUNT(*) AS total {join} WHERE {clause}", [match] + params)
+					return cur.fetchone()["total"]
+				total = paging.totals.get("news", ("fts", clause, match, tuple(params)), count)
+			cur.execute(
+				f"""SELECT news.*, {fulltext.sqlite_snippet("news")} AS snippet {join} WHERE {clause}
+				ORDER BY {fulltext.sqlite_rank("news", FTS_WEIGHTS)}, news.fecha DESC LIMIT ? OFFSET ?""",
+				[match] + params + [page_size + 1, offset],
+			)
+		rows, next_cursor = paging.split_page(cur.fetchall(), page_size, lambda r: [offset + page_size], paging.OFFSET)
+		items = [_row_to_dict(r) for r in rows]
+	return {"items": items, "total": total, "page": page, "page_size": page_size, "next_cursor": next_cursor}
+
+def _fetch_news(cur: Any, nid: str) -> Optional[Dict[str, Any]]:  # Lectura por ID con un cursor ya abierto.
+	if db.is_postgres():
+		cur.execute("SELECT * FROM news WHERE id = %s", (nid,))
+	else:
+		cur.execute("SELECT * FROM news WHERE id = ?", (nid,))
+	row = cur.fetchone()
+	return _row_to_dict(row) if row else None
+
+def get_news(nid: str) -> Optional[Dict[str, Any]]:  # Obtiene una noticia por ID.
+	with get_conn() as conn:  # Lectura sin lock (WAL / Postgres).
+		return _fetch_news(conn.cursor(), nid)
 
 def increment_views(nid: str, amount: int = 1) -> Optional[Dict[str, Any]]:  # Incrementa contador vistas.
-	with _lock, get_conn() as conn:
+	with db.write_connection() as conn:  # Escritura: cola de un solo escritor en SQLite.
 		cur = conn.cursor()
 		if db.is_postgres():
 			cur.execute("UPDATE news SET vistas = vistas + %s, updated_at = now() WHERE id = %s", (amount, nid))
@@ -199,7 +268,7 @@ def increment_views(nid: str, amount: int = 1) -> Optional[Dict[str, Any]]:  # I
 		if cur.rowcount == 0:
 			return None
 		conn.commit()
-	return get_news(nid)
+		return _fetch_news(cur, nid)  # Misma conexión: sin un segundo préstamo del pool.
 
 def upsert_news(item: Dict[str, Any]) -> Dict[str, Any]:  # Inserta o actualiza según exista el ID.
 	required = ["titulo", "fecha", "descripcionCorta", "descripcionLarga", "autor", "categoria"]
@@ -210,7 +279,7 @@ def upsert_news(item: Dict[str, Any]) -> Dict[str, Any]:  # Inserta o actualiza
 		base_slug = slug(item["titulo"])
 		item["id"] = f"{item['fecha']}-{base_slug}-{int(datetime.utcnow().timestamp())}"
 	now = datetime.utcnow().isoformat()
-	with _lock, get_conn() as conn:
+	with db.write_connection() as conn:  # Escritura: cola de un solo escritor en SQLite.
 		cur = conn.cursor()
 		if db.is_postgres():
 			cur.execute("SELECT 1 FROM news WHERE id = %s", (item["id"],))
@@ -253,10 +322,11 @@ def upsert_news(item: Dict[str, Any]) -> Dict[str, Any]:  # Inserta o actualiza
 					)
 				)
 		conn.commit()
-	return get_news(item["id"])  # type: ignore
+		paging.totals.invalidate("news")  # Puede cambiar filtros (destacada, categoría) o sumar una fila.
+		return _fetch_news(cur, item["id"])  # type: ignore  # Misma conexión: sin un segundo préstamo del pool.
 
 def delete_news(nid: str) -> bool:  # Elimina por ID. True si borró fila.
-	with _lock, get_conn() as conn:
+	with db.write_connection() as conn:  # Escritura: cola de un solo escritor en SQLite.
 		cur = conn.cursor()
 		if db.is_postgres():
 			cur.execute("DELETE FROM news WHERE id = %s", (nid,))
@@ -264,6 +334,16 @@ def delete_news(nid: str) -> bool:  # Elimina por ID. True si borró fila.
 			cur.execute("DELETE FROM news WHERE id = ?", (nid,))
 		deleted = cur.rowcount > 0
 		conn.commit()
+	if deleted:
+		paging.totals.invalidate("news")
 	return deleted
 
+# Variantes async para routers `async def`: misma SQL, ejecutada en el executor de la base (no en el threadpool de AnyIO).
+alist_news = db.asyncify(list_news)
+asearch_news = db.asyncify(search_news)
+aget_news = db.asyncify(get_news)
+aincrement_views = db.asyncify(increment_views)
+aupsert_news = db.asyncify(upsert_news)
+adelete_news = db.asyncify(delete_news)
+
 init_db()
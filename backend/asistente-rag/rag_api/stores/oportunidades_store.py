@@ -4,17 +4,18 @@ Encargado de CRUD para 'oportunidades' (becas, prácticas, concursos, etc.) en S
 No maneja HTTP ni Pydantic; devuelve/recibe dicts.
 """
 from __future__ import annotations  # Soporte de anotaciones futuras.
-import threading  # Lock para operaciones en SQLite.
 from datetime import datetime  # Timestamps ISO.
 from typing import Any, Dict, List, Optional  # Tipos.
 from contextlib import contextmanager  # Context manager para conexión.
 from ..core import db  # Abstracción de conexión DB.
 from .news_store import slug  # Reutilizamos función para generar IDs legibles.
-
-_lock = threading.Lock()  # Evita condiciones de carrera en SQLite.
+from . import fulltext, paging  # Índice de texto completo (FTS5 / tsvector); cursores y totales cacheados.
 
 VALID_TIPOS = {"beca", "practica", "concurso", "otro"}  # Enumeración simple de tipos aceptados.
 VALID_ESTADOS = {"abierta", "cerrada", "archivada"}  # Estados de una oportunidad.
+FTS_COLUMNS = ("titulo", "descripcion")  # Columnas indexadas (orden = peso decreciente).
+FTS_WEIGHTS = (10.0, 1.0)  # Pesos bm25 de SQLite (en Postgres: setweight A/B).
+ORDER_KEY = ("fecha_publicacion", "created_at", "id")  # Orden de los listados (DESC) y clave del cursor.
 
 @contextmanager  # Uso: with get_conn() as conn:
 def get_conn():
@@ -22,7 +23,7 @@ def get_conn():
         yield conn  # Entregamos la conexión.
 
 def init_db() -> None:  # Crea tabla e índices si no existen.
-    with get_conn() as conn:
+    with db.write_connection() as conn:
         cur = conn.cursor()
         if db.is_postgres():
             cur.execute(
@@ -46,6 +47,8 @@ def init_db() -> None:  # Crea tabla e índices si no existen.
             cur.execute("CREATE INDEX IF NOT EXISTS idx_oportunidades_fecha_cierre ON oportunidades(fecha_cierre)")
             cur.execute("CREATE INDEX IF NOT EXISTS idx_oportunidades_tipo ON oportunidades(tipo)")
             cur.execute("CREATE INDEX IF NOT EXISTS idx_oportunidades_estado ON oportunidades(estado)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_oportunidades_orden ON oportunidades(fecha_publicacion, created_at, id)")  # Paginación por cursor.
+            fulltext.pg_init(conn, cur, "oportunidades", FTS_COLUMNS)
         else:
             cur.execute(
                 """
@@ -68,10 +71,12 @@ def init_db() -> None:  # Crea tabla e índices si no existen.
             cur.execute("CREATE INDEX IF NOT EXISTS idx_oportunidades_fecha_cierre ON oportunidades(fecha_cierre)")
             cur.execute("CREATE INDEX IF NOT EXISTS idx_oportunidades_tipo ON oportunidades(tipo)")
             cur.execute("CREATE INDEX IF NOT EXISTS idx_oportunidades_estado ON oportunidades(estado)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_oportunidades_orden ON oportunidades(fecha_publicacion, created_at, id)")  # Paginación por cursor.
+            fulltext.sqlite_init(cur, "oportunidades", FTS_COLUMNS)
         conn.commit()
 
 def _row_to_dict(r: Any) -> Dict[str, Any]:  # Convierte fila DB -> dict estándar.
-    return {
+    out = {
         "id": r["id"],
         "titulo": r["titulo"],
         "descripcion": r["descripcion"],
@@ -82,22 +87,27 @@ def _row_to_dict(r: Any) -> Dict[str, Any]:  # Convierte fila DB -> dict estánd
         "enlace": r["enlace"],
         "estado": r["estado"],
     }
+    if "snippet" in r.keys():  # Solo en búsquedas de texto completo.
+        out["snippet"] = r["snippet"]
+    return out
 
 def list_all() -> List[Dict[str, Any]]:  # Lista completa (sin filtros) ordenada.
-    with _lock, get_conn() as conn:
+    with get_conn() as conn:  # Lectura sin lock (WAL / Postgres).
         cur = conn.cursor()
         cur.execute("SELECT * FROM oportunidades ORDER BY fecha_publicacion DESC, created_at DESC")
         return [_row_to_dict(r) for r in cur.fetchall()]
 
 def search(q: Optional[str] = None, tipo: Optional[str] = None, estado: Optional[str] = None,
-           abierta: Optional[bool] = None, page: int = 1, page_size: int = 10) -> Dict[str, Any]:  # Filtros + paginación.
+           abierta: Optional[bool] = None, page: int = 1, page_size: int = 10, cursor: Optional[str] = None,
+           with_total: bool = True) -> Dict[str, Any]:  # Filtros + paginación (cursor = next_cursor anterior); con `q`, por relevancia.
     if page < 1: page = 1
     if page_size < 1: page_size = 10
     if page_size > 100: page_size = 100
     where: List[str] = []
     params: List[Any] = []
     placeholder = "%s" if db.is_postgres() else "?"
-    if q:
+    full_text = bool(fulltext.terms(q))  # Con términos: índice de texto completo; solo stopwords/símbolos: LIKE.
+    if q and not full_text:
         like = f"%{q.lower()}%"
         where.append(f"(lower(titulo) LIKE {placeholder} OR lower(descripcion) LIKE {placeholder})")
         params.extend([like, like])
@@ -114,29 +124,74 @@ def search(q: Optional[str] = None, tipo: Optional[str] = None, estado: Optional
         else:
             where.append(f"(estado != 'abierta' OR (fecha_cierre IS NOT NULL AND fecha_cierre < {placeholder}))")
         params.append(today)
+    if full_text:
+        offset = paging.decode_cursor(cursor, paging.OFFSET, 1)[0] if cursor else (page - 1) * page_size
+        return _search_full_text(q, where, params, page if not cursor else None, page_size, int(offset), with_total)  # type: ignore[arg-type]
+    count_clause = (" WHERE " + " AND ".join(where)) if where else ""  # Filtros sin el cursor.
+    keyset: List[Any] = []
+    if cursor:
+        keyset = paging.decode_cursor(cursor, paging.KEYSET, len(ORDER_KEY))
+        where.append(paging.keyset_condition(ORDER_KEY, placeholder))
     clause = (" WHERE " + " AND ".join(where)) if where else ""
-    offset = (page - 1) * page_size
-    with _lock, get_conn() as conn:
+    offset = 0 if cursor else (page - 1) * page_size
+    with get_conn() as conn:  # Lectura sin lock (WAL / Postgres).
+        cur = conn.cursor()
+        total = None
+        if with_total:  # Total del filtro, cacheado hasta la próxima escritura.
+            total = paging.totals.get("oportunidades", (count_clause, tuple(params)), lambda: _count(cur, count_clause, params))
+        cur.execute(
+            f"SELECT * FROM oportunidades{clause} ORDER BY fecha_publicacion DESC, created_at DESC, id DESC "
+            f"LIMIT {placeholder} OFFSET {placeholder}",
+            params + keyset + [page_size + 1, offset],
+        )
+        rows, next_cursor = paging.split_page(cur.fetchall(), page_size, lambda r: [r[c] for c in ORDER_KEY])
+        items = [_row_to_dict(r) for r in rows]
+    return {"items": items, "total": total, "page": page if not cursor else None, "page_size": page_size, "next_cursor": next_cursor}
+
+def _count(cur: Any, clause: str, params: List[Any]) -> int:
+    cur.execute(f"SELECT COUNT(*) AS total FROM oportunidades{clause}", params)
+    return cur.fetchone()["total"]  # Por nombre: las filas de Postgres son dicts.
+
+def _search_full_text(q: str, where: List[str], params: List[Any], page: Optional[int], page_size: int, offset: int,
+                      with_total: bool = True) -> Dict[str, Any]:
+    """Búsqueda por índice (FTS5 / tsvector + GIN): resultados por relevancia con `snippet` resaltado (cursor = offset)."""
+    with get_conn() as conn:  # Lectura sin lock (WAL / Postgres).
         cur = conn.cursor()
+        total = None
         if db.is_postgres():
-            cur.execute(f"SELECT COUNT(*) FROM oportunidades{clause}", params)
-            total = cur.fetchone()[0]
-            cur.execute(
-                f"SELECT * FROM oportunidades{clause} ORDER BY fecha_publicacion DESC, created_at DESC LIMIT %s OFFSET %s",
-                params + [page_size, offset],
+            cfg = fulltext.pg_config()
+            tsq = f"websearch_to_tsquery('{cfg}'::regconfig, %s)"
+            clause = " AND ".join([f"search_tsv @@ {tsq}"] + where)
+            if with_total:
+                total = paging.totals.get("oportunidades", ("fts", clause, q, tuple(params)),
+                                          lambda: _count(cur, f" WHERE {clause}", [q] + params))
+            cur.execute(  # El headline se calcula solo para las filas de la página.
+                f"""SELECT p.*, {fulltext.pg_headline(cfg, "concat_ws(' ', p.titulo, p.descripcion)")} AS snippet
+                FROM (SELECT *, ts_rank_cd(search_tsv, {tsq}) AS rank FROM oportunidades WHERE {clause}
+                      ORDER BY rank DESC, fecha_publicacion DESC LIMIT %s OFFSET %s) p
+                ORDER BY p.rank DESC, p.fecha_publicacion DESC""",
+                [q, q, q] + params + [page_size + 1, offset],
             )
         else:
-            cur.execute(f"SELECT COUNT(*) FROM oportunidades{clause}", params)
-            total = cur.fetchone()[0]
+            clause = " AND ".join(["oportunidades_fts MATCH ?"] + where)
+            join = "FROM oportunidades_fts JOIN oportunidades ON oportunidades.rowid = oportunidades_fts.rowid"
+            match = fulltext.fts5_match(q)
+            if with_total:
+                def count() -> int:
+                    cur.execute(f"SELECT COUNT(*) AS total {join} WHERE {clause}", [match] + params)
+                    return cur.fetchone()["total"]
+                total = paging.totals.get("oportunidades", ("fts", clause, match, tuple(params)), count)
             cur.execute(
-                f"SELECT * FROM oportunidades{clause} ORDER BY fecha_publicacion DESC, created_at DESC LIMIT ? OFFSET ?",
-                params + [page_size, offset],
+                f"""SELECT oportunidades.*, {fulltext.sqlite_snippet("oportunidades")} AS snippet {join} WHERE {clause}
+                ORDER BY {fulltext.sqlite_rank("oportunidades", FTS_WEIGHTS)}, oportunidades.fecha_publicacion DESC LIMIT ? OFFSET ?""",
+                [match] + params + [page_size + 1, offset],
             )
-        items = [_row_to_dict(r) for r in cur.fetchall()]
-    return {"items": items, "total": total, "page": page, "page_size": page_size}
+        rows, next_cursor = paging.split_page(cur.fetchall(), page_size, lambda r: [offset + page_size], paging.OFFSET)
+        items = [_row_to_dict(r) for r in rows]
+    return {"items": items, "total": total, "page": page, "page_size": page_size, "next_cursor": next_cursor}
 
 def get_one(oid: str) -> Optional[Dict[str, Any]]:  # Obtiene una oportunidad por ID.
-    with _lock, get_conn() as conn:
+    with get_conn() as conn:  # Lectura sin lock (WAL / Postgres).
         cur = conn.cursor()
         if db.is_postgres():
             cur.execute("SELECT * FROM oportunidades WHERE id=%s", (oid,))
@@ -158,7 +213,7 @@ def upsert(data: Dict[str, Any]) -> Dict[str, Any]:  # Inserta o actualiza segú
         base_slug = slug(data["titulo"])
         data["id"] = f"{data['fecha_publicacion']}-{base_slug}-{int(datetime.utcnow().timestamp())}"
     now = datetime.utcnow().isoformat()
-    with _lock, get_conn() as conn:
+    with db.write_connection() as conn:  # Escritura: cola de un solo escritor en SQLite.
         cur = conn.cursor()
         if db.is_postgres():
             cur.execute("SELECT 1 FROM oportunidades WHERE id=%s", (data["id"],))
@@ -201,10 +256,11 @@ def upsert(data: Dict[str, Any]) -> Dict[str, Any]:  # Inserta o actualiza segú
                     ),
                 )
         conn.commit()
+    paging.totals.invalidate("oportunidades")  # Puede cambiar tipo/estado/fechas o sumar una fila.
     return get_one(data["id"])  # type: ignore
 
 def delete(oid: str) -> bool:  # Elimina por ID.
-    with _lock, get_conn() as conn:
+    with db.write_connection() as conn:  # Escritura: cola de un solo escritor en SQLite.
         cur = conn.cursor()
         if db.is_postgres():
             cur.execute("DELETE FROM oportunidades WHERE id=%s", (oid,))
@@ -212,6 +268,15 @@ def delete(oid: str) -> bool:  # Elimina por ID.
             cur.execute("DELETE FROM oportunidades WHERE id=?", (oid,))
         deleted = cur.rowcount > 0
         conn.commit()
+    if deleted:
+        paging.totals.invalidate("oportunidades")
     return deleted
 
+# Variantes async para routers `async def` (ver news_store).
+alist_all = db.asyncify(list_all)
+asearch = db.asyncify(search)
+aget_one = db.asyncify(get_one)
+aupsert = db.asyncify(upsert)
+adelete = db.asyncify(delete)
+
 init_db()
@@ -0,0 +1,93 @@
+"""Paginación por cursor (keyset) y totales cacheados para los listados de los stores.
+
+Antes cada página hacía `SELECT COUNT(*)` + `LIMIT/OFFSET`: la base recorre y descarta todas las
+filas anteriores, así que la página 500 costaba 500 veces la 1, y el COUNT se repetía en cada
+página. Ahora:
+    - Cursor: el listado se ordena por una clave única (news: fecha, created_at, id;
+      oportunidades: fecha_publicacion, created_at, id; data_items: created_at, id), con índice
+      compuesto en ese orden. `next_cursor` codifica (base64 url-safe, opaco para el cliente) la
+      clave de la última fila; la página siguiente filtra `(clave) < (valores)` y lee solo
+      page_size + 1 filas por el índice. La búsqueda de texto completo ordena por relevancia
+      (hay que puntuar todas las coincidencias igual), así que su cursor guarda el offset.
+    - Totales opcionales (`with_total=False` -> total None) y, si se piden, cacheados por
+      (tabla, filtros) hasta STORE_TOTALS_TTL_S segundos. Cada escritura del store invalida los
+      de su tabla; el TTL acota lo desactualizado si escribe otro proceso/worker.
+`page`/`page_size` siguen funcionando (OFFSET) para clientes anteriores.
+"""
+from __future__ import annotations  # Tipos adelantados.
+import os, json, time, base64, threading  # Config, serialización del cursor y cache.
+from collections import OrderedDict  # Cache LRU de totales.
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple  # Tipos.
+
+STORE_TOTALS_TTL_S = float(os.getenv("STORE_TOTALS_TTL_S", "30"))  # Vida de un total cacheado (0 = sin cache).
+STORE_TOTALS_MAX = int(os.getenv("STORE_TOTALS_MAX", "1024"))  # Combinaciones de filtros recordadas.
+
+KEYSET, OFFSET = "k", "o"  # Tipos de cursor.
+
+def encode_cursor(kind: str, values: Sequence[Any]) -> str:
+    raw = json.dumps([kind, [v if isinstance(v, (int, float)) or v is None else str(v) for v in values]],
+                     ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(token: str, kind: str, size: int) -> List[Any]:  # ValueError si el cursor no es válido (router -> 400).
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        got_kind, values = json.loads(raw.decode("utf-8"))
+    except Exception:
+        raise ValueError("cursor inválido")
+    if got_kind != kind or not isinstance(values, list) or len(values) != size:
+        raise ValueError("cursor inválido")
+    return values
+
+def keyset_condition(columns: Sequence[str], placeholder: str) -> str:  # Orden DESC: filas "después" del cursor.
+    return f"({', '.join(columns)}) < ({', '.join([placeholder] * len(columns))})"
+
+def split_page(rows: List[Any], page_size: int, next_values: Callable[[Any], Sequence[Any]], kind: str = KEYSET) -> Tuple[List[Any], Optional[str]]:
+    """Filas leídas con LIMIT page_size + 1 -> (página, next_cursor o None si no hay más)."""
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(kind, next_values(rows[-1]))
+
+class TotalsCache:  # COUNT(*) por (tabla, filtros), invalidado por escrituras y con TTL.
+    def __init__(self, ttl_s: float = STORE_TOTALS_TTL_S, max_entries: int = STORE_TOTALS_MAX):
+        self.ttl_s = ttl_s
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, int, int]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, table: str, key: Hashable, compute: Callable[[], int]) -> int:
+        k = (table, key)
+        now = time.monotonic()
+        with self._lock:
+            version = self._versions.get(table, 0)
+            entry = self._entries.get(k)
+            if entry is not None and entry[2] == version and now - entry[0] < self.ttl_s:
+                self._entries.move_to_end(k)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        total = compute()  # Fuera del lock: el COUNT no bloquea otras tablas/filtros.
+        with self._lock:
+            if self._versions.get(table, 0) == version and self.ttl_s > 0:  # Sin escrituras mientras contábamos.
+                self._entries[k] = (now, total, version)
+                self._entries.move_to_end(k)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return total
+
+    def invalidate(self, table: str) -> None:  # Llamar tras cada escritura confirmada en `table`.
+        with self._lock:
+            self._versions[table] = self._versions.get(table, 0) + 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "invalidations": self.invalidations, "ttl_s": self.ttl_s}
+
+totals = TotalsCache()  # Compartido por los stores del proceso.
@@ -4,13 +4,15 @@ Uso: guardar objetos ligeros con un tipo (tipo) y un JSON (data) sin crear mucha
 Sirve para configuraciones, documentos simples, FAQs, etc.
 """
 from __future__ import annotations  # Tipos adelantados.
-import json, threading  # json para serializar; lock para sincronizar SQLite.
+import json  # json para serializar.
 from datetime import datetime  # Timestamps ISO.
 from typing import Any, Dict, List, Optional  # Tipos.
 from contextlib import contextmanager  # Context manager para conexión.
 from ..core import db  # Abstracción de conexión DB.
+from . import paging  # Cursores y totales cacheados.
+
+ORDER_KEY = ("created_at", "id")  # Orden de los listados (DESC) y clave del cursor.
 
-_lock = threading.Lock()  # Lock global para operaciones de escritura en SQLite.
 
 @contextmanager  # Uso: with get_conn() as conn:
 def get_conn():
@@ -18,7 +20,7 @@ def get_conn():
         yield conn
 
 def init_db() -> None:  # Crea tabla + índice si no existen.
-    with get_conn() as conn:
+    with db.write_connection() as conn:
         cur = conn.cursor()
         if db.is_postgres():
             cur.execute(
@@ -33,6 +35,8 @@ def init_db() -> None:  # Crea tabla + índice si no existen.
                 """
             )
             cur.execute("CREATE INDEX IF NOT EXISTS idx_data_items_tipo ON data_items(tipo)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_data_items_orden ON data_items(created_at, id)")  # Paginación por cursor.
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_data_items_tipo_orden ON data_items(tipo, created_at, id)")  # Cursor filtrando por tipo.
         else:
             cur.execute(
                 """
@@ -46,6 +50,8 @@ def init_db() -> None:  # Crea tabla + índice si no existen.
                 """
             )
             cur.execute("CREATE INDEX IF NOT EXISTS idx_data_items_tipo ON data_items(tipo)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_data_items_orden ON data_items(created_at, id)")  # Paginación por cursor.
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_data_items_tipo_orden ON data_items(tipo, created_at, id)")  # Cursor filtrando por tipo.
         conn.commit()
 
 def _row_to_dict(r: Any) -> Dict[str, Any]:  # Convierte fila DB -> dict homogéneo.
@@ -71,7 +77,7 @@ def create_item(tipo: str, data: Dict[str, Any], item_id: Optional[str] = None)
         raise ValueError("'tipo' es requerido")
     item_id = item_id or str(uuid.uuid4())
     now = datetime.utcnow().isoformat()
-    with _lock, get_conn() as conn:
+    with db.write_connection() as conn:  # Escritura: cola de un solo escritor en SQLite.
         cur = conn.cursor()
         if db.is_postgres():
             cur.execute(
@@ -84,10 +90,11 @@ def create_item(tipo: str, data: Dict[str, Any], item_id: Optional[str] = None)
                 (item_id, tipo, json.dumps(data, ensure_ascii=False), now, now),
             )
         conn.commit()
+    paging.totals.invalidate("data_items")
     return get_item(item_id)  # type: ignore
 
 def get_item(item_id: str) -> Optional[Dict[str, Any]]:  # Recupera uno por id.
-    with _lock, get_conn() as conn:
+    with get_conn() as conn:  # Lectura sin lock (WAL / Postgres).
         cur = conn.cursor()
         if db.is_postgres():
             cur.execute("SELECT * FROM data_items WHERE id=%s", (item_id,))
@@ -98,7 +105,7 @@ def get_item(item_id: str) -> Optional[Dict[str, Any]]:  # Recupera uno por id.
 
 def update_item(item_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:  # Reemplaza el JSON data.
     now = datetime.utcnow().isoformat()
-    with _lock, get_conn() as conn:
+    with db.write_connection() as conn:  # Escritura: cola de un solo escritor en SQLite.
         cur = conn.cursor()
         if db.is_postgres():
             cur.execute(
@@ -113,10 +120,11 @@ def update_item(item_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         if cur.rowcount == 0:
             return None
         conn.commit()
+    paging.totals.invalidate("data_items")  # El filtro `q` busca dentro de data.
     return get_item(item_id)
 
 def delete_item(item_id: str) -> bool:  # Elimina por id.
-    with _lock, get_conn() as conn:
+    with db.write_connection() as conn:  # Escritura: cola de un solo escritor en SQLite.
         cur = conn.cursor()
         if db.is_postgres():
             cur.execute("DELETE FROM data_items WHERE id=%s", (item_id,))
@@ -124,40 +132,53 @@ def delete_item(item_id: str) -> bool:  # Elimina por id.
             cur.execute("DELETE FROM data_items WHERE id=?", (item_id,))
         deleted = cur.rowcount > 0
         conn.commit()
+    if deleted:
+        paging.totals.invalidate("data_items")
     return deleted
 
-def search_items(tipo: Optional[str] = None, q: Optional[str] = None, page: int = 1, page_size: int = 20) -> Dict[str, Any]:  # Filtro + paginación.
+def search_items(tipo: Optional[str] = None, q: Optional[str] = None, page: int = 1, page_size: int = 20,
+                 cursor: Optional[str] = None, with_total: bool = True) -> Dict[str, Any]:  # Filtro + paginación (cursor = next_cursor anterior).
     if page < 1: page = 1
     if page_size < 1: page_size = 20
     if page_size > 200: page_size = 200
     where: List[str] = []
     params: List[Any] = []
+    ph = "%s" if db.is_postgres() else "?"
     if tipo:
-        where.append("tipo = %s" if db.is_postgres() else "tipo = ?")
+        where.append(f"tipo = {ph}")
         params.append(tipo)
     if q:
         like = f"%{q.lower()}%"
         where.append("lower(data::text) LIKE %s" if db.is_postgres() else "lower(data) LIKE ?")
         params.append(like)
+    count_clause = (" WHERE " + " AND ".join(where)) if where else ""  # Filtros sin el cursor.
+    keyset: List[Any] = []
+    if cursor:
+        keyset = paging.decode_cursor(cursor, paging.KEYSET, len(ORDER_KEY))
+        where.append(paging.keyset_condition(ORDER_KEY, ph))
     clause = (" WHERE " + " AND ".join(where)) if where else ""
-    offset = (page - 1) * page_size
-    with _lock, get_conn() as conn:
+    offset = 0 if cursor else (page - 1) * page_size
+    with get_conn() as conn:  # Lectura sin lock (WAL / Postgres).
         cur = conn.cursor()
-        if db.is_postgres():
-            cur.execute(f"SELECT COUNT(*) FROM data_items{clause}", params)
-            total = cur.fetchone()[0]
-            cur.execute(
-                f"SELECT * FROM data_items{clause} ORDER BY created_at DESC LIMIT %s OFFSET %s",
-                params + [page_size, offset],
-            )
-        else:
-            cur.execute(f"SELECT COUNT(*) FROM data_items{clause}", params)
-            total = cur.fetchone()[0]
-            cur.execute(
-                f"SELECT * FROM data_items{clause} ORDER BY created_at DESC LIMIT ? OFFSET ?",
-                params + [page_size, offset],
-            )
-        items = [_row_to_dict(r) for r in cur.fetchall()]
-    return {"items": items, "total": total, "page": page, "page_size": page_size}
+        total = None
+        if with_total:  # Total del filtro, cacheado hasta la próxima escritura.
+            def count() -> int:
+                cur.execute(f"SELECT COUNT(*) AS total FROM data_items{count_clause}", params)
+                return cur.fetchone()["total"]  # Por nombre: las filas de Postgres son dicts.
+            total = paging.totals.get("data_items", (count_clause, tuple(params)), count)
+        cur.execute(
+            f"SELECT * FROM data_items{clause} ORDER BY created_at DESC, id DESC LIMIT {ph} OFFSET {ph}",
+            params + keyset + [page_size + 1, offset],
+        )
+        rows, next_cursor = paging.split_page(cur.fetchall(), page_size, lambda r: [r[c] for c in ORDER_KEY])
+        items = [_row_to_dict(r) for r in rows]
+    return {"items": items, "total": total, "page": page if not cursor else None, "page_size": page_size, "next_cursor": next_cursor}
+
+# Variantes async para routers `async def` (ver news_store).
+acreate_item = db.asyncify(create_item)
+aget_item = db.asyncify(get_item)
+aupdate_item = db.asyncify(update_item)
+adelete_item = db.asyncify(delete_item)
+asearch_items = db.asyncify(search_items)
 
 init_db()
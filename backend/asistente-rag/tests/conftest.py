@@ -0,0 +1,19 @@
+"""Aísla la suite de rag_api/news.db (versionado en git).
+
+Los stores ejecutan init_db() al importarse (WAL, tablas FTS5 y triggers): sin esto, cualquier
+test que los importe migraría y escribiría el archivo del repositorio. Pytest carga este
+conftest antes que los módulos de test, así NEWS_DB_PATH ya apunta a una copia temporal.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+_TRACKED_DB = os.path.join(os.path.dirname(__file__), "..", "rag_api", "news.db")
+
+if "NEWS_DB_PATH" not in os.environ:
+    _tmp = tempfile.mkdtemp(prefix="rag-tests-")
+    os.environ["NEWS_DB_PATH"] = os.path.join(_tmp, "news.db")
+    if os.path.exists(_TRACKED_DB):  # Misma base de partida (semillas) que la del repositorio.
+        shutil.copyfile(_TRACKED_DB, os.environ["NEWS_DB_PATH"])
+    atexit.register(shutil.rmtree, _tmp, True)
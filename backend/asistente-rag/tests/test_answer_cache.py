@@ -0,0 +1,42 @@
+from rag_api.services.answer_cache import SemanticAnswerCache, fragment_version
+
+F1 = {"id": "a", "texto": "Artículo 97 ..."}
+F2 = {"id": "b", "texto": "Artículo 98 ..."}
+
+
+def test_similar_question_hits_and_distinct_misses():
+    cache = SemanticAnswerCache(dim=3, max_entries=4, threshold=0.95)
+    cache.store([1, 0, 0], "respuesta 97", [F1])
+    hit = cache.lookup([0.99, 0.05, 0])
+    assert hit and hit["respuesta"] == "respuesta 97" and hit["fragmentos"] == [F1]
+    assert cache.lookup([0, 1, 0]) is None
+
+
+def test_lru_eviction_and_ttl():
+    cache = SemanticAnswerCache(dim=2, max_entries=1, ttl=60)
+    cache.store([1, 0], "x", [])
+    cache.store([0, 1], "y", [])
+    assert cache.lookup([1, 0]) is None and cache.stats()["evictions"] == 1
+    expired = SemanticAnswerCache(dim=2, max_entries=2, ttl=-1)
+    expired.store([1, 0], "x", [])
+    assert expired.lookup([1, 0]) is None and expired.stats()["expired"] == 1
+
+
+def test_invalidate_only_answers_using_changed_fragments():
+    cache = SemanticAnswerCache(dim=2, max_entries=4)
+    cache.store([1, 0], "usa a", [F1])
+    cache.store([0, 1], "usa b", [F2])
+    edited = {"a": "otra-version", "b": fragment_version(F2)}
+    assert cache.invalidate_changed(edited) == 1
+    assert cache.lookup([1, 0]) is None
+    assert cache.lookup([0, 1])["respuesta"] == "usa b"
+
+
+def test_reload_ignores_refs_owned_by_other_indexes():
+    cache = SemanticAnswerCache(dim=2, max_entries=4)
+    message = {"id": "msg:whatsapp:0:120", "texto": "aviso del grupo"}
+    cache.store([1, 0], "usa b y un mensaje", [F2, message])
+    docs = {"b": fragment_version(F2)}
+    assert cache.invalidate_changed(docs, owns=lambda fid: not fid.startswith("msg:")) == 0
+    assert cache.lookup([1, 0])["respuesta"] == "usa b y un mensaje"
+    assert cache.invalidate_changed(docs) == 1  # Sin `owns`, el mensaje cuenta como borrado.
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from rag_api.services.article_lookup import ArticleLookup, document_terms, fragment_keys, numeral
+
+ESTATUTO = os.path.join(os.path.dirname(__file__), "..", "clean_data", "output",
+                        "EstatutoUniversitario_UNSAAC_final_corrected.json")
+
+FRAGS = [
+    {"texto": "[Título: TÍTULO I DISPOSICIONES GENERALES] Artículo 1° La Universidad..."},
+    {"texto": "[Título: TÍTULO II DEL GOBIERNO | Capítulo: CAPÍTULO I: GOBIERNO DE LA UNIVERSIDAD] Artículo 2° ..."},
+    {"texto": "[Título: TÍTULO II DEL GOBIERNO | Capítulo: CAPÍTULO II: DE LA ASAMBLEA] Artículo 3° ..."},
+    {"texto": "[Título: TÍTULO V DEL DOCENTE | Capítulo: CAPÍTULO I: DEL DOCENTE] Artículo 97° Los docentes..."},
+    {"texto": "Resolución sin artículos que menciona el artículo 5 en el cuerpo."},
+]
+
+
+def test_numeral():
+    assert numeral("97") == 97
+    assert numeral("iv") == 4
+    assert numeral("XIV") == 14
+    assert numeral("civil") is None
+
+
+def test_fragment_keys_structured_and_text():
+    chunk = {"article_number": "Artículo 6°", "context": {"title": "TÍTULO IV DE LA INVESTIGACIÓN", "chapter": "CAPÍTULO II: X"}}
+    assert fragment_keys(chunk) == (6, 4, 2)
+    assert fragment_keys(FRAGS[3]) == (97, 5, 1)
+    assert fragment_keys(FRAGS[4]) == (None, None, None)  # Menciones en el cuerpo no cuentan.
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("¿Qué dice el artículo 97?", ("articulo", [3])),
+    ("art. 97 del estatuto", ("articulo", [3])),
+    ("Artículos 1 y 2", ("articulo", [0, 1])),
+    ("artículos 1 al 3", ("articulo", [0, 1, 2])),
+    ("capítulo II del título II", ("capitulo", [2])),
+    ("capítulo II", ("capitulo", [2])),  # Único: solo aparece en el título II.
+    ("título V", ("titulo", [3])),
+])
+def test_match(question, expected):
+    assert ArticleLookup(FRAGS).match(question) == expected
+
+
+@pytest.mark.parametrize("question", [
+    "requisitos de matrícula",
+    "artículo 500",
+    "capítulo I",  # Ambiguo: está en los títulos II y V.
+    "título profesional",
+])
+def test_no_match(question):
+    assert ArticleLookup(FRAGS).match(question) is None
+
+
+def test_articles_are_scoped_by_document():
+    frags = [
+        {"id": "477-RESOLUCIÓN 304#art-5", "article_number": "Artículo 5°"},
+        {"id": "EstatutoUniversitario_UNSAAC#art-5", "article_number": "Artículo 5°"},
+        {"id": "EstatutoUniversitario_UNSAAC#art-304", "article_number": "Artículo 304°"},
+    ]
+    assert document_terms("EstatutoUniversitario_UNSAAC") == {"estatuto", "universitario"}
+    lookup = ArticleLookup(frags)
+    assert len(lookup) == 3
+    assert lookup.match("¿qué dice el artículo 5?") == ("articulo", [1])  # Sin documento: el Estatuto.
+    assert lookup.match("artículo 5 de la resolución 304") == ("articulo", [0])
+    assert lookup.match("artículo 304") == ("articulo", [2])  # El número citado no nombra la resolución.
+
+
+def test_estatuto_chunks():
+    from clean_data.estatuto_utils import EstatutoProcessor
+    proc = EstatutoProcessor(ESTATUTO)
+    chunks = proc.data["chunks"]
+    rendered = ArticleLookup([{"texto": proc.format_article_for_rag(c)} for c in chunks])
+    structured = ArticleLookup(chunks)
+    assert len(rendered) == len(structured) == len(chunks)
+    kind, idxs = rendered.match("¿qué dice el artículo 97?")
+    assert kind == "articulo" and chunks[idxs[0]]["article_number"].startswith("Artículo 97")
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from rag_api.core import db, security
+from rag_api.routers import news, storage
+from rag_api.stores import news_store, storage_store
+
+
+def _app(tmp_path, monkeypatch):
+    monkeypatch.setenv("NEWS_DB_PATH", str(tmp_path / "t.db"))
+    monkeypatch.setattr(security, "ADMIN_TOKEN", "")
+    news_store.init_db()
+    storage_store.init_db()
+    app = FastAPI()
+    app.include_router(news.router)
+    app.include_router(storage.router)
+    return app
+
+
+def test_run_async_uses_db_executor():
+    calls = db.executor_stats()["calls"]
+    name = asyncio.run(db.run_async(lambda: threading.current_thread().name))
+    assert name.startswith("db")
+    assert db.executor_stats()["calls"] == calls + 1
+    assert db.executor_stats()["in_flight"] == 0
+
+
+def test_news_crud_async(tmp_path, monkeypatch):
+    client = TestClient(_app(tmp_path, monkeypatch))
+    payload = {"fecha": "2025-08-01", "titulo": "Matrícula abierta", "descripcionCorta": "corta",
+               "descripcionLarga": "larga", "autor": "yo", "categoria": ["Evento"]}
+    created = client.post("/news", json=payload).json()
+    nid = created["id"]
+    listed = client.get("/news", params={"q": "matrícula"}).json()
+    assert [n["id"] for n in listed["items"]] == [nid] and listed["total"] == 1
+    assert client.get(f"/news/{nid}").json()["vistas"] == 1  # Abrir la noticia suma una vista.
+    assert client.put(f"/news/{nid}", json={**payload, "titulo": "Matrícula cerrada"}).json()["titulo"] == "Matrícula cerrada"
+    assert client.delete(f"/news/{nid}").status_code == 200
+    assert client.get(f"/news/{nid}").status_code == 404
+
+
+def test_many_concurrent_requests_share_the_db_executor(tmp_path, monkeypatch):
+    app = _app(tmp_path, monkeypatch)
+    item = TestClient(app).post("/storage", json={"tipo": "faq", "data": {"q": "hola"}}).json()
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return await asyncio.gather(*(c.get(f"/storage/{item['id']}") for _ in range(200)))
+
+    before = db.executor_stats()["calls"]
+    responses = asyncio.run(burst())
+    assert all(r.status_code == 200 for r in responses)
+    st = db.executor_stats()
+    assert st["calls"] - before == 200
+    assert st["max_in_flight"] >= st["workers"]  # Las peticiones esperan como corrutinas, no como hilos.
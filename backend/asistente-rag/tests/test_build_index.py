@@ -0,0 +1,140 @@
+import glob
+import os
+
+import numpy as np
+
+from rag_api.services.article_lookup import ArticleLookup
+from vector_store import build_index, embedding_store
+from vector_store.vector_cache import VectorCache, content_key
+
+OUTPUT = os.path.join(os.path.dirname(__file__), "..", "clean_data", "output")
+
+
+def test_select_latest_keeps_one_stage_per_document():
+    picked = [os.path.basename(p) for p in build_index.select_latest(glob.glob(os.path.join(OUTPUT, "*.json")))]
+    assert picked == ["477-RESOLUCIÓN 304_improved_cleaned.json", "EstatutoUniversitario_UNSAAC_final_corrected.json"]
+
+
+def test_collect_fragments_from_clean_data():
+    frags = build_index.collect_fragments(build_index.select_latest(glob.glob(os.path.join(OUTPUT, "*.json"))))
+    estatuto = [f for f in frags if f["source"].startswith("EstatutoUniversitario")]
+    assert len(estatuto) == 260
+    assert estatuto[0]["texto"].startswith("[Título: TÍTULO I")
+    assert len({f["id"] for f in frags}) == len(frags)
+    assert len({f["texto"] for f in frags}) == len(frags)  # Sin duplicados entre archivos.
+    assert all(f["content_hash"] == content_key(f["texto"], build_index.DEFAULT_MODEL) for f in frags)
+    assert len(ArticleLookup(frags)) == 260
+
+
+def test_build_writes_loadable_store(tmp_path):
+    def fake_embed(texts, model_name, **kw):
+        rng = np.random.default_rng(0)
+        return rng.standard_normal((len(texts), 8)).astype(np.float32)
+
+    paths = glob.glob(os.path.join(OUTPUT, "EstatutoUniversitario_UNSAAC_final_corrected.json"))
+    header = build_index.build(paths, str(tmp_path), "m", embed=fake_embed, cache_path=None, backend="torch")
+    frags, matrix, h = embedding_store.load_store(str(tmp_path), expected_model="m")
+    assert h["count"] == header["count"] == len(frags) == matrix.shape[0]
+    assert h["sources"] == [os.path.basename(p) for p in paths]
+    np.testing.assert_allclose(np.linalg.norm(matrix, axis=1), 1.0, rtol=1e-5)
+
+
+ESTATUTO = os.path.join(OUTPUT, "EstatutoUniversitario_UNSAAC_final_corrected.json")
+
+
+class CountingEmbed:
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts, model_name, **kw):
+        self.texts.extend(texts)
+        return np.stack([np.frombuffer(content_key(t, model_name).encode()[:8], dtype=np.uint8).astype(np.float32) + 1
+                         for t in texts])
+
+
+def test_incremental_rebuild_only_embeds_changes(tmp_path):
+    import json
+    src = tmp_path / "estatuto.json"
+    data = json.load(open(ESTATUTO, encoding="utf-8"))
+    src.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    out, cache = str(tmp_path / "idx"), str(tmp_path / "cache.sqlite3")
+
+    embed = CountingEmbed()
+    first = build_index.build([str(src)], out, "m", embed=embed, cache_path=cache)
+    assert first["embedded"] == 260 and first["reused"] == 0
+
+    embed = CountingEmbed()
+    again = build_index.build([str(src)], out, "m", embed=embed, cache_path=cache)
+    assert again["unchanged"] and embed.texts == []
+
+    data["chunks"][96]["article_content"] += " (modificado)"  # Un artículo editado.
+    del data["chunks"][10]  # Y uno eliminado.
+    src.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    embed = CountingEmbed()
+    third = build_index.build([str(src)], out, "m", embed=embed, cache_path=cache, prune_cache=True)
+    assert (third["embedded"], third["reused"], third["removed"]) == (1, 258, 2)
+    assert "(modificado)" in embed.texts[0]
+    assert len(VectorCache(cache)) == 259
+    frags, matrix, _ = embedding_store.load_store(out, expected_model="m")
+    expected = CountingEmbed()([f["texto"] for f in frags], "m")
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    np.testing.assert_allclose(matrix, expected, rtol=1e-5)
+
+
+def test_reuses_previous_index_without_cache(tmp_path):
+    import json
+    src = tmp_path / "estatuto.json"
+    data = json.load(open(ESTATUTO, encoding="utf-8"))
+    src.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    out = str(tmp_path / "idx")
+    build_index.build([str(src)], out, "m", embed=CountingEmbed(), cache_path=None)
+    data["chunks"][0]["article_content"] += " (modificado)"
+    src.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    embed = CountingEmbed()
+    header = build_index.build([str(src)], out, "m", embed=embed, cache_path=None)
+    assert (header["embedded"], header["reused"]) == (1, 259)
+    embed = CountingEmbed()
+    header = build_index.build([str(src)], out, "m2", embed=embed, cache_path=None)  # Otro modelo: todo nuevo.
+    assert header["embedded"] == 260 and len(embed.texts) == 260
+
+
+def test_fragment_ids_survive_insertions_and_deletions(tmp_path):
+    import json
+    data = json.load(open(ESTATUTO, encoding="utf-8"))
+    src = tmp_path / "estatuto.json"
+    src.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    before = {f["content_hash"]: f["id"] for f in build_index.collect_fragments([str(src)])}
+    assert before[next(iter(before))] == "EstatutoUniversitario_UNSAAC#art-1"  # Documento de origen, no el archivo.
+
+    del data["chunks"][10]
+    data["chunks"].insert(0, {"title": "Disposición previa", "content": "Texto agregado al inicio del documento."})
+    data["chunks"].append({**data["chunks"][-1], "article_content": "Segunda parte del mismo artículo."})
+    src.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    after = build_index.collect_fragments([str(src)])
+    assert after[0]["id"] == "EstatutoUniversitario_UNSAAC#disposicion-previa"
+    assert after[-1]["id"] == after[-2]["id"] + ".2"  # Misma ancla: sub-índice.
+    assert all(before[f["content_hash"]] == f["id"] for f in after if f["content_hash"] in before)
+
+
+def test_switching_backend_reembeds(tmp_path):
+    out, cache = str(tmp_path / "idx"), str(tmp_path / "cache.sqlite3")
+    build_index.build([ESTATUTO], out, "m", embed=CountingEmbed(), cache_path=cache, backend="torch")
+    embed = CountingEmbed()
+    header = build_index.build([ESTATUTO], out, "m", embed=embed, cache_path=cache, backend="onnx-int8")
+    assert not header["unchanged"] and header["embedded"] == 260 and header["backend"] == "onnx-int8"
+    embed = CountingEmbed()
+    again = build_index.build([ESTATUTO], out, "m", embed=embed, cache_path=cache, backend="onnx-int8")
+    assert again["unchanged"] and embed.texts == []
+    back = build_index.build([ESTATUTO], out, "m", embed=CountingEmbed(), cache_path=cache, backend="torch")
+    assert (back["embedded"], back["reused"]) == (0, 260)  # Vectores torch siguen en el cache con su propia clave.
+
+
+def test_fragment_ids_do_not_depend_on_pipeline_stage():
+    ids = {}
+    for stage in ("EstatutoUniversitario_UNSAAC_final_corrected.json", "EstatutoUniversitario_UNSAAC_optimized_final.json"):
+        frags = build_index.collect_fragments([os.path.join(OUTPUT, stage)])
+        ids[stage] = {f["article_number"]: f["id"] for f in frags if f.get("article_number")}
+    final, optimized = ids.values()
+    shared = set(final) & set(optimized)
+    assert shared and all(final[a] == optimized[a] for a in shared)
+    assert build_index.document_stem("x/doc_legal_cleaned.json", {}) == "doc"
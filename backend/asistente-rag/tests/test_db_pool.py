@@ -0,0 +1,77 @@
+import threading
+
+from rag_api.core import db
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.setenv("NEWS_DB_PATH", str(tmp_path / "t.db"))
+    with db.get_connection() as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS t (x INTEGER)")
+        conn.commit()
+
+
+def test_sqlite_connection_is_reused_per_thread(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    with db.get_connection() as a:
+        pass
+    with db.get_connection() as b:
+        pass
+    assert a is b
+    other = []
+    t = threading.Thread(target=lambda: other.append(db.get_connection().__enter__()))
+    t.start(); t.join()
+    assert other[0] is not a
+    assert db.pool_stats()["backend"] == "sqlite"
+
+
+def test_uncommitted_work_is_discarded_but_nested_blocks_are_safe(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    with db.get_connection() as conn:
+        conn.execute("INSERT INTO t VALUES (1)")  # Sin commit: se descarta al salir.
+    with db.get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+        conn.execute("INSERT INTO t VALUES (2)")
+        with db.get_connection() as inner:  # Un with anidado no deshace la transacción externa.
+            inner.execute("SELECT 1")
+        assert conn.in_transaction
+        conn.commit()
+    with db.get_connection() as conn:
+        assert [r[0] for r in conn.execute("SELECT x FROM t")] == [2]
+
+
+def test_writes_are_serialized_and_committed(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+
+    def bump():
+        for _ in range(25):
+            with db.write_connection() as conn:
+                (x,) = conn.execute("SELECT COALESCE(MAX(x), 0) FROM t").fetchone()
+                conn.execute("INSERT INTO t VALUES (?)", (x + 1,))  # Leer-modificar-escribir: solo es correcto con un escritor.
+
+    threads = [threading.Thread(target=bump) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    with db.get_connection() as conn:
+        assert tuple(conn.execute("SELECT COUNT(*), MAX(x) FROM t").fetchone()) == (100, 100)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_failed_write_rolls_back_and_reads_do_not_wait_for_writer(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    try:
+        with db.write_connection() as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    with db.write_connection() as conn:
+        conn.execute("INSERT INTO t VALUES (2)")
+        seen = []  # Mientras el escritor tiene su turno, otro hilo lee lo ya confirmado.
+        reader = threading.Thread(target=lambda: seen.append(
+            db.get_connection().__enter__().execute("SELECT x FROM t").fetchall()))
+        reader.start(); reader.join(timeout=2)
+        assert seen == [[]]
+    with db.get_connection() as conn:
+        assert [r[0] for r in conn.execute("SELECT x FROM t")] == [2]
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import numpy as np
+from rag_api.services.embedder import EmbeddingService
+from rag_api.services.embedding_cache import EmbeddingCache
+
+
+def test_concurrent_requests_are_batched_and_cached():
+    batches = []
+    release = threading.Event()
+
+    def encode_batch(texts):
+        release.wait(1)  # El primer lote espera: el resto de peticiones se acumula en la cola.
+        batches.append(list(texts))
+        return np.array([[len(t), 1.0] for t in texts])
+
+    service = EmbeddingService(encode_batch, cache=EmbeddingCache("m"), max_batch=16, max_wait_ms=20)
+
+    async def run():
+        tasks = [asyncio.ensure_future(service.encode_async(f"pregunta {i}")) for i in range(10)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(run())
+    assert [r[0] for r in results] == [len(f"pregunta {i}") for i in range(10)]
+    assert len(batches) < 10 and sum(len(b) for b in batches) == 10
+    assert service.encode("Pregunta 3")[0] == len("pregunta 3")  # acierto de cache, sin nuevo lote
+    assert sum(len(b) for b in batches) == 10
+    service.close()
+
+
+def test_encode_error_propagates_to_callers():
+    def boom(texts):
+        raise RuntimeError("modelo caído")
+
+    service = EmbeddingService(boom, max_wait_ms=1)
+    try:
+        service.encode("hola", timeout=2)
+    except RuntimeError as e:
+        assert "modelo caído" in str(e)
+    else:
+        raise AssertionError("se esperaba RuntimeError")
+    finally:
+        service.close()
+
+
+def test_encode_many_shares_workers_and_skips_cache():
+    batches = []
+
+    def encode_batch(texts):
+        batches.append(list(texts))
+        return np.array([[len(t), 1.0] for t in texts])
+
+    cache = EmbeddingCache("m")
+    service = EmbeddingService(encode_batch, cache=cache, max_batch=4, max_wait_ms=20, queue_max=2)
+    texts = [f"mensaje {i}" for i in range(10)]
+    vecs = service.encode_many(texts, timeout=5)  # Cola más chica que el lote: espera, no falla.
+    assert vecs.shape == (10, 2) and vecs[:, 0].tolist() == [len(t) for t in texts]
+    assert max(len(b) for b in batches) <= 4
+    assert cache.peek("mensaje 0") is None  # Los mensajes no ocupan el cache de consultas.
+    assert service.stats()["items"] == 10
+    service.close()
@@ -0,0 +1,49 @@
+"""Paridad del backend ONNX int8 contra PyTorch sobre los chunks del Estatuto.
+
+Se salta si no están instalados sentence-transformers y optimum/onnxruntime (o si no hay red
+para descargar el modelo la primera vez).
+"""
+import os
+import numpy as np
+import pytest
+
+from rag_api.services import embedding_backends
+
+ESTATUTO = os.path.join(os.path.dirname(__file__), "..", "clean_data", "output",
+                        "EstatutoUniversitario_UNSAAC_final_corrected.json")
+
+def _estatuto_texts(limit=128):
+    from clean_data.estatuto_utils import EstatutoProcessor
+    proc = EstatutoProcessor(ESTATUTO)
+    return [proc.format_article_for_rag(c) for c in proc.data["chunks"][:limit]]
+
+def test_quantization_target_is_known():
+    assert embedding_backends.quantization_target() in ("arm64", "avx512_vnni", "avx512", "avx2")
+
+def test_unknown_backend_rejected():
+    pytest.importorskip("sentence_transformers")
+    with pytest.raises(ValueError):
+        embedding_backends.load_embedding_model("all-MiniLM-L6-v2", backend="tensorrt")
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_onnx_parity_with_torch(backend):
+    pytest.importorskip("sentence_transformers")
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("optimum")
+    texts = _estatuto_texts()
+    try:
+        ref, _ = embedding_backends.load_embedding_model("all-MiniLM-L6-v2", backend="torch")
+        alt, active = embedding_backends.load_embedding_model("all-MiniLM-L6-v2", backend=backend)
+    except OSError as e:  # Sin red / sin modelo en cache local.
+        pytest.skip(f"modelo no disponible: {e}")
+    assert active == backend
+    a = ref.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    b = alt.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    cos = np.sum(a * b, axis=1)
+    assert cos.mean() > 0.99
+    assert cos.min() > 0.97
+    # El orden de recuperación debe mantenerse: top-4 de cada chunk contra todos los demás.
+    top_ref = np.argsort(-(a @ a.T), axis=1)[:, :4]
+    top_alt = np.argsort(-(b @ a.T), axis=1)[:, :4]
+    overlap = np.mean([len(set(r) & set(q)) / 4 for r, q in zip(top_ref, top_alt)])
+    assert overlap > 0.9
@@ -0,0 +1,26 @@
+import numpy as np
+from rag_api.services.embedding_cache import EmbeddingCache, normalize_text
+
+
+def test_normalize_text_collapses_near_identical_questions():
+    assert normalize_text("  ¿Requisitos de  Matrícula? ") == normalize_text("requisitos de matricula")
+
+
+def test_lru_and_persistent_tier(tmp_path):
+    calls = []
+
+    def encode(text):
+        calls.append(text)
+        return np.ones(3) * len(calls)
+
+    db = str(tmp_path / "emb.db")
+    cache = EmbeddingCache("m", max_entries=1, db_path=db)
+    cache.get_or_compute("artículo 97", encode)
+    cache.get_or_compute("¿Artículo 97?", encode)
+    assert len(calls) == 1 and cache.stats()["hits"] == 1
+    cache.get_or_compute("otra pregunta", encode)  # expulsa "artículo 97" de memoria
+    restarted = EmbeddingCache("m", max_entries=8, db_path=db)
+    vec = restarted.get_or_compute("articulo 97", encode)
+    assert len(calls) == 2 and vec.tolist() == [1.0, 1.0, 1.0]
+    assert restarted.stats()["disk_hits"] == 1
+    assert EmbeddingCache("otro-modelo", db_path=db).get("articulo 97") is None
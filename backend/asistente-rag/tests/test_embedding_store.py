@@ -0,0 +1,55 @@
+import json
+import numpy as np
+import pytest
+from vector_store import embedding_store
+
+
+def test_convert_legacy_json_and_load_memmap(tmp_path):
+    legacy = [
+        {"texto": "uno", "embedding": [3.0, 4.0]},
+        {"texto": "sin vector"},
+        {"id": "x", "texto": "dos", "embedding": [0.0, 2.0]},
+    ]
+    src = tmp_path / "fragments_embedded.json"
+    src.write_text(json.dumps(legacy), encoding="utf-8")
+    header = embedding_store.convert_legacy_json(str(src), str(tmp_path / "idx"), "m")
+    assert header["count"] == 2 and header["dim"] == 2 and header["model"] == "m"
+    frags, matrix, _ = embedding_store.load_store(str(tmp_path / "idx"), expected_model="m")
+    assert isinstance(matrix, np.memmap) and matrix.dtype == np.float32
+    assert np.allclose(matrix, [[0.6, 0.8], [0.0, 1.0]])
+    assert frags == [{"texto": "uno", "id": "0"}, {"id": "x", "texto": "dos"}]
+
+
+def test_load_rejects_other_model(tmp_path):
+    embedding_store.save_store(str(tmp_path), np.eye(2), [{"texto": "a"}, {"texto": "b"}], "m1")
+    with pytest.raises(embedding_store.EmbeddingStoreError):
+        embedding_store.load_store(str(tmp_path), expected_model="m2")
+
+
+def test_meta_points_to_its_own_generation(tmp_path):
+    store = str(tmp_path)
+    for n in (1, 2, 3):
+        embedding_store.save_store(store, np.eye(n, 4), [{"texto": str(i)} for i in range(n)], "m")
+    header = embedding_store.read_header(store)
+    files = sorted(p.name for p in tmp_path.glob("fragments.*.f32.npy"))
+    assert len(files) == 2 and header["vectors_file"] in files  # Actual + anterior.
+    frags, matrix, h = embedding_store.load_store(store)
+    assert len(frags) == matrix.shape[0] == 3 and h["generation"] == header["generation"]
+
+    old_meta = (tmp_path / "fragments.meta.json").read_text(encoding="utf-8")
+    embedding_store.save_store(store, np.eye(5, 4), [{"texto": str(i)} for i in range(5)], "m")
+    (tmp_path / "fragments.meta.json").write_text(old_meta, encoding="utf-8")  # Lector con el meta anterior.
+    frags, matrix, _ = embedding_store.load_store(store)
+    assert len(frags) == matrix.shape[0] == 3
+
+
+def test_loads_store_without_generation(tmp_path):
+    np.save(tmp_path / "fragments.f32.npy", np.eye(2, dtype=np.float32))
+    meta = {"header": {"format_version": 1, "model": "m", "dim": 2, "count": 2, "normalized": True},
+            "fragments": [{"texto": "a"}, {"texto": "b"}]}
+    (tmp_path / "fragments.meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    assert embedding_store.exists(str(tmp_path))
+    frags, matrix, _ = embedding_store.load_store(str(tmp_path))
+    assert matrix.shape == (2, 2)
+    embedding_store.save_store(str(tmp_path), np.eye(3, 2), [{"texto": "x"}] * 3, "m")
+    assert (tmp_path / "fragments.f32.npy").exists()  # Generación anterior: se conserva una vez más.
@@ -0,0 +1,27 @@
+import numpy as np
+from rag_api.services.fragment_index import FragmentIndex, top_k
+
+
+def test_search_matches_legacy_cosine_ranking():
+    rng = np.random.default_rng(0)
+    vecs = rng.standard_normal((500, 384))
+    q = rng.standard_normal(384)
+    legacy = vecs @ q / (np.linalg.norm(vecs, axis=1) * np.linalg.norm(q))
+    expected = np.argsort(legacy)[-4:][::-1].tolist()
+    index = FragmentIndex([{"texto": str(i)} for i in range(500)], vecs)
+    idxs, scores = index.search(q, 4)
+    assert idxs == expected
+    assert np.allclose(scores, legacy[expected], atol=1e-5)
+    assert index.matrix.dtype == np.float32 and index.matrix.flags["C_CONTIGUOUS"]
+
+
+def test_from_fragments_skips_rows_without_embedding():
+    frags = [{"texto": "a", "embedding": [1.0, 0.0]}, {"texto": "b"}, {"texto": "c", "embedding": [0.0, 2.0]}]
+    index = FragmentIndex.from_fragments(frags, dim=2)
+    assert [f["texto"] for f in index.fragments] == ["a", "c"]
+    assert index.search([0.0, 1.0], 1)[0] == [1]
+
+
+def test_top_k_handles_small_inputs():
+    assert top_k(np.array([0.1, 0.9, 0.5]), 10).tolist() == [1, 2, 0]
+    assert top_k(np.array([]), 3).tolist() == []
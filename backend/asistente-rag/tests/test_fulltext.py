@@ -0,0 +1,53 @@
+from rag_api.stores import fulltext, news_store, oportunidades_store
+
+
+def _news(nid, titulo, corta="corta", larga="larga"):
+    return {"id": nid, "fecha": "2025-08-01", "titulo": titulo, "descripcionCorta": corta,
+            "descripcionLarga": larga, "autor": "yo", "categoria": ["Evento"]}
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.setenv("NEWS_DB_PATH", str(tmp_path / "t.db"))
+    news_store.init_db()
+    oportunidades_store.init_db()
+
+
+def test_stem_and_match_expression():
+    assert fulltext.stem("becas") == fulltext.stem("beca") == "bec"
+    assert fulltext.stem("inscripciones") == fulltext.stem("inscripcion")
+    assert fulltext.terms("¿Cuáles son las BECAS de matrícula?") == ["cual", "son", "bec", "matricul"]
+    assert fulltext.fts5_match("becas 2025") == '"bec"* AND "2025"*'
+    assert fulltext.fts5_match("de la") is None  # Solo stopwords: el store usa LIKE.
+
+
+def test_news_search_ranks_title_matches_and_highlights(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    news_store.upsert_news(_news("a", "Resultados del concurso", larga="Se habló de becas al final."))
+    news_store.upsert_news(_news("b", "Becas de matrícula 2025", larga="Convocatoria abierta."))
+    news_store.upsert_news(_news("c", "Laboratorio inaugurado"))
+    res = news_store.search_news(q="beca")
+    assert [n["id"] for n in res["items"]] == ["b", "a"] and res["total"] == 2
+    assert "<mark>Becas</mark>" in res["items"][0]["snippet"]
+    assert news_store.search_news(q="MATRICULA")["items"][0]["id"] == "b"  # Sin tildes ni mayúsculas.
+
+
+def test_index_follows_upsert_and_delete(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    news_store.upsert_news(_news("a", "Becas de investigación"))
+    news_store.upsert_news({**_news("a", "Prácticas preprofesionales"), "vistas": 3})
+    assert news_store.search_news(q="becas")["total"] == 0
+    assert [n["id"] for n in news_store.search_news(q="preprofesional")["items"]] == ["a"]
+    news_store.increment_views("a")
+    news_store.delete_news("a")
+    assert news_store.search_news(q="preprofesional")["total"] == 0
+
+
+def test_oportunidades_full_text_with_filters(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    base = {"descripcion": "Programa para estudiantes de pregrado.", "fecha_publicacion": "2025-08-01"}
+    oportunidades_store.upsert({**base, "id": "o1", "titulo": "Beca de movilidad", "tipo": "beca"})
+    oportunidades_store.upsert({**base, "id": "o2", "titulo": "Práctica en minería", "tipo": "practica"})
+    assert oportunidades_store.search(q="estudiante")["total"] == 2
+    res = oportunidades_store.search(q="estudiantes", tipo="practica")
+    assert [o["id"] for o in res["items"]] == ["o2"] and "<mark>" in res["items"][0]["snippet"]
+    assert oportunidades_store.search(q="de")["total"] == 2  # Fallback LIKE.
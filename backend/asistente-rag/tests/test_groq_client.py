@@ -0,0 +1,51 @@
+import asyncio
+import httpx
+from rag_api.services import groq_client
+
+
+def _use_transport(handler):
+    groq_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_chat_completion_retries_then_ok(monkeypatch):
+    monkeypatch.setattr(groq_client, "GROQ_BACKOFF_BASE", 0.001)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(503, text="busy")
+        return httpx.Response(200, json={"choices": [{"message": {"content": "hola"}}]})
+
+    _use_transport(handler)
+    answer, error = asyncio.run(groq_client.chat_completion("https://groq.test/chat", "k", {}))
+    assert answer == "hola" and error is None
+    assert len(calls) == 2
+
+
+def test_chat_completion_no_retry_on_client_error():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400, text="bad request")
+
+    _use_transport(handler)
+    answer, error = asyncio.run(groq_client.chat_completion("https://groq.test/chat", "k", {}))
+    assert answer is None and error == "bad request"
+    assert len(calls) == 1
+
+
+def test_stream_chat_completion_yields_tokens():
+    body = (
+        'data: {"choices":[{"delta":{"role":"assistant"}}]}\n\n'
+        'data: {"choices":[{"delta":{"content":"Hola"}}]}\n\n'
+        'data: {"choices":[{"delta":{"content":" mundo"}}]}\n\n'
+        'data: [DONE]\n\n'
+    )
+    _use_transport(lambda request: httpx.Response(200, text=body))
+
+    async def collect():
+        return [t async for t in groq_client.stream_chat_completion("https://groq.test/chat", "k", {})]
+
+    assert asyncio.run(collect()) == ["Hola", " mundo"]
@@ -0,0 +1,80 @@
+import numpy as np
+
+from rag_api.services.fragment_index import FragmentIndex
+from rag_api.services.index_holder import IndexHolder
+from vector_store import embedding_store
+
+
+def _store(path, n, seed):
+    rng = np.random.default_rng(seed)
+    frags = [{"id": f"f{i}", "texto": f"fragmento {seed}-{i}"} for i in range(n)]
+    embedding_store.save_store(str(path), rng.standard_normal((n, 8)).astype(np.float32), frags, "m")
+
+
+def _holder(path, on_swap=None):
+    def load():
+        frags, matrix, _ = embedding_store.load_store(str(path), expected_model="m")
+        return FragmentIndex(frags, matrix, normalized=True, kind="flat", params={})
+    return IndexHolder(load, watch_paths=[embedding_store.vectors_path(str(path)),
+                                          embedding_store.meta_path(str(path))], on_swap=on_swap)
+
+
+def test_reload_swaps_and_old_snapshot_stays_usable(tmp_path):
+    _store(tmp_path, 5, seed=1)
+    swaps = []
+    holder = _holder(tmp_path, on_swap=lambda old, new: swaps.append((len(old), len(new))))
+    in_flight = holder.current()  # Petición en curso.
+    _store(tmp_path, 7, seed=2)
+    assert holder.changed()
+    result = holder.reload(force=False)
+    assert result["reloaded"] and result["version"] == 2
+    assert len(holder.current()) == 7
+    assert swaps == [(5, 7)]
+    idxs, _ = in_flight.search(np.ones(8, dtype=np.float32), 2)  # El memmap viejo sigue legible.
+    assert all(in_flight.fragments[i]["texto"].startswith("fragmento 1-") for i in idxs)
+
+
+def test_reload_without_changes_is_noop(tmp_path):
+    _store(tmp_path, 3, seed=1)
+    holder = _holder(tmp_path)
+    assert not holder.changed()
+    assert holder.reload(force=False) == {"reloaded": False, "version": 1}
+
+
+def test_failed_load_keeps_current(tmp_path):
+    _store(tmp_path, 3, seed=1)
+    holder = _holder(tmp_path)
+    before = holder.current()
+    with open(embedding_store.meta_path(str(tmp_path)), "w") as f:
+        f.write("{")  # Metadatos corruptos.
+    result = holder.reload()
+    assert not result["reloaded"] and "error" in result
+    assert holder.current() is before
+    assert holder.stats()["failures"] == 1
+    assert holder.changed()  # La firma no se actualiza: se reintenta en el próximo sondeo.
+
+
+def test_failing_on_swap_is_recorded_and_watch_keeps_reloading(tmp_path):
+    import asyncio
+
+    def boom(old, new):
+        raise RuntimeError("hook roto")
+
+    _store(tmp_path, 3, seed=1)
+    holder = _holder(tmp_path, on_swap=boom)
+
+    async def run():
+        task = asyncio.ensure_future(holder.watch(interval=0.01))
+        for n, seed in ((4, 2), (6, 3)):
+            _store(tmp_path, n, seed=seed)
+            for _ in range(200):
+                await asyncio.sleep(0.01)
+                if len(holder.current()) == n:
+                    break
+        task.cancel()
+        return task
+
+    task = asyncio.run(run())
+    assert len(holder.current()) == 6 and holder.version == 3  # El vigilante siguió vivo tras el primer fallo.
+    assert holder.stats()["failures"] == 2 and "hook roto" in holder.stats()["last_error"]
+    assert task.cancelled()
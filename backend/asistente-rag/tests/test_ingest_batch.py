@@ -0,0 +1,90 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from rag_api.routers import ingest
+from rag_api.services.ingest_writer import GroupCommitWriter, IngestOverloaded
+
+
+@pytest.fixture
+def writer(tmp_path):
+    w = GroupCommitWriter(str(tmp_path), flush_records=2, flush_ms=0, fsync="none")
+    yield w
+    w.close()
+
+
+def _client(writer):
+    app = FastAPI()
+    app.include_router(ingest.build_router(writer))
+    return TestClient(app)
+
+
+def _msg(i, platform="whatsapp"):
+    return {"platform": platform, "text": f"mensaje {i}", "ts": float(i)}
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_json_array_is_written(writer, tmp_path):
+    r = _client(writer).post("/ingest/messages/batch", content=json.dumps([_msg(i) for i in range(5)]))
+    assert r.status_code == 200
+    assert r.json() == {"status": "ok", "accepted": 5, "rejected": 0, "errors": []}
+    assert [m["text"] for m in _lines(tmp_path / "whatsapp.jsonl")] == [f"mensaje {i}" for i in range(5)]
+
+
+def test_ndjson_without_trailing_newline(writer, tmp_path):
+    body = "\n".join(json.dumps(_msg(i, "telegram")) for i in range(3))  # Última línea sin \n.
+    r = _client(writer).post("/ingest/messages/batch", content=body, headers={"content-type": "application/x-ndjson"})
+    assert r.status_code == 200 and r.json()["accepted"] == 3
+    assert len(_lines(tmp_path / "telegram.jsonl")) == 3
+
+
+def test_array_reports_invalid_items_by_position(writer):
+    items = [_msg(0), {"platform": "bad name!", "text": "x"}, _msg(2), {"text": "sin plataforma"}]
+    r = _client(writer).post("/ingest/messages/batch", content=json.dumps(items))
+    body = r.json()
+    assert r.status_code == 200
+    assert body["accepted"] == 2 and body["rejected"] == 2
+    assert [e["item"] for e in body["errors"]] == [1, 3]  # Posición 0-based en el arreglo.
+
+
+def test_ndjson_reports_invalid_lines_by_number(writer):
+    body = "\n".join([json.dumps(_msg(0)), "", "{no es json", json.dumps(_msg(3))]) + "\n"
+    r = _client(writer).post("/ingest/messages/batch", content=body)
+    data = r.json()
+    assert data["accepted"] == 2 and data["rejected"] == 1
+    assert data["errors"][0]["item"] == 3  # Número de línea 1-based (la línea en blanco cuenta).
+
+
+def test_non_array_json_is_400(writer):
+    client = _client(writer)
+    assert client.post("/ingest/messages/batch", content='"texto suelto"').status_code == 400
+    assert client.post("/ingest/messages/batch", content="42").status_code == 400
+    r = client.post("/ingest/messages/batch", content="[" + json.dumps(_msg(0)))  # Arreglo sin cerrar.
+    assert r.status_code == 400 and r.json()["detail"].startswith("JSON inválido")
+
+
+@pytest.mark.parametrize("ndjson", [False, True])
+def test_overload_waits_inflight_and_reports_last_item(writer, tmp_path, monkeypatch, ndjson):
+    submit, calls = writer.submit, []
+
+    def flaky_submit(records):  # Tercer tramo: cola llena.
+        calls.append(len(records))
+        if len(calls) == 3:
+            raise IngestOverloaded("cola de ingesta llena")
+        return submit(records)
+
+    monkeypatch.setattr(writer, "submit", flaky_submit)
+    msgs = [_msg(i) for i in range(6)]
+    body = "\n".join(json.dumps(m) for m in msgs) if ndjson else json.dumps(msgs)
+    r = _client(writer).post("/ingest/messages/batch", content=body)
+    assert r.status_code == 503
+    detail = r.json()["detail"]
+    assert detail["accepted"] == 4
+    assert detail["last_item"] == (4 if ndjson else 3)  # Línea 1-based / posición 0-based del 4.º mensaje.
+    assert len(_lines(tmp_path / "whatsapp.jsonl")) == 4  # Lo confirmado ya está en disco al responder.
@@ -0,0 +1,68 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from rag_api.services.ingest_writer import GroupCommitWriter, IngestOverloaded
+
+
+def _msgs(n, platform="whatsapp"):
+    return [{"platform": platform, "text": f"mensaje {i}", "ts": float(i)} for i in range(n)]
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_concurrent_submissions_share_commits(tmp_path):
+    writer = GroupCommitWriter(str(tmp_path), flush_records=100, flush_ms=50)
+
+    async def run():
+        return await asyncio.gather(*(writer.write_async(_msgs(1) + _msgs(1, "telegram")) for _ in range(40)))
+
+    assert asyncio.run(run()) == [2] * 40
+    st = writer.stats()
+    assert st["records"] == 80 and st["commits"] < 40
+    assert st["fsyncs"] >= st["commits"]  # Política "commit": cada commit sincroniza sus archivos.
+    writer.close()
+    assert len(_lines(tmp_path / "whatsapp.jsonl")) == 40
+    assert len(_lines(tmp_path / "telegram.jsonl")) == 40
+
+
+def test_flush_records_bounds_commit_size(tmp_path):
+    writer = GroupCommitWriter(str(tmp_path), flush_records=10, flush_ms=200, fsync="none")
+    futs = [writer.submit(_msgs(4)) for _ in range(10)]
+    assert sum(f.result(timeout=5) for f in futs) == 40
+    writer.close()
+    st = writer.stats()
+    assert st["max_commit_seen"] <= 12 and st["fsyncs"] == 0
+    assert [r["text"] for r in _lines(tmp_path / "whatsapp.jsonl")] == [f"mensaje {i}" for i in range(4)] * 10
+
+
+def test_interval_policy_defers_fsync(tmp_path):
+    writer = GroupCommitWriter(str(tmp_path), flush_ms=0, fsync="interval", fsync_interval_s=60)
+    for _ in range(5):
+        writer.write(_msgs(2))
+    assert writer.stats()["commits"] == 5 and writer.stats()["fsyncs"] == 0
+    writer.close()  # Al cerrar se sincroniza lo pendiente.
+    assert len(_lines(tmp_path / "whatsapp.jsonl")) == 10
+
+
+def test_full_queue_rejects_and_bad_policy_fails(tmp_path):
+    writer = GroupCommitWriter(str(tmp_path), flush_ms=0, queue_max=1)
+    entered, gate, commit = threading.Event(), threading.Event(), writer._commit
+    writer._commit = lambda group: (entered.set(), gate.wait(5), commit(group))  # Disco "lento".
+    first = writer.submit(_msgs(1))
+    assert entered.wait(5)  # El escritor tomó el primero y quedó bloqueado.
+    second = writer.submit(_msgs(1))
+    with pytest.raises(IngestOverloaded):
+        writer.submit(_msgs(3))
+    gate.set()
+    assert first.result(timeout=5) == second.result(timeout=5) == 1
+    assert writer.stats()["rejected"] == 3
+    assert writer.submit([]).result() == 0
+    writer.close()
+    with pytest.raises(ValueError):
+        GroupCommitWriter(str(tmp_path), fsync="siempre")
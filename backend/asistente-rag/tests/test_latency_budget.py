@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+
+from rag_api.services import latency_budget
+from rag_api.services.latency_budget import LatencyBudget
+
+async def _after(seconds, value):
+    await asyncio.sleep(seconds)
+    return value
+
+def test_fast_stage_returns_result():
+    async def run():
+        budget = LatencyBudget(total_ms=500)
+        return await budget.wait(asyncio.ensure_future(_after(0.01, "ok")), "t_fast", "default")
+    assert asyncio.run(run()) == ("ok", True)
+
+def test_slow_stage_dropped_at_its_deadline():
+    async def run():
+        budget = LatencyBudget(total_ms=5000)
+        task = asyncio.ensure_future(_after(2, "tarde"))
+        t0 = time.perf_counter()
+        result = await budget.wait(task, "t_slow", "", deadline_ms=50)
+        await asyncio.sleep(0)  # Deja que la cancelación se procese.
+        return result, time.perf_counter() - t0, task.cancelled()
+    (value, on_time), elapsed, cancelled = asyncio.run(run())
+    assert (value, on_time) == ("", False)
+    assert elapsed < 0.5
+    assert cancelled
+    assert latency_budget.stats.snapshot()["t_slow"]["dropped"] >= 1
+
+def test_deadline_counts_from_request_start():
+    async def run():
+        budget = LatencyBudget(total_ms=5000)
+        await asyncio.sleep(0.1)  # La recuperación local ya consumió el plazo de la web.
+        return await budget.wait(asyncio.ensure_future(_after(0.05, "web")), "t_start", "", deadline_ms=100)
+    assert asyncio.run(run()) == ("", False)
+
+def test_failed_stage_uses_default():
+    async def boom():
+        raise RuntimeError("x")
+    async def run():
+        return await LatencyBudget().wait(asyncio.ensure_future(boom()), "t_err", [])
+    assert asyncio.run(run()) == ([], True)
+
+def test_executor_search_dropped_without_blocking(monkeypatch):
+    pytest.importorskip("duckduckgo_search")
+    from rag_api.services import web_search
+    monkeypatch.setattr(web_search, "search", lambda q: (time.sleep(0.5), "lento")[1])
+    async def run():
+        budget = LatencyBudget()
+        t0 = time.perf_counter()
+        result = await budget.wait(web_search.search_async("x"), "t_web", "", deadline_ms=50)
+        return result, time.perf_counter() - t0
+    (value, on_time), elapsed = asyncio.run(run())
+    assert value == "" and not on_time
+    assert elapsed < 0.3
@@ -0,0 +1,67 @@
+import numpy as np
+
+from rag_api.services.fragment_index import FragmentIndex
+from vector_store.lexical import BM25Index, rrf_fuse, tokenize
+
+DOCS = [
+    "Artículo 97° Requisitos para la matrícula de estudiantes regulares.",
+    "Artículo 79° El Consejo Universitario elige al Vicerrector Académico.",
+    "Artículo 12° La universidad promueve la investigación científica.",
+    "TÍTULO IV Del régimen de estudios y la matrícula extemporánea.",
+]
+
+
+def test_tokenize_folds_accents_and_keeps_numbers():
+    assert tokenize("¿Cuáles son los requisitos de MATRÍCULA del Artículo 97°?") == [
+        "cuales", "son", "requisitos", "matricula", "articulo", "97"]
+    assert tokenize("Nº 5") == ["5"]  # "no" es stopword.
+
+
+def test_bm25_exact_article_number():
+    idx = BM25Index(DOCS)
+    ids, scores = idx.search("artículo 97", 2)
+    assert ids[0] == 0
+    assert scores[0] > scores[1]
+
+
+def test_bm25_skips_documents_without_terms():
+    idx = BM25Index(DOCS)
+    ids, _ = idx.search("investigación", 4)
+    assert ids == [2]
+    assert idx.search("xyz", 4) == ([], [])
+
+
+def test_bm25_matches_bruteforce_formula():
+    idx = BM25Index(DOCS, k1=1.2, b=0.75)
+    toks = [tokenize(d) for d in DOCS]
+    avgdl = np.mean([len(t) for t in toks])
+    def brute(q):
+        out = []
+        for t in toks:
+            s = 0.0
+            for term in set(tokenize(q)):
+                df = sum(term in x for x in toks)
+                tf = t.count(term)
+                if tf:
+                    idf = np.log1p((len(DOCS) - df + 0.5) / (df + 0.5))
+                    s += idf * tf * 2.2 / (tf + 1.2 * (1 - 0.75 + 0.75 * len(t) / avgdl))
+            out.append(s)
+        return np.array(out)
+    np.testing.assert_allclose(idx.scores("matrícula de estudiantes"), brute("matrícula de estudiantes"), rtol=1e-5)
+
+
+def test_rrf_fuse_rewards_agreement():
+    ids, _ = rrf_fuse([[1, 2, 3], [3, 1, 4]], k=2)
+    assert ids == [1, 3]
+
+
+def test_fragment_index_hybrid_promotes_exact_match():
+    rng = np.random.default_rng(0)
+    vecs = rng.standard_normal((4, 8)).astype(np.float32)
+    frags = [{"texto": t} for t in DOCS]
+    fi = FragmentIndex(frags, vecs, kind="flat", params={}, hybrid=True)
+    q = vecs[1]  # El vector apunta al doc 1; el texto al doc 0.
+    assert fi.search_hybrid("artículo 97", q, 1)[0][0] in (0, 1)
+    assert fi.search_hybrid("artículo 97", np.zeros(8, dtype=np.float32), 1)[0] == [0]  # Sin embedding: solo BM25.
+    plain = FragmentIndex(frags, vecs, kind="flat", params={}, hybrid=False)
+    assert plain.search_hybrid("artículo 97", q, 1)[0] == [1]
@@ -0,0 +1,204 @@
+import json
+import time
+
+import numpy as np
+
+from rag_api.services import message_indexer
+from rag_api.services.message_indexer import LiveIndex, MessageIndexer
+
+DIM = 8
+
+
+def fake_encode(texts):
+    out = np.zeros((len(texts), DIM), dtype=np.float32)
+    for i, t in enumerate(texts):
+        out[i, hash(t.split("] ", 1)[-1].split()[0]) % DIM] = 1.0  # Primera palabra del mensaje -> eje.
+    return out
+
+
+def _write(path, records, partial=None):
+    with open(path, "a", encoding="utf-8") as f:
+        for r in records:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+        if partial:
+            f.write(partial)
+
+
+def _indexer(tmp_path, **kw):
+    return MessageIndexer(str(tmp_path / "messages"), str(tmp_path / "live"), fake_encode, LiveIndex(dim=DIM), **kw)
+
+
+def test_live_index_grows_and_searches():
+    live = LiveIndex(dim=DIM, capacity=2)
+    vecs = np.eye(DIM, dtype=np.float32)[:5]
+    live.add([{"id": i} for i in range(5)], vecs)
+    assert len(live) == 5
+    hits = live.search(vecs[3], 2, min_score=0.5)
+    assert [f["id"] for f, _ in hits] == [3]
+    assert live.search(np.zeros(DIM), 2) == []
+
+
+def test_tails_complete_lines_and_resumes_after_restart(tmp_path):
+    (tmp_path / "messages").mkdir()
+    src = tmp_path / "messages" / "whatsapp.jsonl"
+    now = time.time()
+    _write(src, [{"text": "matrícula extemporánea hasta el viernes", "author": "a", "ts": now},
+                 {"text": "ok", "ts": now},  # Muy corto: no se indexa.
+                 {"text": "cambio de horario del laboratorio", "ts": now}],
+           partial='{"text": "mensaje a medio escri')
+    idx = _indexer(tmp_path)
+    assert idx.run_once() == 2
+    assert len(idx.live) == 2 and idx.skipped == 1
+    assert idx.stats()["messages_behind"] == 0
+    assert idx.stats()["platforms"]["whatsapp"]["bytes_behind"] > 0  # La línea incompleta queda pendiente.
+
+    with open(src, "a", encoding="utf-8") as f:  # Termina la línea parcial y llega otra.
+        f.write('to sobre becas"}\n')
+    _write(src, [{"text": "convocatoria de becas abierta", "ts": now}])
+    assert idx.run_once() == 2
+    assert idx.offsets["whatsapp"] == src.stat().st_size
+
+    again = _indexer(tmp_path)  # Reinicio: restaura vectores y offsets sin re-indexar.
+    assert len(again.live) == 4
+    assert again.offsets == idx.offsets
+    assert again.run_once() == 0
+    hits = again.live.search(fake_encode(["[x] convocatoria"])[0], 1, min_score=0.5)
+    assert hits and "convocatoria" in hits[0][0]["texto"]
+
+
+def test_lag_metrics_and_batching(tmp_path):
+    (tmp_path / "messages").mkdir()
+    src = tmp_path / "messages" / "telegram.jsonl"
+    _write(src, [{"text": f"aviso número {i} del grupo", "ts": time.time() - 30} for i in range(10)])
+    idx = _indexer(tmp_path, batch_size=4)
+    assert idx.run_once() == 4
+    lag = idx.stats()["platforms"]["telegram"]
+    assert lag["messages_behind"] == 6
+    assert lag["seconds_behind"] >= 29
+    while idx.run_once():
+        pass
+    assert idx.stats()["messages_behind"] == 0 and idx.indexed == 10
+
+
+def test_lag_ignores_unusable_first_line(tmp_path):
+    (tmp_path / "messages").mkdir()
+    src = tmp_path / "messages" / "telegram.jsonl"
+    idx = _indexer(tmp_path)
+    for first in ("[1, 2]", json.dumps({"text": "x", "ts": "ayer"}), "42"):
+        src.write_text(first + "\n" + json.dumps({"text": "y", "ts": 1.0}) + "\n", encoding="utf-8")
+        lag = idx._lag(str(src), "telegram", 0)
+        assert lag["messages_behind"] == 2 and lag["seconds_behind"] == 0.0
+
+
+def test_recovers_from_partial_persist(tmp_path):
+    (tmp_path / "messages").mkdir()
+    _write(tmp_path / "messages" / "whatsapp.jsonl", [{"text": "primer mensaje largo", "ts": 1.0}])
+    idx = _indexer(tmp_path)
+    idx.run_once()
+    with open(tmp_path / "live" / "messages.f32", "ab") as f:  # Corte tras escribir vectores sin metadatos.
+        f.write(np.ones(DIM, dtype=np.float32).tobytes())
+    again = _indexer(tmp_path)
+    assert len(again.live) == 1
+    assert (tmp_path / "live" / "messages.f32").stat().st_size == DIM * 8  # Cargar no escribe: otro worker puede indexar.
+    again.run_once()  # Al pasar a ser el indexador se recorta la cola a medias.
+    assert (tmp_path / "live" / "messages.f32").stat().st_size == DIM * 4
+
+
+def test_truncated_source_restarts_from_zero(tmp_path):
+    (tmp_path / "messages").mkdir()
+    src = tmp_path / "messages" / "whatsapp.jsonl"
+    _write(src, [{"text": "mensaje uno bastante largo", "ts": 1.0}, {"text": "mensaje dos bastante largo", "ts": 1.0}])
+    idx = _indexer(tmp_path)
+    idx.run_once()
+    src.write_text(json.dumps({"text": "archivo rotado nuevo"}) + "\n", encoding="utf-8")
+    assert idx.run_once() == 1
+
+
+def test_near_duplicates_collapse_into_repeat_count(tmp_path):
+    (tmp_path / "messages").mkdir()
+    aviso = "Se comunica a los estudiantes que la matrícula extemporánea vence el viernes 20 de octubre."
+    _write(tmp_path / "messages" / "whatsapp.jsonl", [
+        {"text": aviso, "ts": 1.0},
+        {"text": "Reenviado: " + aviso + " https://bit.ly/x", "ts": 2.0},  # Mismo lote.
+        {"text": "cambio de horario del laboratorio", "ts": 3.0},
+    ])
+    idx = _indexer(tmp_path)
+    assert idx.run_once() == 3
+    assert len(idx.live) == 2 and idx.duplicates == 1
+    _write(tmp_path / "messages" / "telegram.jsonl", [{"text": aviso.upper(), "ts": 5.0}])
+    idx.run_once()
+    assert len(idx.live) == 2
+    assert idx.live.fragment(0)["repeats"] == 3 and idx.live.fragment(0)["last_ts"] == 5.0
+
+    again = _indexer(tmp_path)  # Conteos y huellas se reconstruyen desde disco.
+    assert again.live.fragment(0)["repeats"] == 3
+    assert again.offsets == idx.offsets and again.run_once() == 0
+    _write(tmp_path / "messages" / "whatsapp.jsonl", [{"text": aviso, "ts": 9.0}])
+    again.run_once()
+    assert len(again.live) == 2 and again.live.fragment(0)["repeats"] == 4
+
+
+def test_author_is_not_indexed(tmp_path, monkeypatch):
+    (tmp_path / "messages").mkdir()
+    (tmp_path / "live").mkdir()
+    src = tmp_path / "messages" / "whatsapp.jsonl"
+    _write(src, [{"text": "horario de tutorías actualizado", "author": "51987654321", "ts": time.time()}])
+    legacy = {"platform": "whatsapp", "end_offset": 0, "simhash": 0,
+              "fragment": {"id": "msg:whatsapp:0", "texto": "[whatsapp · 51911122233 · 2024-05-01 10:00] aviso antiguo"}}
+    (tmp_path / "live" / "messages.jsonl").write_text(json.dumps(legacy) + "\n", encoding="utf-8")
+    (tmp_path / "live" / "messages.f32").write_bytes(np.eye(DIM, dtype=np.float32)[:1].tobytes())
+    monkeypatch.setattr(message_indexer, "INGEST_AUTHOR_SALT", "sal")
+
+    idx = _indexer(tmp_path)
+    assert idx.live.fragment(0)["texto"] == "[whatsapp · 2024-05-01 10:00] aviso antiguo"  # Formato anterior, limpio.
+    assert idx.run_once() == 1
+    frag = idx.live.fragment(1)
+    assert "51987654321" not in frag["texto"] and "51987654321" not in json.dumps(frag)
+    assert frag["author_hash"] == message_indexer.author_hash("51987654321", "sal")
+    assert _indexer(tmp_path).live.fragment(0)["texto"].startswith("[whatsapp · 2024-05-01")  # También al recargar.
+
+
+def test_truncated_or_rotated_file_starts_new_generation_across_restarts(tmp_path):
+    (tmp_path / "messages").mkdir()
+    src = tmp_path / "messages" / "whatsapp.jsonl"
+    _write(src, [{"text": "primer aviso de la semana", "ts": 1.0}, {"text": "segundo aviso de la semana", "ts": 2.0}])
+    idx = _indexer(tmp_path)
+    assert idx.run_once() == 2
+
+    src.write_text("", encoding="utf-8")  # Truncado mientras el indexador está apagado; vuelve a crecer más que antes.
+    _write(src, [{"text": f"nuevo mensaje tras truncar número {i}", "ts": 3.0} for i in range(3)])
+    again = _indexer(tmp_path)
+    assert again.run_once() == 3
+    ids = [again.live.fragment(i)["id"] for i in range(len(again.live))]
+    assert len(set(ids)) == 5 and all(i.startswith("msg:whatsapp:1:") for i in ids[2:])
+
+    src.rename(tmp_path / "messages" / "whatsapp.jsonl.1")  # Rotado: archivo nuevo con la misma primera línea.
+    _write(src, [{"text": "nuevo mensaje tras truncar número 0", "ts": 3.0}, {"text": "aviso después de rotar", "ts": 4.0}])
+    assert again.run_once() == 2
+    assert again.files["whatsapp"]["gen"] == 2
+    third = _indexer(tmp_path)
+    assert third.files["whatsapp"] == again.files["whatsapp"] and third.offsets == again.offsets
+    assert third.run_once() == 0
+
+
+def test_only_lock_holder_indexes_and_followers_catch_up(tmp_path):
+    (tmp_path / "messages").mkdir()
+    src = tmp_path / "messages" / "whatsapp.jsonl"
+    aviso = "Se comunica que la matrícula extemporánea vence el viernes."
+    _write(src, [{"text": aviso, "ts": 1.0}, {"text": "cambio de horario del laboratorio", "ts": 2.0}])
+    leader, follower = _indexer(tmp_path), _indexer(tmp_path)  # Como dos workers de uvicorn.
+    assert leader.acquire() and not follower.acquire()
+    assert leader.run_once() == 2
+    _write(src, [{"text": "Reenviado: " + aviso, "ts": 3.0}])
+    assert leader.run_once() == 1
+    assert follower.follow_once() == 3  # Dos filas nuevas + un repetido, sin leer los .jsonl ni calcular embeddings.
+    assert len(follower.live) == 2 and follower.live.fragment(0)["repeats"] == 2
+    assert follower.stats()["role"] == "follower" and follower.offsets == leader.offsets
+
+    with open(tmp_path / "live" / "messages.f32", "ab") as f:  # El indexador muere a mitad de una escritura.
+        f.write(np.ones(DIM, dtype=np.float32).tobytes())
+    leader.release()
+    assert follower.acquire()  # Toma el relevo: recorta la cola y sigue desde el mismo offset.
+    assert (tmp_path / "live" / "messages.f32").stat().st_size == 2 * DIM * 4
+    _write(src, [{"text": "nuevo aviso de becas para ingresantes", "ts": 4.0}])
+    assert follower.run_once() == 1 and len(follower.live) == 3
@@ -0,0 +1,32 @@
+from rag_api.services.near_dup import NearDupIndex, hamming, simhash
+
+AVISO = ("Se comunica a todos los estudiantes que la matrícula extemporánea se realizará "
+         "hasta el viernes 20 de octubre en la oficina de la facultad.")
+
+
+def test_simhash_is_stable_under_forwarding_noise():
+    forwarded = "*" + AVISO.upper().replace("á", "a") + "* 🙏 https://bit.ly/abc123"
+    assert simhash(forwarded) == simhash(AVISO)
+    for edited in ("Buenas tardes. " + AVISO, AVISO.replace("estudiantes", "alumnos")):
+        assert hamming(simhash(AVISO), simhash(edited)) <= 6
+    other_date = AVISO.replace("viernes 20", "lunes 23")
+    assert hamming(simhash(AVISO), simhash(other_date)) > 6
+    assert simhash("  🙏 ") == 0
+
+
+def test_index_finds_closest_within_distance():
+    idx = NearDupIndex(max_distance=3)
+    idx.add(0, 0b1111)
+    idx.add(1, 0xF0F0_0000_0000_0000)
+    assert idx.find(0b1110) == 0  # 1 bit.
+    assert idx.find(0xF0F0_0000_0000_0007) == 1  # 3 bits, distinta banda baja.
+    assert idx.find(0xFF00_FF00_FF00_FF00) is None
+    assert idx.find(0) is None and len(idx) == 2
+
+
+def test_bucket_cap_bounds_candidates():
+    idx = NearDupIndex(max_distance=3, bucket_cap=2)
+    for row in range(5):
+        idx.add(row, 1 << 63 | row)  # Todas comparten las bandas altas.
+    assert idx.find(1 << 63 | 4) == 4
+    assert all(len(rows) <= 2 for band in idx._buckets for rows in band.values())
@@ -0,0 +1,51 @@
+import pytest
+
+from rag_api.stores import news_store, paging, storage_store
+
+
+def _setup(tmp_path, monkeypatch, n=0):
+    monkeypatch.setenv("NEWS_DB_PATH", str(tmp_path / "t.db"))
+    news_store.init_db()
+    storage_store.init_db()
+    for i in range(n):
+        news_store.upsert_news({"id": f"n{i:02d}", "fecha": f"2025-01-{1 + i // 3:02d}", "titulo": f"Noticia {i}",
+                                "descripcionCorta": "c", "descripcionLarga": "l", "autor": "yo", "categoria": ["Evento"],
+                                "destacada": i % 2 == 0})
+
+
+def test_cursor_roundtrip_and_rejects_garbage():
+    token = paging.encode_cursor(paging.KEYSET, ["2025-01-01", "2025-01-01T00:00:00", "a/b"])
+    assert paging.decode_cursor(token, paging.KEYSET, 3) == ["2025-01-01", "2025-01-01T00:00:00", "a/b"]
+    for bad in ("", "xyz", paging.encode_cursor(paging.OFFSET, [10])):
+        with pytest.raises(ValueError):
+            paging.decode_cursor(bad, paging.KEYSET, 3)
+
+
+def test_cursor_pages_match_offset_pages(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch, n=20)  # Varias noticias por fecha: el desempate es created_at/id.
+    by_offset = [n["id"] for p in range(1, 5) for n in news_store.search_news(page=p, page_size=6)["items"]]
+    seen, cursor = [], None
+    while True:
+        res = news_store.search_news(page_size=6, cursor=cursor)
+        seen += [n["id"] for n in res["items"]]
+        cursor = res["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == by_offset and len(seen) == 21  # 20 + la noticia semilla.
+    destacadas = news_store.search_news(destacada=True, page_size=4)
+    second = news_store.search_news(destacada=True, page_size=4, cursor=destacadas["next_cursor"])
+    assert all(n["destacada"] for n in second["items"]) and second["total"] == 10 and second["page"] is None
+
+
+def test_totals_are_cached_and_invalidated_on_write(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    monkeypatch.setattr(paging, "totals", paging.TotalsCache(ttl_s=60))
+    storage_store.create_item("faq", {"q": "hola"})
+    assert storage_store.search_items(tipo="faq")["total"] == 1
+    assert storage_store.search_items(tipo="faq")["total"] == 1
+    assert paging.totals.stats()["hits"] == 1
+    storage_store.create_item("faq", {"q": "chau"})
+    assert storage_store.search_items(tipo="faq")["total"] == 2  # La escritura invalidó el total.
+    res = storage_store.search_items(tipo="faq", page_size=1, with_total=False)
+    assert res["total"] is None and res["next_cursor"]
+    assert len(storage_store.search_items(tipo="faq", page_size=1, cursor=res["next_cursor"])["items"]) == 1
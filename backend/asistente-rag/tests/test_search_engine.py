@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from vector_store.search_engine import FlatIndex, IVFIndex, create_index, load_index
+
+
+def _data(n=2000, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, dim)).astype(np.float32)
+
+
+@pytest.mark.parametrize("kind,params", [("flat", {}), ("ivf", {"nlist": 16, "nprobe": 16})])
+def test_build_add_remove_search(kind, params):
+    data = _data()
+    index = create_index(kind, 32, **params)
+    index.build(range(1000), data[:1000])
+    index.add(range(1000, 2000), data[1000:])
+    assert len(index) == 2000
+    ids, scores = index.search(data[1500], 3)
+    assert ids[0] == 1500 and scores[0] == pytest.approx(1.0, abs=1e-5)
+    assert index.remove([1500, 99999]) == 1
+    assert 1500 not in index.search(data[1500], 3)[0]
+    assert len(index) == 1999
+
+
+def test_ivf_recall_close_to_flat():
+    rng = np.random.default_rng(1)
+    centers = rng.standard_normal((20, 32)).astype(np.float32)
+    data = centers[rng.integers(0, 20, 3000)] + 0.3 * rng.standard_normal((3000, 32)).astype(np.float32)
+    flat, ivf = FlatIndex(32), IVFIndex(32, nlist=32, nprobe=8)
+    flat.build(range(3000), data)
+    ivf.build(range(3000), data)
+    queries = data[:50] + 0.05
+    hits = sum(len(set(flat.search(q, 10)[0]) & set(ivf.search(q, 10)[0])) for q in queries)
+    assert hits / 500 > 0.8
+
+
+@pytest.mark.parametrize("kind", ["flat", "ivf"])
+def test_save_load_roundtrip(tmp_path, kind):
+    data = _data(n=500)
+    index = create_index(kind, 32)
+    index.build(range(500), data)
+    path = str(tmp_path / f"{kind}.idx")
+    index.save(path)
+    loaded = load_index(path)
+    assert type(loaded) is type(index) and len(loaded) == 500
+    assert loaded.search(data[7], 5)[0] == index.search(data[7], 5)[0]
+
+
+def test_hnsw_build_remove_replace_and_roundtrip(tmp_path):
+    pytest.importorskip("hnswlib")
+    data = _data(n=600)
+    index = create_index("hnsw", 32, M=16, ef_construction=100, ef_search=64, capacity=100)
+    index.build(range(300), data[:300])
+    index.add(range(300, 600), data[300:])  # Supera la capacidad: el grafo crece.
+    assert len(index) == 600
+    ids, scores = index.search(data[450], 3)
+    assert ids[0] == 450 and scores[0] == pytest.approx(1.0, abs=1e-5)
+    assert index.remove([450, 99999]) == 1
+    assert 450 not in index.search(data[450], 3)[0] and len(index) == 599
+    index.add([7], data[8:9])  # Reemplazo: el id 7 pasa a tener el vector del 8.
+    assert len(index) == 599
+    assert set(index.search(data[8], 2)[0]) == {7, 8}
+    path = str(tmp_path / "hnsw.idx")
+    index.save(path)
+    loaded = load_index(path)
+    assert type(loaded) is type(index) and len(loaded) == 599
+    assert loaded.params() == index.params()
+    assert loaded.search(data[123], 5)[0] == index.search(data[123], 5)[0]
+    loaded.add([450], data[450:451])  # El grafo cargado admite reusar posiciones borradas.
+    assert loaded.search(data[450], 1)[0] == [450] and len(loaded) == 600
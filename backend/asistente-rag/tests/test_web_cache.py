@@ -0,0 +1,54 @@
+import time
+
+from rag_api.services.web_cache import WebContextCache, FRESH, STALE
+
+
+def test_fresh_hit_with_normalized_question():
+    c = WebContextCache(db_path=None)
+    c.put("¿Requisitos de Matrícula?", "- a: b (u)")
+    assert c.peek("requisitos de matricula") == ("- a: b (u)", FRESH)
+    assert c.stats()["hits"] == 1
+
+
+def test_stale_then_expired():
+    c = WebContextCache(ttl=10, stale=100, db_path=None)
+    c.put("q", "viejo", fetched_at=time.time() - 50)
+    assert c.peek("q") == ("viejo", STALE)
+    c.put("q", "muy viejo", fetched_at=time.time() - 500)
+    assert c.peek("q") is None
+
+
+def test_sqlite_tier_shared_between_instances(tmp_path):
+    db = str(tmp_path / "web.sqlite3")
+    a = WebContextCache(db_path=db)
+    a.put("reglamento de grados", "- r: s (u)")
+    b = WebContextCache(db_path=db)  # Otro worker / reinicio.
+    assert b.peek("reglamento de grados") is None
+    assert b.get("reglamento de grados") == ("- r: s (u)", FRESH)
+    assert b.stats()["disk_hits"] == 1
+    assert b.peek("reglamento de grados") == ("- r: s (u)", FRESH)  # Promovida a memoria.
+
+
+def test_stale_memory_refreshed_from_disk(tmp_path):
+    db = str(tmp_path / "web.sqlite3")
+    a = WebContextCache(ttl=10, db_path=db)
+    b = WebContextCache(ttl=10, db_path=db)
+    b.put("q", "viejo", fetched_at=time.time() - 20)
+    a.put("q", "nuevo")  # Otro worker ya revalidó.
+    assert b.get("q") == ("nuevo", FRESH)
+
+
+def test_lru_bound():
+    c = WebContextCache(max_entries=2, db_path=None)
+    for q in ("a", "b", "c"):
+        c.put(q, q.upper())
+    assert c.peek("a") is None
+    assert c.stats()["size"] == 2
+
+
+def test_single_flight_refresh():
+    c = WebContextCache(db_path=None)
+    assert c.claim_refresh("q")
+    assert not c.claim_refresh("Q?")
+    c.release_refresh("q")
+    assert c.claim_refresh("q")
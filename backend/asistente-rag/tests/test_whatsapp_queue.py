@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+from rag_api.services.ingest_writer import GroupCommitWriter
+from rag_api.services.whatsapp_queue import WhatsAppQueue, extract_messages
+
+
+def _payload(*changes):
+    return {"object": "whatsapp_business_account",
+            "entry": [{"id": "WABA", "changes": [{"field": "messages", "value": v} for v in changes]}]}
+
+
+def _value(*msgs, phone="PHONE1"):
+    return {"metadata": {"phone_number_id": phone},
+            "contacts": [{"wa_id": "51999", "profile": {"name": "Ana"}}],
+            "messages": [{"id": mid, "from": "51999", "timestamp": "1700000000", "type": "text", "text": {"body": body}}
+                         for mid, body in msgs]}
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_extracts_every_entry_and_change():
+    payload = _payload(_value(("wamid.1", "hola"), ("wamid.2", "horario")), _value(("wamid.3", "becas"), phone="P2"))
+    payload["entry"].append({"changes": [{"value": _value(("wamid.4", "otro"))}, {"value": None}]})
+    payload["entry"][0]["changes"][0]["value"]["messages"].append({"id": "wamid.5", "type": "image", "image": {}})
+    found, malformed = extract_messages(payload)
+    assert [f["id"] for f in found] == ["wamid.1", "wamid.2", "wamid.3", "wamid.4"]
+    assert malformed == 1
+    rec = found[2]["record"]
+    assert rec["ts"] == 1700000000.0 and rec["meta"]["phone_number_id"] == "P2" and rec["meta"]["name"] == "Ana"
+
+
+def test_workers_dedupe_retries_and_write_in_batches(tmp_path):
+    writer = GroupCommitWriter(str(tmp_path), fsync="none")
+
+    async def run():
+        q = WhatsAppQueue(writer, workers=2)
+        q.start()
+        first = _payload(_value(("wamid.1", "matrícula"), ("wamid.2", "horario")))
+        assert q.enqueue(first)
+        assert q.enqueue(first)  # Reintento de Meta con el mismo payload.
+        assert q.enqueue(_payload(_value(("wamid.2", "horario"), ("wamid.3", "becas"))))
+        assert q.enqueue(["no", "es", "un", "dict"])
+        await q.stop()
+        return q.stats()
+
+    st = asyncio.run(run())
+    writer.close()
+    assert st["messages"] == 3 and st["duplicates"] == 3 and st["malformed"] == 1
+    assert st["payloads"] == 4 and st["errors"] == 0 and st["queue_depth"] == 0
+    assert sorted(r["meta"]["wa_message_id"] for r in _lines(tmp_path / "whatsapp.jsonl")) == ["wamid.1", "wamid.2", "wamid.3"]
+
+
+def test_full_queue_drops_and_seen_set_is_bounded(tmp_path):
+    writer = GroupCommitWriter(str(tmp_path), fsync="none")
+
+    async def run():
+        q = WhatsAppQueue(writer, queue_max=2, seen_max=2)
+        assert q.enqueue({}) and q.enqueue({})
+        assert not q.enqueue({})  # Sin trabajadores: la tercera no entra.
+        await q.process([_payload(_value(*[(f"wamid.{i}", f"m{i}") for i in range(5)]))])
+        return q.stats(), await q.process([_payload(_value(("wamid.0", "m0")))])
+
+    st, again = asyncio.run(run())
+    writer.close()
+    assert st["dropped"] == 1 and st["received"] == 3 and st["queue_depth"] == 2
+    assert st["seen_ids"] == 2
+    assert again == 1  # wamid.0 salió del conjunto acotado: se acepta de nuevo.
+
+
+def test_malformed_payload_does_not_lose_the_rest_of_the_batch(tmp_path):
+    writer = GroupCommitWriter(str(tmp_path), fsync="none")
+    bad = [{"entry": ["x"]}, {"entry": [{"changes": [{"value": {"messages": ["no-dict", 3]}}]}]},
+           {"entry": "x"}, {"entry": [{"changes": [{"value": {"messages": [{"type": "text", "text": "plano"}]}}]}]}]
+
+    async def run():
+        q = WhatsAppQueue(writer, workers=1)
+        written = await q.process(bad + [_payload(_value(("a", "hola")))])
+        return q, written
+
+    q, written = asyncio.run(run())
+    writer.close()
+    assert written == 1 and "a" in q._seen
+    assert q.malformed == 5 and q.errors == 0
+    assert [r["meta"]["wa_message_id"] for r in _lines(tmp_path / "whatsapp.jsonl")] == ["a"]
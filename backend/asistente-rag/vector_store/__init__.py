@@ -0,0 +1 @@
+"""Almacenamiento e índices vectoriales para la recuperación del asistente RAG."""
@@ -0,0 +1,259 @@
+"""Constructor offline del índice de fragmentos a partir de los JSON limpios (clean_data/output).
+
+Uso (desde backend/asistente-rag):
+    python -m vector_store.build_index                                  # clean_data/output/*.json -> fragments/
+    python -m vector_store.build_index docs/*.json --out /tmp/idx --workers 4 --batch-size 128
+
+Pasos:
+    0. clean_data/output guarda varias etapas del mismo documento (mismo `source_file`):
+       optimized_final -> fully_corrected -> final_corrected. Se indexa solo la más avanzada
+       (PIPELINE_SUFFIXES) con chunks; --all-versions desactiva esta selección.
+    1. Lee cada JSON ({"chunks": [...]}) y renderiza cada chunk a texto: los artículos del Estatuto
+       con `EstatutoProcessor.format_article_for_rag` (prefijo [Título | Capítulo | Sección]); los
+       chunks genéricos (resoluciones) como "título: contenido". Textos repetidos se indexan una vez.
+    2. Calcula embeddings en lotes grandes. Con --workers > 1 reparte los lotes entre procesos
+       (cada uno con su copia del modelo y --threads hilos de torch) para usar toda la CPU.
+    3. Escribe el índice binario (vector_store/embedding_store.py) de forma atómica; un servidor
+       en marcha lo detecta y recarga en caliente (RAG_INDEX_WATCH_S o /admin/index/reload).
+Cada fragmento conserva id estable, fuente, article_number, context y content_hash =
+sha1(modelo + backend + texto), que usa el cache de respuestas para invalidar. El id no depende de la
+posición del chunk (insertar o borrar uno no renombra los siguientes) ni de la etapa del pipeline
+(cambiar de `_improved_cleaned` a `_final_corrected` no renombra nada): "<documento>#<ancla>", con
+documento = `source_file` sin carpeta ni extensión (o el nombre del JSON sin PIPELINE_SUFFIXES) y
+ancla = artículo ("art-12"), si no título del chunk o título/capítulo de su contexto, y si no hay
+ninguno el inicio del content_hash; ".2", ".3"... distinguen chunks con la misma ancla.
+
+Reconstrucción incremental: los vectores se guardan en un cache persistente por content_hash
+(vector_store/vector_cache.py, --cache). Solo se embeben chunks nuevos o modificados; los
+borrados desaparecen del índice; el resto se reutiliza (también desde el índice anterior si el
+cache está vacío). Si nada cambió no se reescribe el índice (evita recargas inútiles).
+"""
+from __future__ import annotations  # Tipos adelantados.
+import os, re, sys, glob, json, time, argparse  # CLI, archivos, anclas de id y medición.
+import multiprocessing as mp  # Pool de procesos para embeddings.
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple  # Tipos.
+import numpy as np  # Matriz de embeddings.
+from . import embedding_store  # Formato binario de salida.
+from .vector_cache import VectorCache, content_key  # Vectores ya calculados, por hash de contenido.
+from .lexical import fold  # Minúsculas sin tildes (anclas de id).
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # backend/asistente-rag
+DEFAULT_INPUTS = os.path.join(BASE_DIR, "clean_data", "output", "*.json")
+DEFAULT_OUT = os.path.join(BASE_DIR, "fragments")
+DEFAULT_CACHE = os.path.join(BASE_DIR, "fragments", "vector_cache.sqlite3")
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+# Sufijos de salida de clean_data, de la etapa más corregida a la menos.
+PIPELINE_SUFFIXES = ("_final_corrected", "_fully_corrected", "_optimized_final", "_improved_cleaned", "_legal_cleaned")
+
+def _render(chunk: Dict[str, Any], processor: Any) -> str:
+    if chunk.get("article_number") or chunk.get("article_content"):  # Artículo del Estatuto.
+        chunk = {**chunk, "context": {"title": "", "chapter": "", "section": "", **(chunk.get("context") or {})}}
+        return processor.format_article_for_rag(chunk)
+    title = (chunk.get("title") or "").strip()
+    content = (chunk.get("content") or chunk.get("texto") or "").strip()
+    if title and content and not content.startswith(title):
+        return f"{title}: {content}"
+    return content or title
+
+_ANCHOR_MAX = 48  # Largo máximo del ancla del id.
+
+def _slug(text: str) -> str:  # "Artículo 12°" -> "articulo-12"
+    return re.sub(r"[^a-z0-9]+", "-", fold(text)).strip("-")[:_ANCHOR_MAX].rstrip("-")
+
+def fragment_anchor(chunk: Dict[str, Any], content_hash: str) -> str:
+    """Parte estable del id: artículo, título del chunk o título/capítulo de su contexto; si no, hash."""
+    article = _slug(chunk.get("article_number") or "")
+    if article:
+        return re.sub(r"^articulo-", "art-", article)
+    ctx = chunk.get("context") if isinstance(chunk.get("context"), dict) else {}
+    for label in (chunk.get("title"), "/".join(p for p in (ctx.get("title"), ctx.get("chapter")) if p)):
+        slug = _slug(label or "")
+        if slug:
+            return slug
+    return content_hash[:12]
+
+def document_stem(path: str, data: Any) -> str:  # Documento de origen, igual para todas sus etapas.
+    source_file = data.get("source_file") if isinstance(data, dict) else None
+    if source_file:
+        return os.path.splitext(source_file.replace("\\", "/").rsplit("/", 1)[-1])[0]  # Rutas Windows de clean_data.
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return next((stem[: -len(suf)] for suf in PIPELINE_SUFFIXES if stem.endswith(suf)), stem)
+
+def _stage(path: str) -> int:  # Posición en PIPELINE_SUFFIXES (menor = más corregido).
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return next((i for i, suf in enumerate(PIPELINE_SUFFIXES) if stem.endswith(suf)), len(PIPELINE_SUFFIXES))
+
+def select_latest(paths: Iterable[str]) -> List[str]:
+    """Una ruta por documento de origen (`source_file`): la etapa más corregida que tenga chunks."""
+    best: Dict[str, tuple] = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            best[path] = ((False, 0, path), path)
+            continue
+        n_chunks = len(data.get("chunks") or [])
+        key = data.get("source_file") or path
+        rank = (n_chunks == 0, _stage(path), path)
+        if key not in best or rank < best[key][0]:
+            best[key] = (rank, path)
+    return sorted(p for _, p in best.values())
+
+def collect_fragments(paths: Iterable[str], model_name: str = DEFAULT_MODEL, backend: str = "torch") -> List[Dict[str, Any]]:
+    """Lee los JSON de chunks -> fragmentos {id, texto, source, ...} sin duplicados."""
+    from clean_data.estatuto_utils import EstatutoProcessor  # Import local: solo hace falta al construir.
+    fragments: List[Dict[str, Any]] = []
+    seen: set = set()
+    for path in sorted(paths):
+        processor = EstatutoProcessor(path)  # Carga el JSON y aporta format_article_for_rag.
+        data = processor.data
+        chunks = data.get("chunks", []) if isinstance(data, dict) else data
+        source = os.path.basename(path)
+        stem = document_stem(path, data)
+        anchors: Dict[str, int] = {}  # Ancla -> chunks emitidos con ella en este archivo.
+        for chunk in chunks:
+            text = " ".join(_render(chunk, processor).split())
+            h = content_key(text, model_name, backend)
+            if not text or h in seen:
+                continue
+            seen.add(h)
+            anchor = fragment_anchor(chunk, h)
+            anchors[anchor] = n = anchors.get(anchor, 0) + 1
+            frag_id = f"{stem}#{anchor}" if n == 1 else f"{stem}#{anchor}.{n}"
+            frag: Dict[str, Any] = {"id": frag_id, "texto": text, "source": source, "content_hash": h}
+            for key in ("article_number", "article_title", "context", "type"):
+                if chunk.get(key):
+                    frag[key] = chunk[key]
+            fragments.append(frag)
+    return fragments
+
+# ----------------------------- Embeddings -----------------------------
+_worker_model = None
+
+def _init_worker(model_name: str, backend: str, threads: int) -> None:
+    global _worker_model
+    try:
+        import torch
+        torch.set_num_threads(max(1, threads))  # Sin sobre-suscripción: procesos x hilos ~ núcleos.
+    except ImportError:
+        pass
+    from rag_api.services.embedding_backends import load_embedding_model
+    _worker_model, _ = load_embedding_model(model_name, backend=backend)
+
+def _encode(batch: List[str]) -> np.ndarray:
+    return np.asarray(_worker_model.encode(batch, batch_size=len(batch), convert_to_numpy=True), dtype=np.float32)
+
+def embed_texts(texts: Sequence[str], model_name: str = DEFAULT_MODEL, backend: str = "torch", batch_size: int = 64,
+                workers: int = 1, threads: Optional[int] = None,
+                progress: Optional[Callable[[int, int], None]] = None) -> np.ndarray:
+    batches = [list(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+    threads = threads or max(1, (os.cpu_count() or 1) // max(1, workers))
+    out: List[np.ndarray] = []
+    done = 0
+    if workers <= 1:
+        _init_worker(model_name, backend, threads)
+        results: Iterable[np.ndarray] = map(_encode, batches)
+        pool = None
+    else:
+        pool = mp.get_context("spawn").Pool(workers, initializer=_init_worker, initargs=(model_name, backend, threads))
+        results = pool.imap(_encode, batches)  # imap conserva el orden de los lotes.
+    try:
+        for vecs in results:
+            out.append(vecs)
+            done += len(vecs)
+            if progress:
+                progress(done, len(texts))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return np.concatenate(out) if out else np.zeros((0, 384), dtype=np.float32)
+
+def _previous(out_dir: str, model_name: str, backend: str) -> Tuple[List[str], Dict[str, np.ndarray]]:
+    """(hashes en orden, {hash: vector}) del índice existente, si es del mismo modelo y backend."""
+    try:
+        frags, matrix, header = embedding_store.load_store(out_dir, expected_model=model_name)
+    except (FileNotFoundError, embedding_store.EmbeddingStoreError, ValueError, KeyError):
+        return [], {}
+    if header.get("backend", "torch") != backend:  # Otro backend: sus vectores no sirven.
+        return [], {}
+    keys = [f.get("content_hash") for f in frags]
+    return [k for k in keys if k], {k: matrix[i] for i, k in enumerate(keys) if k}
+
+def build(paths: Sequence[str], out_dir: str, model_name: str = DEFAULT_MODEL, embed: Callable[..., np.ndarray] = embed_texts,
+          cache_path: Optional[str] = DEFAULT_CACHE, prune_cache: bool = False, **embed_kw: Any) -> Dict[str, Any]:
+    """Construye (incrementalmente) y escribe el índice; devuelve el header con conteos de la corrida."""
+    backend = embed_kw.get("backend", "torch")
+    fragments = collect_fragments(paths, model_name, backend)
+    keys = [f["content_hash"] for f in fragments]
+    prev_keys, prev_vecs = _previous(out_dir, model_name, backend)
+    removed = len(set(prev_keys) - set(keys))
+    if prev_keys and prev_keys == keys:  # Mismos chunks, mismo orden, mismo modelo y backend: nada que escribir.
+        return {**embedding_store.read_header(out_dir), "unchanged": True, "reused": len(keys), "embedded": 0, "removed": 0}
+    cache = VectorCache(cache_path) if cache_path else None
+    known: Dict[str, np.ndarray] = cache.get_many(keys) if cache is not None else {}
+    for k in keys:  # Cache vacío o borrado: reutilizamos lo que ya estaba en el índice anterior.
+        if k not in known and k in prev_vecs:
+            known[k] = np.asarray(prev_vecs[k], dtype=np.float32)
+    missing = [i for i, k in enumerate(keys) if k not in known]
+    t0 = time.perf_counter()
+    if missing:
+        new = embed([fragments[i]["texto"] for i in missing], model_name=model_name, **embed_kw)
+        for i, vec in zip(missing, new):
+            known[keys[i]] = vec
+        if cache is not None:
+            cache.put_many([keys[i] for i in missing], new)
+    seconds = time.perf_counter() - t0
+    if cache is not None:
+        if prune_cache:
+            cache.prune(keys)
+        cache.close()
+    dim = len(next(iter(known.values()))) if known else 384
+    vectors = np.stack([known[k] for k in keys]) if keys else np.zeros((0, dim), dtype=np.float32)
+    header = embedding_store.save_store(out_dir, vectors, fragments, model_name, extra_header={
+        "sources": sorted({f["source"] for f in fragments}),
+        "backend": backend,
+        "embed_seconds": round(seconds, 2),
+    })
+    return {**header, "unchanged": False, "reused": len(keys) - len(missing), "embedded": len(missing), "removed": removed}
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("inputs", nargs="*", help=f"JSON de chunks (default: {DEFAULT_INPUTS})")
+    ap.add_argument("--out", default=DEFAULT_OUT)
+    ap.add_argument("--model", default=DEFAULT_MODEL)
+    ap.add_argument("--backend", default=os.getenv("EMBED_BACKEND", "torch"), help="torch | onnx | onnx-int8")
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 4),
+                    help="procesos de embedding (default: núcleos/4)")
+    ap.add_argument("--threads", type=int, default=None, help="hilos de torch por proceso (default: núcleos/workers)")
+    ap.add_argument("--all-versions", action="store_true", help="indexar todas las etapas de cada documento")
+    ap.add_argument("--cache", default=DEFAULT_CACHE, help="SQLite de vectores por content_hash ('' = sin cache)")
+    ap.add_argument("--prune-cache", action="store_true", help="borrar del cache los vectores que ya no están en el índice")
+    args = ap.parse_args(argv)
+    paths = [p for pattern in (args.inputs or [DEFAULT_INPUTS]) for p in glob.glob(pattern)]
+    if not args.all_versions:
+        paths = select_latest(paths)
+    if not paths:
+        print("No se encontraron JSON de entrada.")
+        sys.exit(1)
+    t0 = time.perf_counter()
+
+    def progress(done: int, total: int) -> None:
+        rate = done / max(time.perf_counter() - t0, 1e-9)
+        print(f"\r  {done}/{total} fragmentos  ({rate:.1f} textos/s)", end="", flush=True)
+
+    print(f"📄 {len(paths)} archivos -> {args.out} ({args.model}, {args.backend}, {args.workers} proceso(s))")
+    header = build(paths, args.out, args.model, cache_path=args.cache or None, prune_cache=args.prune_cache,
+                   backend=args.backend, batch_size=args.batch_size, workers=args.workers, threads=args.threads,
+                   progress=progress)
+    total = time.perf_counter() - t0
+    if header["unchanged"]:
+        print(f"✅ Sin cambios: {header['count']} fragmentos, índice intacto ({total:.1f} s)")
+        return
+    rate = header["embedded"] / max(header["embed_seconds"], 1e-9)
+    print(f"\n✅ {header['count']} fragmentos ({header['dim']}-d) en {total:.1f} s: {header['embedded']} embebidos "
+          f"({rate:.1f} textos/s), {header['reused']} reutilizados, {header['removed']} eliminados")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Formato binario del índice de fragmentos (reemplaza fragments/fragments_embedded.json).
+
+Dos archivos en la carpeta del índice:
+    fragments.<gen>.f32.npy -> matriz float32 (N x dim) con filas ya normalizadas L2. Se abre con
+                           `np.load(..., mmap_mode="r")`: no se parsea nada al arrancar, las páginas
+                           se leen bajo demanda y el page cache del SO se comparte entre workers de uvicorn.
+    fragments.meta.json -> {"header": {...}, "fragments": [...]}: textos, ids y metadatos (sin embeddings).
+                           El header lleva format_version, model, dim, count, normalized y
+                           `generation` / `vectors_file`: la matriz que le corresponde.
+Cada escritura crea una matriz con nombre nuevo y recién después reemplaza (os.replace) el meta,
+que es el único puntero: un lector nunca empareja metadatos de una generación con vectores de
+otra. Se conserva la matriz de la generación anterior (lectores que leyeron el meta justo antes
+del cambio); las más viejas se borran. Índices sin `vectors_file` usan fragments.f32.npy.
+
+El JSON legado (lista de {"texto", "embedding", ...}) se puede convertir con
+`python -m vector_store.embedding_store <fragments_embedded.json> <carpeta_destino> [modelo]`.
+"""
+from __future__ import annotations  # Tipos adelantados.
+import os, json, time  # Rutas, serialización y timestamp del header.
+from typing import Any, Dict, List, Optional, Sequence, Tuple  # Tipos.
+import numpy as np  # Matriz de embeddings.
+from .search_engine import normalize_rows  # Copia float32 con filas de norma 1.
+
+FORMAT_VERSION = 1  # Subir si cambia el layout de los archivos.
+VECTORS_FILE = "fragments.f32.npy"
+META_FILE = "fragments.meta.json"
+
+class EmbeddingStoreError(Exception):  # Índice presente pero incompatible (versión, modelo, tamaños).
+    pass
+
+def vectors_path(store_dir: str, header: Optional[Dict[str, Any]] = None) -> str:
+    """Matriz a la que apunta `header` (por defecto el del meta actual)."""
+    if header is None:
+        try:
+            header = read_header(store_dir)
+        except (OSError, ValueError, KeyError):
+            header = {}
+    return os.path.join(store_dir, os.path.basename(header.get("vectors_file") or VECTORS_FILE))
+
+def meta_path(store_dir: str) -> str:
+    return os.path.join(store_dir, META_FILE)
+
+def exists(store_dir: str) -> bool:  # True si hay un índice binario completo en la carpeta.
+    return os.path.exists(meta_path(store_dir)) and os.path.exists(vectors_path(store_dir))
+
+def save_store(store_dir: str, vectors: Any, fragments: Sequence[Dict[str, Any]], model: str,
+               normalized: bool = False, extra_header: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Escribe matriz + metadatos de forma atómica (matriz de generación nueva + os.replace del meta).
+
+    Los metadatos se reemplazan al final y nombran su matriz: un lector que vea el header nuevo
+    siempre encuentra la matriz nueva. Devuelve el header escrito.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    previous = vectors_path(store_dir)
+    mat = np.ascontiguousarray(vectors, dtype=np.float32) if normalized else normalize_rows(vectors)
+    if mat.ndim != 2 or mat.shape[0] != len(fragments):
+        raise EmbeddingStoreError(f"{len(fragments)} fragmentos pero matriz {mat.shape}")
+    generation = f"{time.time_ns():x}"
+    header = {
+        "format_version": FORMAT_VERSION,
+        "generation": generation,
+        "vectors_file": f"fragments.{generation}.f32.npy",
+        "model": model,
+        "dim": int(mat.shape[1]),
+        "count": int(mat.shape[0]),
+        "normalized": True,
+        "created_at": time.time(),
+        **(extra_header or {}),
+    }
+    records = []
+    for i, frag in enumerate(fragments):  # Nunca guardamos embeddings en el JSON.
+        rec = {k: v for k, v in frag.items() if k != "embedding"}
+        rec.setdefault("id", str(i))
+        records.append(rec)
+    current = vectors_path(store_dir, header)
+    vec_tmp = current + ".tmp"
+    meta_tmp = meta_path(store_dir) + ".tmp"
+    with open(vec_tmp, "wb") as f:
+        np.save(f, mat)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(vec_tmp, current)  # Nadie la referencia todavía.
+    with open(meta_tmp, "w", encoding="utf-8") as f:
+        json.dump({"header": header, "fragments": records}, f, ensure_ascii=False, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(meta_tmp, meta_path(store_dir))  # Cambio de generación (un solo rename).
+    _prune_vectors(store_dir, keep={current, previous})
+    return header
+
+def _prune_vectors(store_dir: str, keep: set) -> None:  # Borra matrices de generaciones anteriores a la previa.
+    for name in os.listdir(store_dir):
+        path = os.path.join(store_dir, name)
+        if name.startswith("fragments.") and name.endswith(".f32.npy") and path not in keep:
+            try:
+                os.remove(path)  # Un memmap abierto sobre ella sigue siendo válido (POSIX).
+            except OSError:
+                pass
+
+def read_header(store_dir: str) -> Dict[str, Any]:
+    with open(meta_path(store_dir), "r", encoding="utf-8") as f:
+        return json.load(f)["header"]
+
+def load_store(store_dir: str, expected_model: Optional[str] = None,
+               mmap: bool = True) -> Tuple[List[Dict[str, Any]], np.ndarray, Dict[str, Any]]:
+    """Devuelve (fragments, matriz, header). La matriz es un memmap de solo lectura si mmap=True.
+
+    Lanza FileNotFoundError si no existe el índice y EmbeddingStoreError si es incompatible.
+    """
+    with open(meta_path(store_dir), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    header, fragments = meta["header"], meta["fragments"]
+    if header.get("format_version") != FORMAT_VERSION:
+        raise EmbeddingStoreError(f"format_version {header.get('format_version')} no soportada (se espera {FORMAT_VERSION})")
+    if expected_model and header.get("model") != expected_model:
+        raise EmbeddingStoreError(f"Índice generado con {header.get('model')!r}, el servidor usa {expected_model!r}")
+    matrix = np.load(vectors_path(store_dir, header), mmap_mode="r" if mmap else None)  # La de esta generación.
+    if matrix.dtype != np.float32 or matrix.ndim != 2 or matrix.shape[0] != len(fragments):
+        raise EmbeddingStoreError(f"Matriz {matrix.dtype} {matrix.shape} no coincide con {len(fragments)} fragmentos")
+    return fragments, matrix, header
+
+def convert_legacy_json(json_path: str, store_dir: str, model: str) -> Dict[str, Any]:
+    """Migra fragments_embedded.json (lista con `embedding` por fragmento) al formato binario."""
+    with open(json_path, "r", encoding="utf-8") as f:
+        legacy = json.load(f)
+    usable = [frag for frag in legacy if frag.get("embedding") is not None]
+    dim = len(usable[0]["embedding"]) if usable else 384
+    vectors = np.asarray([frag["embedding"] for frag in usable], dtype=np.float32).reshape(len(usable), dim)
+    return save_store(store_dir, vectors, usable, model)
+
+if __name__ == "__main__":  # Conversión manual del JSON legado.
+    import sys
+    if len(sys.argv) < 3:
+        print("Uso: python -m vector_store.embedding_store <fragments_embedded.json> <carpeta_destino> [modelo]")
+        sys.exit(1)
+    h = convert_legacy_json(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else "all-MiniLM-L6-v2")
+    print(f"✅ {h['count']} fragmentos ({h['dim']}-d, {h['model']}) -> {sys.argv[2]}")
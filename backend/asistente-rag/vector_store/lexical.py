@@ -0,0 +1,93 @@
+"""Índice léxico BM25 en memoria y fusión por rangos recíprocos (RRF) con la búsqueda densa.
+
+MiniLM no distingue bien "Artículo 97" de "Artículo 79" ni términos legales exactos; BM25 sí.
+El índice se construye una vez sobre los mismos fragmentos que carga main.py:
+    - Tokenizador español: minúsculas, plegado de tildes (NFKD, "matrícula" -> "matricula",
+      "Nº" -> "no"), tokens alfanuméricos (los números se conservan: "97", "iv") y stopwords fuera
+      ("no" entre ellas: de "Nº 5" queda solo "5").
+    - Listas invertidas en formato CSR: `indptr` por término y, contiguos, `doc_ids` (int32) e
+      `impacts` (float32) con la contribución BM25 ya calculada (idf * tf saturado y normalizado
+      por longitud). Una consulta es, por término, `scores[doc_ids] += impacts` sobre un arreglo
+      denso + argpartition: sin bucles Python por documento.
+`rrf_fuse` combina listas ordenadas (densa y léxica): score(d) = sum 1 / (k + rango).
+"""
+from __future__ import annotations  # Tipos adelantados.
+import re, unicodedata  # Tokenización.
+from collections import Counter  # Frecuencia de términos por documento.
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple  # Tipos.
+import numpy as np  # Listas invertidas y acumulación de scores.
+from .search_engine import top_k  # Top-k con argpartition.
+
+STOPWORDS = frozenset("""
+a al algo ante antes como con contra cual cuando de del desde donde durante e el ella ellas ellos en entre era es esa
+esas ese eso esos esta estas este esto estos fue ha hay la las le les lo los mas me mi mis muy ni no nos o os otra otras
+otro otros para pero por porque que quien se sea segun ser si sin sobre su sus tambien te ti tu tus u un una uno unos y ya
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+def fold(text: str) -> str:  # "Matrícula Nº 5" -> "matricula no 5" (tokenize: ["matricula", "5"])
+    t = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in t if not unicodedata.combining(c))
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(fold(text or "")) if t not in STOPWORDS]
+
+class BM25Index:
+    def __init__(self, texts: Sequence[str], k1: float = 1.2, b: float = 0.75):
+        self.k1, self.b = k1, b
+        self.n_docs = len(texts)
+        self.vocab: Dict[str, int] = {}
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        tfs: List[int] = []
+        lengths = np.zeros(self.n_docs, dtype=np.float32)
+        for d, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[d] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                term_ids.append(self.vocab.setdefault(term, len(self.vocab)))
+                doc_ids.append(d)
+                tfs.append(tf)
+        t = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(t, kind="stable")  # Agrupa postings por término (docs ascendentes dentro de cada uno).
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int32)[order]
+        tf = np.asarray(tfs, dtype=np.float32)[order]
+        df = np.bincount(t, minlength=len(self.vocab)).astype(np.float32)
+        self.indptr = np.concatenate([[0], np.cumsum(df, dtype=np.int64)])
+        avgdl = float(lengths.mean()) if self.n_docs else 0.0
+        idf = np.log1p((self.n_docs - df + 0.5) / (df + 0.5))  # idf de Lucene: log(1 + (N - df + 0.5) / (df + 0.5)), nunca negativo.
+        norm = k1 * (1 - b + b * lengths[self.doc_ids] / (avgdl or 1.0))
+        self.impacts = (idf[t[order]] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def scores(self, query: str) -> np.ndarray:  # Score BM25 de todos los documentos (0 si no comparten términos).
+        out = np.zeros(self.n_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            tid = self.vocab.get(term)
+            if tid is None:
+                continue
+            lo, hi = self.indptr[tid], self.indptr[tid + 1]
+            out[self.doc_ids[lo:hi]] += self.impacts[lo:hi]  # Docs únicos por término: += por índice es correcto.
+        return out
+
+    def search(self, query: str, k: int) -> Tuple[List[int], List[float]]:
+        if self.n_docs == 0:
+            return [], []
+        s = self.scores(query)
+        idx = top_k(s, min(k, self.n_docs))
+        idx = idx[s[idx] > 0]  # Solo documentos con algún término en común.
+        return idx.tolist(), s[idx].tolist()
+
+def rrf_fuse(rankings: Iterable[Sequence[int]], k: int, rrf_k: float = 60.0,
+             weights: Optional[Sequence[float]] = None) -> Tuple[List[int], List[float]]:
+    """Fusiona listas de ids ordenadas (mejor primero) -> (top-k ids, scores RRF)."""
+    fused: Dict[int, float] = {}
+    for i, ranking in enumerate(rankings):
+        w = 1.0 if weights is None else weights[i]
+        for rank, doc in enumerate(ranking):
+            fused[int(doc)] = fused.get(int(doc), 0.0) + w / (rrf_k + rank + 1)
+    best = sorted(fused.items(), key=lambda kv: (-kv[1], kv[0]))[:k]
+    return [d for d, _ in best], [s for _, s in best]
@@ -0,0 +1,418 @@
+"""Motor de búsqueda vectorial con índices intercambiables.
+
+Todos los índices implementan la misma interfaz (`VectorIndex`):
+    build(ids, vectors)   -> (re)construye el índice completo.
+    add(ids, vectors)     -> agrega vectores nuevos (p.ej. mensajes de WhatsApp recién ingeridos).
+    remove(ids)           -> elimina por id; devuelve cuántos borró.
+    search(query, k)      -> (ids, similitudes coseno) de mayor a menor.
+    save(path) / load_index(path) -> persistencia en disco.
+
+Implementaciones:
+    - FlatIndex: búsqueda exacta (producto matriz-vector + argpartition). Referencia de recall.
+    - IVFIndex: índice invertido con k-means esférico en NumPy puro. Perillas: `nlist`
+      (cantidad de listas) y `nprobe` (listas visitadas por consulta; más = más recall y más latencia).
+    - HNSWIndex: grafo HNSW usando `hnswlib` si está instalado (opcional). Perillas: `M`,
+      `ef_construction` y `ef_search`.
+
+La similitud es coseno: los vectores se normalizan L2 al entrar, así coseno = producto punto.
+Los ids son enteros (int64) elegidos por el llamador (p.ej. posición del fragmento).
+"""
+from __future__ import annotations  # Tipos adelantados.
+import json  # Metadatos de los archivos guardados.
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type  # Tipos.
+import numpy as np  # Álgebra vectorial.
+
+try:  # Dependencia opcional: solo necesaria para kind="hnsw".
+    import hnswlib  # type: ignore
+except ImportError:  # pragma: no cover - depende del entorno
+    hnswlib = None
+
+# ============================= Utilidades =============================
+
+def normalize_rows(mat: Any) -> np.ndarray:  # Copia float32 contigua con filas de norma 1.
+    out = np.array(mat, dtype=np.float32, order="C", copy=True, ndmin=2)
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0  # Filas vacías quedan en cero (similitud 0) en vez de NaN.
+    out /= norms
+    return out
+
+def normalize_query(vec: Any) -> np.ndarray:  # Vector de consulta float32 de norma 1 (o ceros si es nulo).
+    q = np.asarray(vec, dtype=np.float32).reshape(-1)
+    n = float(np.linalg.norm(q))
+    return q / n if n > 0 else q
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:  # Posiciones de los k mayores puntajes, de mayor a menor.
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores)
+    cand = np.argpartition(scores, n - k)[n - k:]  # Selección O(N): los k mejores sin ordenar.
+    return cand[np.argsort(-scores[cand])]  # Orden solo de k elementos.
+
+def _as_ids(ids: Iterable[int]) -> np.ndarray:
+    return np.asarray(list(ids) if not isinstance(ids, np.ndarray) else ids, dtype=np.int64).reshape(-1)
+
+# ============================= Interfaz =============================
+
+class VectorIndex:
+    """Interfaz común. Las subclases se registran en INDEX_TYPES con su `kind`."""
+
+    kind = "base"
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def build(self, ids: Iterable[int], vectors: Any, normalized: bool = False) -> None:
+        raise NotImplementedError
+
+    def add(self, ids: Iterable[int], vectors: Any, normalized: bool = False) -> None:
+        raise NotImplementedError
+
+    def remove(self, ids: Iterable[int]) -> int:
+        raise NotImplementedError
+
+    def search(self, query: Any, k: int) -> Tuple[List[int], List[float]]:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def params(self) -> Dict[str, Any]:  # Perillas actuales (se guardan junto al índice).
+        return {}
+
+    def save(self, path: str) -> None:
+        raise NotImplementedError
+
+    @classmethod
+    def _load(cls, path: str, meta: Dict[str, Any]) -> "VectorIndex":
+        raise NotImplementedError
+
+    def _prepare(self, ids: Iterable[int], vectors: Any, normalized: bool) -> Tuple[np.ndarray, np.ndarray]:
+        ids_arr = _as_ids(ids)
+        if normalized:  # Ya vienen float32 normalizados (p.ej. FragmentIndex): evitamos la copia.
+            vecs = np.ascontiguousarray(vectors, dtype=np.float32)
+        else:
+            vecs = normalize_rows(vectors) if len(ids_arr) else np.zeros((0, self.dim), dtype=np.float32)
+        if vecs.ndim != 2 or vecs.shape[0] != ids_arr.shape[0] or (vecs.shape[0] and vecs.shape[1] != self.dim):
+            raise ValueError(f"se esperaban {ids_arr.shape[0]} vectores de dimensión {self.dim}, llegó {vecs.shape}")
+        return ids_arr, vecs
+
+    def _write_npz(self, path: str, **arrays: np.ndarray) -> None:
+        meta = {"kind": self.kind, "dim": self.dim, "params": self.params()}
+        with open(path, "wb") as f:  # Abrimos nosotros para que numpy no agregue ".npz" al nombre.
+            np.savez(f, meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8), **arrays)
+
+# ============================= Flat (exacto) =============================
+
+class FlatIndex(VectorIndex):
+    """Búsqueda exacta: una matriz (N x dim) + ids alineados por fila."""
+
+    kind = "flat"
+
+    def __init__(self, dim: int):
+        super().__init__(dim)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+
+    def build(self, ids, vectors, normalized=False):
+        self.ids, self.vectors = self._prepare(ids, vectors, normalized)
+
+    def add(self, ids, vectors, normalized=False):
+        ids_arr, vecs = self._prepare(ids, vectors, normalized)
+        if not len(ids_arr):
+            return
+        self.remove(ids_arr)  # Re-agregar un id existente lo reemplaza.
+        self.ids = np.concatenate([self.ids, ids_arr])
+        self.vectors = np.vstack([self.vectors, vecs])
+
+    def remove(self, ids):
+        mask = np.isin(self.ids, _as_ids(ids))
+        removed = int(mask.sum())
+        if removed:
+            keep = ~mask
+            self.ids = self.ids[keep]
+            self.vectors = np.ascontiguousarray(self.vectors[keep])
+        return removed
+
+    def search(self, query, k):
+        if not len(self.ids):
+            return [], []
+        scores = self.vectors @ normalize_query(query)
+        pos = top_k(scores, k)
+        return self.ids[pos].tolist(), scores[pos].tolist()
+
+    def __len__(self):
+        return int(self.ids.shape[0])
+
+    def save(self, path):
+        self._write_npz(path, ids=self.ids, vectors=self.vectors)
+
+    @classmethod
+    def _load(cls, path, meta):
+        idx = cls(meta["dim"])
+        with np.load(path) as z:
+            idx.ids, idx.vectors = z["ids"], np.ascontiguousarray(z["vectors"])
+        return idx
+
+# ============================= IVF (NumPy puro) =============================
+
+class IVFIndex(VectorIndex):
+    """Índice invertido: k-means esférico agrupa los vectores en `nlist` listas; cada consulta
+    solo puntúa las `nprobe` listas cuyos centroides son más parecidos.
+
+    Costo por consulta ≈ nlist + N * nprobe / nlist productos punto (vs N en Flat).
+    El primer build/add entrena los centroides; `nlist` se acota a N si hay pocos vectores.
+    """
+
+    kind = "ivf"
+
+    def __init__(self, dim: int, nlist: int = 0, nprobe: int = 8, train_iters: int = 10,
+                 train_sample: int = 50_000, seed: int = 0):
+        super().__init__(dim)
+        self.nlist = nlist  # 0 = automático (~4 * sqrt(N)) al construir.
+        self.nprobe = nprobe
+        self.train_iters = train_iters
+        self.train_sample = train_sample
+        self.seed = seed
+        self.centroids = np.zeros((0, dim), dtype=np.float32)
+        self.list_ids: List[np.ndarray] = []
+        self.list_vecs: List[np.ndarray] = []
+        self._where: Dict[int, int] = {}  # id -> número de lista (para remove O(tamaño de lista)).
+
+    def params(self):
+        return {"nlist": self.nlist, "nprobe": self.nprobe, "train_iters": self.train_iters,
+                "train_sample": self.train_sample, "seed": self.seed}
+
+    def _train(self, vecs: np.ndarray) -> None:  # k-means esférico (Lloyd con centroides renormalizados).
+        rng = np.random.default_rng(self.seed)
+        n = vecs.shape[0]
+        nlist = self.nlist or max(1, int(4 * np.sqrt(n)))
+        nlist = min(nlist, n)
+        sample = vecs[rng.choice(n, size=min(n, max(self.train_sample, nlist)), replace=False)]
+        cent = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+        for _ in range(self.train_iters):
+            assign = np.argmax(sample @ cent.T, axis=1)
+            sums = np.zeros_like(cent)
+            np.add.at(sums, assign, sample)
+            empty = np.bincount(assign, minlength=nlist) == 0
+            sums[empty] = sample[rng.choice(sample.shape[0], size=int(empty.sum()))]  # Re-siembra listas vacías.
+            cent = normalize_rows(sums)
+        self.nlist = nlist
+        self.centroids = cent
+
+    def _assign(self, vecs: np.ndarray) -> np.ndarray:
+        out = np.empty(vecs.shape[0], dtype=np.int64)
+        for s in range(0, vecs.shape[0], 16384):  # Por bloques para acotar la matriz temporal.
+            out[s:s + 16384] = np.argmax(vecs[s:s + 16384] @ self.centroids.T, axis=1)
+        return out
+
+    def build(self, ids, vectors, normalized=False):
+        ids_arr, vecs = self._prepare(ids, vectors, normalized)
+        self.centroids = np.zeros((0, self.dim), dtype=np.float32)
+        self.list_ids, self.list_vecs, self._where = [], [], {}
+        if len(ids_arr):
+            self._train(vecs)
+            self.list_ids = [np.empty(0, dtype=np.int64) for _ in range(self.nlist)]
+            self.list_vecs = [np.zeros((0, self.dim), dtype=np.float32) for _ in range(self.nlist)]
+            self._insert(ids_arr, vecs)
+
+    def _insert(self, ids_arr: np.ndarray, vecs: np.ndarray) -> None:
+        assign = self._assign(vecs)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(self.nlist + 1))
+        for li in range(self.nlist):
+            sel = order[bounds[li]:bounds[li + 1]]
+            if not len(sel):
+                continue
+            self.list_ids[li] = np.concatenate([self.list_ids[li], ids_arr[sel]])
+            self.list_vecs[li] = np.vstack([self.list_vecs[li], vecs[sel]])
+            for i in ids_arr[sel].tolist():
+                self._where[i] = li
+
+    def add(self, ids, vectors, normalized=False):
+        ids_arr, vecs = self._prepare(ids, vectors, normalized)
+        if not len(ids_arr):
+            return
+        if not len(self.centroids):  # Índice vacío: el primer lote entrena los centroides.
+            self.build(ids_arr, vecs, normalized=True)
+            return
+        self.remove(ids_arr)
+        self._insert(ids_arr, vecs)
+
+    def remove(self, ids):
+        by_list: Dict[int, List[int]] = {}
+        for i in _as_ids(ids).tolist():
+            li = self._where.pop(i, None)
+            if li is not None:
+                by_list.setdefault(li, []).append(i)
+        for li, gone in by_list.items():
+            keep = ~np.isin(self.list_ids[li], gone)
+            self.list_ids[li] = self.list_ids[li][keep]
+            self.list_vecs[li] = self.list_vecs[li][keep]
+        return sum(len(g) for g in by_list.values())
+
+    def search(self, query, k):
+        if not self._where:
+            return [], []
+        q = normalize_query(query)
+        probe = top_k(self.centroids @ q, min(self.nprobe, self.nlist))
+        ids_parts, score_parts = [], []
+        for li in probe.tolist():
+            if len(self.list_ids[li]):
+                ids_parts.append(self.list_ids[li])
+                score_parts.append(self.list_vecs[li] @ q)
+        if not ids_parts:
+            return [], []
+        cand_ids, scores = np.concatenate(ids_parts), np.concatenate(score_parts)
+        pos = top_k(scores, k)
+        return cand_ids[pos].tolist(), scores[pos].tolist()
+
+    def __len__(self):
+        return len(self._where)
+
+    def save(self, path):
+        sizes = np.array([len(x) for x in self.list_ids], dtype=np.int64)
+        ids = np.concatenate(self.list_ids) if self.list_ids else np.empty(0, dtype=np.int64)
+        vecs = np.vstack(self.list_vecs) if self.list_vecs else np.zeros((0, self.dim), dtype=np.float32)
+        self._write_npz(path, centroids=self.centroids, sizes=sizes, ids=ids, vectors=vecs)
+
+    @classmethod
+    def _load(cls, path, meta):
+        idx = cls(meta["dim"], **meta.get("params", {}))
+        with np.load(path) as z:
+            idx.centroids = z["centroids"]
+            bounds = np.concatenate([[0], np.cumsum(z["sizes"])])
+            ids, vecs = z["ids"], z["vectors"]
+        idx.list_ids = [ids[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+        idx.list_vecs = [np.ascontiguousarray(vecs[bounds[i]:bounds[i + 1]]) for i in range(len(bounds) - 1)]
+        idx._where = {i: li for li, arr in enumerate(idx.list_ids) for i in arr.tolist()}
+        return idx
+
+# ============================= HNSW (hnswlib opcional) =============================
+
+class HNSWIndex(VectorIndex):
+    """Grafo HNSW vía `hnswlib` (pip install hnswlib). Mejor relación recall/latencia que IVF
+    para índices grandes; `ef_search` se puede ajustar en caliente."""
+
+    kind = "hnsw"
+
+    def __init__(self, dim: int, M: int = 16, ef_construction: int = 200, ef_search: int = 64,
+                 capacity: int = 1024):
+        if hnswlib is None:
+            raise ImportError("kind='hnsw' requiere el paquete opcional hnswlib (pip install hnswlib)")
+        super().__init__(dim)
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.capacity = capacity
+        self._count = 0
+        self._new_graph(capacity)
+
+    def _new_graph(self, capacity: int) -> None:
+        self._graph = hnswlib.Index(space="ip", dim=self.dim)  # ip sobre vectores normalizados = coseno.
+        self._graph.init_index(max_elements=max(capacity, 1), ef_construction=self.ef_construction,
+                               M=self.M, allow_replace_deleted=True)
+        self._graph.set_ef(self.ef_search)
+        self.capacity = max(capacity, 1)
+        self._count = 0
+
+    def params(self):
+        return {"M": self.M, "ef_construction": self.ef_construction, "ef_search": self.ef_search,
+                "capacity": self.capacity}
+
+    def set_ef(self, ef_search: int) -> None:  # Perilla recall/latencia sin reconstruir.
+        self.ef_search = ef_search
+        self._graph.set_ef(ef_search)
+
+    def build(self, ids, vectors, normalized=False):
+        ids_arr, vecs = self._prepare(ids, vectors, normalized)
+        self._new_graph(max(len(ids_arr), self.capacity))
+        if len(ids_arr):
+            self._graph.add_items(vecs, ids_arr)
+            self._count = len(ids_arr)
+
+    def add(self, ids, vectors, normalized=False):
+        ids_arr, vecs = self._prepare(ids, vectors, normalized)
+        if not len(ids_arr):
+            return
+        self.remove(ids_arr)
+        needed = self._count + len(ids_arr)
+        if needed > self.capacity:
+            self.capacity = max(needed, self.capacity * 2)
+            self._graph.resize_index(self.capacity)
+        self._graph.add_items(vecs, ids_arr, replace_deleted=True)
+        self._count += len(ids_arr)
+
+    def remove(self, ids):
+        removed = 0
+        for i in _as_ids(ids).tolist():
+            try:
+                self._graph.mark_deleted(i)
+                removed += 1
+            except RuntimeError:  # id inexistente o ya borrado.
+                pass
+        self._count -= removed
+        return removed
+
+    def search(self, query, k):
+        if self._count == 0:
+            return [], []
+        k = min(k, self._count)
+        labels, dists = self._graph.knn_query(normalize_query(query), k=k)
+        return labels[0].astype(np.int64).tolist(), (1.0 - dists[0]).tolist()  # hnswlib "ip" devuelve 1 - ip.
+
+    def __len__(self):
+        return self._count
+
+    def save(self, path):
+        graph_path = path + ".hnsw"
+        self._graph.save_index(graph_path)
+        self._write_npz(path, count=np.array([self._count], dtype=np.int64))
+
+    @classmethod
+    def _load(cls, path, meta):
+        params = meta.get("params", {})
+        idx = cls(meta["dim"], **{**params, "capacity": 1})  # Grafo mínimo: se reemplaza a continuación.
+        idx._graph = hnswlib.Index(space="ip", dim=idx.dim)
+        idx.capacity = params.get("capacity", 1024)
+        idx._graph.load_index(path + ".hnsw", max_elements=idx.capacity, allow_replace_deleted=True)
+        idx._graph.set_ef(idx.ef_search)
+        with np.load(path) as z:
+            idx._count = int(z["count"][0])
+        return idx
+
+# ============================= Registro / fábrica =============================
+
+INDEX_TYPES: Dict[str, Type[VectorIndex]] = {
+    FlatIndex.kind: FlatIndex,
+    IVFIndex.kind: IVFIndex,
+    HNSWIndex.kind: HNSWIndex,
+}
+
+def create_index(kind: str, dim: int, **params: Any) -> VectorIndex:  # Crea un índice vacío por nombre.
+    try:
+        cls = INDEX_TYPES[kind]
+    except KeyError:
+        raise ValueError(f"Tipo de índice desconocido: {kind!r} (opciones: {', '.join(INDEX_TYPES)})")
+    return cls(dim, **params)
+
+def load_index(path: str) -> VectorIndex:  # Carga cualquier índice guardado con .save(path).
+    with np.load(path) as z:
+        meta = json.loads(z["meta"].tobytes().decode("utf-8"))
+    return INDEX_TYPES[meta["kind"]]._load(path, meta)
+
+def parse_params(spec: Optional[str]) -> Dict[str, Any]:  # "nlist=256,nprobe=16" -> {"nlist": 256, "nprobe": 16}
+    out: Dict[str, Any] = {}
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        key, val = (x.strip() for x in part.split("=", 1))
+        try:
+            out[key] = int(val)
+        except ValueError:
+            try:
+                out[key] = float(val)
+            except ValueError:
+                out[key] = val
+    return out
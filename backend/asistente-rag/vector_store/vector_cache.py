@@ -0,0 +1,64 @@
+"""Cache persistente de vectores de fragmentos, indexado por hash de contenido (texto + modelo + backend).
+
+El builder (build_index.py) consulta aquí antes de llamar al modelo: tras editar un artículo con
+algún `clean_data/fix_*.py` solo se recalculan los chunks cuyo hash cambió. Tabla SQLite:
+    fragment_vectors(key TEXT PRIMARY KEY, dim INTEGER, vec BLOB float32, last_used REAL)
+"""
+from __future__ import annotations  # Tipos adelantados.
+import os, time, sqlite3, hashlib  # Persistencia y claves.
+from typing import Dict, Iterable, Sequence  # Tipos.
+import numpy as np  # Vectores.
+
+_CHUNK = 500  # Parámetros por consulta IN (...) (SQLite admite 999 por defecto en versiones viejas).
+
+def content_key(text: str, model: str, backend: str = "torch") -> str:  # Cambia si cambia el texto, el modelo o el backend.
+    # Los vectores ONNX/int8 difieren de los de torch; torch conserva las claves anteriores.
+    namespace = model if backend == "torch" else f"{model}:{backend}"
+    return hashlib.sha1(f"{namespace}\0{text}".encode("utf-8")).hexdigest()
+
+class VectorCache:
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = sqlite3.connect(db_path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS fragment_vectors (key TEXT PRIMARY KEY, dim INTEGER NOT NULL, vec BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM fragment_vectors").fetchone()[0]
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        out: Dict[str, np.ndarray] = {}
+        keys = list(dict.fromkeys(keys))
+        for i in range(0, len(keys), _CHUNK):
+            part = keys[i:i + _CHUNK]
+            rows = self._db.execute(
+                f"SELECT key, vec FROM fragment_vectors WHERE key IN ({','.join('?' * len(part))})", part
+            ).fetchall()
+            out.update((k, np.frombuffer(v, dtype=np.float32)) for k, v in rows)
+        if out:
+            now = time.time()
+            self._db.executemany("UPDATE fragment_vectors SET last_used = ? WHERE key = ?", [(now, k) for k in out])
+            self._db.commit()
+        return out
+
+    def put_many(self, keys: Sequence[str], vectors: np.ndarray) -> None:
+        mat = np.asarray(vectors, dtype=np.float32).reshape(len(keys), -1)
+        now = time.time()
+        self._db.executemany(
+            "INSERT OR REPLACE INTO fragment_vectors (key, dim, vec, last_used) VALUES (?,?,?,?)",
+            [(k, mat.shape[1], mat[i].tobytes(), now) for i, k in enumerate(keys)],
+        )
+        self._db.commit()
+
+    def prune(self, keep: Iterable[str]) -> int:  # Borra todo lo que no esté en `keep`; devuelve filas borradas.
+        keep = set(keep)
+        stale = [k for (k,) in self._db.execute("SELECT key FROM fragment_vectors") if k not in keep]
+        self._db.executemany("DELETE FROM fragment_vectors WHERE key = ?", [(k,) for k in stale])
+        self._db.commit()
+        return len(stale)
+
+    def close(self) -> None:
+        self._db.close()